@@ -0,0 +1,139 @@
+"""
+Shared cache server for multi-worker deployments.
+
+One process owns the embedding model and the Tier-2 semantic cache (index,
+LRU/TTL policy and persistence). API workers started with CACHE_SERVER_SOCKET
+pointing at its unix socket embed and search through it, so the model is
+loaded once, embedding requests from every worker share encode batches, and
+an entry added by one worker is a hit for all of them.
+
+    python -m api.cache_server --socket /tmp/semantic-cache.sock
+    CACHE_SERVER_SOCKET=/tmp/semantic-cache.sock uvicorn api.main:app --workers 4
+
+The server reads the same T2 and embedding settings as the API
+(SEMANTIC_INDEX_BACKEND, CACHE_PERSIST_DIR, EMBEDDING_BACKEND, ...).
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+from multiprocessing.connection import AuthenticationError, Client, Listener
+
+# This process is the server, so its own services must run locally.
+DEFAULT_SOCKET = os.environ.pop("CACHE_SERVER_SOCKET", "") or "/tmp/semantic-cache.sock"
+
+import numpy as np
+
+from .services import cache_manager, llm_provider, metrics_manager
+from .services.cache_client import CACHE_SERVER_AUTHKEY
+
+_connections = 0
+_connections_lock = threading.Lock()
+
+
+# --- Operations ---
+def _embed(texts: list[str]) -> np.ndarray:
+    embeddings = llm_provider.get_embeddings(texts)
+    if any(len(embedding) == 0 for embedding in embeddings):
+        raise RuntimeError("embedding failed; see the cache server log")
+    return np.stack(embeddings)
+
+def _find(embeddings: np.ndarray) -> list[dict | None]:
+    return cache_manager.find_in_semantic_cache_batch([None] * len(embeddings), list(embeddings))
+
+def _add(prompts: list[str], responses: list[str], ttl: float | None, embeddings: np.ndarray,
+         costs: list[float] | None = None):
+    cache_manager.add_to_semantic_cache_batch(prompts, responses, ttl, list(embeddings), costs)
+
+def _stats() -> dict:
+    return {
+        "pid": os.getpid(),
+        "connections": _connections,
+        "entries": len(cache_manager.policy),
+        "index_backend": cache_manager.SEMANTIC_INDEX_BACKEND,
+        "embedding_backend": llm_provider.EMBEDDING_BACKEND,
+        "embedding_batcher": llm_provider.embedding_batcher.get_stats(),
+        "embedding_cache": llm_provider.embedding_cache.get_stats(),
+        "similarity": metrics_manager.get_metrics()["similarity"],
+        "write_behind": cache_manager.write_behind.get_stats() if cache_manager.write_behind else None,
+    }
+
+OPERATIONS = {
+    "ping": lambda: "pong",
+    "embed": _embed,
+    "find": _find,
+    "add": _add,
+    "stats": _stats,
+    "snapshot": cache_manager.snapshot_cache,
+}
+
+
+# --- Connections ---
+def _serve_connection(conn):
+    global _connections
+    with _connections_lock:
+        _connections += 1
+    try:
+        with conn:
+            while True:
+                try:
+                    op, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = ("ok", OPERATIONS[op](*args))
+                except Exception as e:
+                    print(f"Error in cache server '{op}': {e!r}")
+                    reply = ("error", repr(e))
+                conn.send(reply)
+    finally:
+        with _connections_lock:
+            _connections -= 1
+
+def serve(socket_path: str, authkey: bytes | None = None):
+    """Accepts worker connections on `socket_path` until SIGTERM or Ctrl-C."""
+    if os.path.exists(socket_path):
+        try:
+            Client(socket_path, family="AF_UNIX", authkey=authkey).close()
+            sys.exit(f"A cache server is already listening on {socket_path}.")
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Left behind by a server that did not shut down cleanly.
+            os.unlink(socket_path)
+    if llm_provider.EMBEDDING_PRELOAD:
+        llm_provider.load_embedding_model()
+
+    # Owner-only socket: requests are unpickled, so only this user may connect.
+    umask = os.umask(0o177)
+    try:
+        listener = Listener(socket_path, family="AF_UNIX", authkey=authkey)
+    finally:
+        os.umask(umask)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"Cache server listening on {socket_path} (pid {os.getpid()}).")
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except AuthenticationError as e:
+                print(f"Error in cache server: rejected a connection: {e}")
+                continue
+            threading.Thread(target=_serve_connection, args=(conn,), name="cache-server-conn", daemon=True).start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        cache_manager.flush_writes()
+        cache_manager.snapshot_cache()
+        print("Cache server stopped.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Unix socket path (default: CACHE_SERVER_SOCKET).")
+    args = parser.parse_args()
+    serve(args.socket, CACHE_SERVER_AUTHKEY)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,84 +1,609 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-import time
-import os
-import redis
-
-from .services import cache_manager, llm_provider, metrics_manager
-
-app = FastAPI(title="Semantic Cache API")
-
-# --- NEW: Redis Connection for Tier-1 Cache ---
-try:
-    redis_client = redis.Redis(
-        host=os.getenv("REDIS_HOST", "localhost"),
-        port=int(os.getenv("REDIS_PORT", 6379)),
-        decode_responses=True # Important to get strings back
-    )
-    redis_client.ping()
-    print("Successfully connected to Redis.")
-except Exception as e:
-    print(f"Error connecting to Redis: {e}")
-    redis_client = None
-
-class PromptRequest(BaseModel):
-    prompt: str
-
-@app.post("/process-prompt/")
-def process_prompt(request: PromptRequest):
-    start_time = time.time()
-    prompt = request.prompt
-
-    # --- TIER 1 CACHE CHECK: Redis (Exact Match) ---
-    if redis_client:
-        cached_response = redis_client.get(prompt)
-        if cached_response:
-            end_time = time.time()
-            latency = end_time - start_time
-            print("DEBUG: T1 EXACT-MATCH CACHE HIT!")
-            metrics_manager.update_metrics(is_hit=True, latency_saved=max(0, 2.5 - latency))
-            return {
-                "response": cached_response,
-                "from_cache": True, "cache_tier": 1,
-                "latency": latency, "similarity": 1.0
-            }
-
-    # --- TIER 2 CACHE CHECK: ChromaDB (Semantic Match) ---
-    cached_result = cache_manager.find_in_semantic_cache(prompt)
-    if cached_result:
-        end_time = time.time()
-        latency = end_time - start_time
-        # Promote to Tier 1 cache for faster future access
-        if redis_client:
-            redis_client.set(prompt, cached_result["response"])
-        metrics_manager.update_metrics(is_hit=True, latency_saved=max(0, 2.5 - latency))
-        return {
-            "response": cached_result["response"],
-            "from_cache": True, "cache_tier": 2,
-            "latency": latency, "similarity": cached_result.get("similarity", 0)
-        }
-
-    # --- TIER 3: LLM Call (Cache Miss) ---
-    print("DEBUG: T1 & T2 Cache Miss. Calling LLM.")
-    llm_response = llm_provider.get_llm_response(prompt)
-    
-    # --- Cache Admission & Population ---
-    if cache_manager.is_response_high_quality(llm_response):
-        # Add to both caches for future requests
-        if redis_client:
-            redis_client.set(prompt, llm_response)
-        cache_manager.add_to_semantic_cache(prompt, llm_response)
-    
-    end_time = time.time()
-    latency = end_time - start_time
-    metrics_manager.update_metrics(is_hit=False)
-
-    return {
-        "response": llm_response,
-        "from_cache": False, "cache_tier": None,
-        "latency": latency
-    }
-
-@app.get("/metrics/")
-def get_metrics_endpoint():
-    return metrics_manager.get_metrics()
\ No newline at end of file
+import asyncio
+from contextlib import asynccontextmanager, ExitStack
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+import time
+import os
+import json
+import redis.asyncio as aioredis
+
+from .services import cache_manager, llm_provider, metrics_manager, t1_cache
+from .services.coalescer import RequestCoalescer
+from .services.l0_cache import L0Cache, listen_for_invalidations
+from .services.speculation import SpeculativeDispatcher
+from .services.trace_recorder import TraceRecorder
+
+# --- NEW: Redis Connection for Tier-1 Cache ---
+# An asyncio client over a shared connection pool; connectivity is checked
+# once at startup and T1 is skipped entirely if Redis is unreachable. Keys
+# and values are encoded by t1_cache (canonicalized hashed keys, compressed
+# values), so the client works with raw bytes.
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+redis_pool = aioredis.ConnectionPool(
+    host=os.getenv("REDIS_HOST", "localhost"),
+    port=int(os.getenv("REDIS_PORT", 6379)),
+    max_connections=REDIS_MAX_CONNECTIONS,
+    decode_responses=False # t1_cache decodes (and decompresses) values
+)
+redis_client = aioredis.Redis(connection_pool=redis_pool)
+
+# --- Tier-0: In-Process LRU ---
+# The hottest responses are also kept in this worker's memory, so a repeat
+# hit skips the Redis round trip. Bounded by entry count and UTF-8 bytes
+# (0 for either disables L0). T1 writes from other workers invalidate
+# entries over Redis pub/sub; while that subscription is down, entries
+# older than L0_FALLBACK_TTL_SECONDS are ignored instead.
+L0_MAX_ENTRIES = int(os.getenv("L0_MAX_ENTRIES", 512))
+L0_MAX_BYTES = int(os.getenv("L0_MAX_BYTES", 8 * 1024 * 1024))
+L0_FALLBACK_TTL_SECONDS = float(os.getenv("L0_FALLBACK_TTL_SECONDS", 5))
+l0_cache = L0Cache(
+    t1_cache.make_key,
+    max_entries=L0_MAX_ENTRIES,
+    max_bytes=L0_MAX_BYTES,
+    fallback_ttl=L0_FALLBACK_TTL_SECONDS,
+    max_ttl=t1_cache.T1_TTL_SECONDS
+)
+
+# --- Request Tracing ---
+# With TRACE_FILE set, /process-prompt/ appends one JSON line per request
+# (prompt, tier, similarity, stage latencies) to it and the prompt's
+# embedding to a float32 sidecar next to it, for offline replay with
+# benchmarks/replay_trace.py. Writes happen on a background thread; if it
+# falls TRACE_MAX_PENDING events behind, further events are dropped.
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_MAX_PENDING = int(os.getenv("TRACE_MAX_PENDING", 10000))
+trace_recorder = TraceRecorder(TRACE_FILE, max_pending=TRACE_MAX_PENDING)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global redis_client
+    invalidation_task = None
+    try:
+        await redis_client.ping()
+        print("Successfully connected to Redis.")
+        await t1_cache.configure_memory_limit(redis_client)
+        if l0_cache.enabled:
+            invalidation_task = asyncio.create_task(listen_for_invalidations(
+                redis_client, l0_cache, t1_cache.T1_INVALIDATION_CHANNEL, t1_cache.INSTANCE_ID
+            ))
+    except Exception as e:
+        print(f"Error connecting to Redis: {e}")
+        redis_client = None
+    if llm_provider.EMBEDDING_PRELOAD:
+        await asyncio.get_running_loop().run_in_executor(None, llm_provider.load_embedding_model)
+    yield
+    if invalidation_task:
+        invalidation_task.cancel()
+        try:
+            await invalidation_task
+        except asyncio.CancelledError:
+            pass
+    await redis_pool.disconnect()
+    cache_manager.flush_writes()
+    cache_manager.snapshot_cache()
+    cache_manager.executor.shutdown(wait=False)
+    trace_recorder.close()
+
+app = FastAPI(title="Semantic Cache API", lifespan=lifespan)
+
+# --- Single-Flight Coalescing ---
+# Concurrent misses on the same prompt share one LLM call. With
+# COALESCE_SEMANTIC=true, prompts within CACHE_THRESHOLD of an in-flight
+# prompt share its call too (this embeds the prompt before the T2 lookup).
+COALESCE_SEMANTIC = os.getenv("COALESCE_SEMANTIC", "false").lower() == "true"
+coalescer = RequestCoalescer(
+    similarity_threshold=cache_manager.CACHE_THRESHOLD if COALESCE_SEMANTIC else None
+)
+
+# --- Speculative LLM Dispatch ---
+# With SPECULATIVE_DISPATCH=true, a prompt that a cheap predictor (recent T2
+# miss rate, unseen words, length) rates at least SPECULATIVE_MIN_MISS_PROBABILITY
+# likely to miss starts its LLM call alongside the T2 lookup, so misses stop
+# paying for the lookup. The call is cancelled if T2 hits. Wasted calls are
+# capped at SPECULATIVE_MAX_WASTE_RATIO per needed LLM call, plus a burst of
+# SPECULATIVE_WASTE_BURST.
+SPECULATIVE_DISPATCH = os.getenv("SPECULATIVE_DISPATCH", "false").lower() == "true"
+SPECULATIVE_MIN_MISS_PROBABILITY = float(os.getenv("SPECULATIVE_MIN_MISS_PROBABILITY", 0.7))
+SPECULATIVE_MAX_WASTE_RATIO = float(os.getenv("SPECULATIVE_MAX_WASTE_RATIO", 0.1))
+SPECULATIVE_WASTE_BURST = float(os.getenv("SPECULATIVE_WASTE_BURST", 5))
+speculator = SpeculativeDispatcher(
+    enabled=SPECULATIVE_DISPATCH,
+    min_miss_probability=SPECULATIVE_MIN_MISS_PROBABILITY,
+    max_waste_ratio=SPECULATIVE_MAX_WASTE_RATIO,
+    burst=SPECULATIVE_WASTE_BURST
+)
+
+# --- Batch Endpoint Limits ---
+# Larger /process-prompts/ requests are rejected with 422.
+BATCH_MAX_PROMPTS = int(os.getenv("BATCH_MAX_PROMPTS", 256))
+
+class PromptRequest(BaseModel):
+    prompt: str
+
+class PromptsRequest(BaseModel):
+    prompts: list[str] = Field(max_length=BATCH_MAX_PROMPTS)
+
+@app.post("/process-prompt/")
+async def process_prompt(request: PromptRequest):
+    start_time = time.time()
+    prompt = request.prompt
+    trace = trace_recorder.start(prompt, start_time)
+
+    # --- TIER 0 CACHE CHECK: In-Process LRU ---
+    cached_response = l0_cache.get(prompt)
+    trace.stage("l0")
+    if cached_response:
+        latency = time.time() - start_time
+        metrics_manager.record_request("l0_hit", latency)
+        trace.finish("l0_hit", latency, cached_response, similarity=1.0)
+        return {
+            "response": cached_response,
+            "from_cache": True, "cache_tier": 0,
+            "latency": latency, "similarity": 1.0
+        }
+
+    # --- TIER 1 CACHE CHECK: Redis (Exact Match) ---
+    if redis_client:
+        cached_response = await t1_cache.lookup(redis_client, prompt)
+        trace.stage("t1")
+        if cached_response:
+            end_time = time.time()
+            latency = end_time - start_time
+            print("DEBUG: T1 EXACT-MATCH CACHE HIT!")
+            l0_cache.put(prompt, cached_response)
+            metrics_manager.record_request("t1_hit", latency)
+            trace.finish("t1_hit", latency, cached_response, similarity=1.0)
+            return {
+                "response": cached_response,
+                "from_cache": True, "cache_tier": 1,
+                "latency": latency, "similarity": 1.0
+            }
+
+    # --- Join an in-flight LLM call for the same prompt ---
+    may_speculate = speculator.enabled
+    pending = coalescer.join(prompt)
+    if pending is not None:
+        coalesced = await _await_coalesced(pending, start_time)
+        if coalesced:
+            trace.stage("llm")
+            trace.finish("llm_miss", coalesced["latency"], coalesced["response"], coalesced=True)
+            return coalesced
+        # The leader gave up, usually on a T2 hit our own lookup will repeat.
+        may_speculate = False
+
+    with ExitStack() as lead:
+        # --- Speculative LLM call, overlapping the T2 lookup ---
+        # A speculating request registers as the leader first, so identical
+        # prompts arriving during its T2 lookup wait for it instead of
+        # speculating too. With COALESCE_SEMANTIC the prompt is embedded first
+        # and nothing speculates while a near-duplicate is in flight.
+        lookup_start = time.time()
+        prompt_embedding = None
+        if coalescer.semantic_enabled:
+            prompt_embedding = await cache_manager.get_embedding_async(prompt)
+            trace.stage("embed")
+        result = speculation = features = None
+        if may_speculate and coalescer.match(prompt, prompt_embedding) is None:
+            speculate, features = speculator.decide(prompt)
+            if speculate:
+                result = lead.enter_context(coalescer.lead(prompt, prompt_embedding))
+                llm_start = time.time()
+                speculation = asyncio.create_task(llm_provider.get_llm_response_async(prompt))
+
+        # --- TIER 2 CACHE CHECK: Semantic Match ---
+        # Tracing embeds up front too, so the trace can reference the embedding.
+        try:
+            if prompt_embedding is None and trace.enabled:
+                prompt_embedding = await cache_manager.get_embedding_async(prompt)
+                trace.stage("embed")
+            cached_result = await cache_manager.find_in_semantic_cache_async(prompt, prompt_embedding)
+        except BaseException:
+            _discard_speculation(speculation)
+            raise
+        lookup_latency = time.time() - lookup_start
+        trace.stage("t2")
+        if features is not None:
+            speculator.observe(prompt, features, missed=not cached_result)
+        if cached_result:
+            # Leaving the block cancels a speculative lead; its followers do their own lookup.
+            _discard_speculation(speculation)
+            end_time = time.time()
+            latency = end_time - start_time
+            # Promote to Tiers 0 and 1 for faster future access
+            l0_cache.put(prompt, cached_result["response"])
+            if redis_client:
+                await t1_cache.store(redis_client, prompt, cached_result["response"])
+            metrics_manager.record_request("t2_hit", latency)
+            trace.finish("t2_hit", latency, cached_result["response"], cached_result.get("similarity"),
+                         prompt_embedding)
+            return {
+                "response": cached_result["response"],
+                "from_cache": True, "cache_tier": 2,
+                "latency": latency, "similarity": cached_result.get("similarity", 0)
+            }
+
+        # --- Join an in-flight LLM call for a near-duplicate prompt ---
+        if result is None:
+            pending = coalescer.join(prompt, prompt_embedding)
+            if pending is not None:
+                coalesced = await _await_coalesced(pending, start_time)
+                if coalesced:
+                    trace.stage("llm")
+                    trace.finish("llm_miss", coalesced["latency"], coalesced["response"], embedding=prompt_embedding,
+                                 coalesced=True)
+                    return coalesced
+
+        # --- TIER 3: LLM Call (Cache Miss) ---
+        print("DEBUG: T1 & T2 Cache Miss. Calling LLM.")
+        if result is None:
+            result = lead.enter_context(coalescer.lead(prompt, prompt_embedding))
+        llm_failed = False
+        try:
+            if speculation:
+                llm_response = await speculation
+            else:
+                llm_start = time.time()
+                llm_response = await llm_provider.get_llm_response_async(prompt)
+        except llm_provider.LLMError as e:
+            # Only this caller gets the error text: followers retry and nothing is cached.
+            llm_response, llm_failed = str(e), True
+        llm_latency = time.time() - llm_start
+        if not llm_failed:
+            metrics_manager.record_llm_call(llm_latency)
+        if speculator.enabled:
+            speculator.record_llm_call(speculation is not None, overlapped=lookup_latency)
+        trace.stage("llm")
+        if llm_failed:
+            result.cancel()
+        else:
+            # Release any followers before spending time on cache population.
+            result.set_result(llm_response)
+
+        # --- Cache Admission & Population ---
+        cacheable = not llm_failed and cache_manager.is_response_high_quality(llm_response)
+        if cacheable:
+            # Add to every tier for future requests
+            l0_cache.put(prompt, llm_response)
+            if redis_client:
+                await t1_cache.store(redis_client, prompt, llm_response)
+            # Stay registered until the entry is in T2 (it may be queued for the write-behind thread).
+            coalescer.hold(result, await cache_manager.add_to_semantic_cache_async(prompt, llm_response,
+                                                                                 cost=llm_latency))
+            trace.stage("admit")
+
+    end_time = time.time()
+    latency = end_time - start_time
+    metrics_manager.record_request("llm_miss", latency)
+    trace.finish("llm_miss", latency, llm_response, embedding=prompt_embedding, cacheable=cacheable)
+
+    return {
+        "response": llm_response,
+        "from_cache": False, "cache_tier": None,
+        "latency": latency
+    }
+
+def _discard_speculation(speculation):
+    """Cancels a speculative LLM call whose response is not needed."""
+    if speculation is None:
+        return
+    if not speculation.cancel() and not speculation.cancelled():
+        # Already finished; retrieve a failed call's LLMError so it isn't logged as unhandled.
+        speculation.exception()
+    speculator.record_wasted()
+    print("DEBUG: Discarded speculative LLM call.")
+
+async def _await_coalesced(pending, start_time, requests: int = 1):
+    """
+    Waits for a leader's LLM response on behalf of `requests` requests.
+    Returns None if the leader gave up.
+    """
+    try:
+        llm_response = await asyncio.shield(pending)
+    except asyncio.CancelledError:
+        if not pending.cancelled():
+            raise
+        return None
+    latency = time.time() - start_time
+    for _ in range(requests):
+        metrics_manager.record_request("llm_miss", latency)
+        metrics_manager.record_coalesced()
+    return {
+        "response": llm_response,
+        "from_cache": False, "cache_tier": None,
+        "latency": latency, "coalesced": True
+    }
+
+# --- Streaming (Server-Sent Events) ---
+# /process-prompt/stream sends a "meta" event (cache tier), then "chunk"
+# events with the response text, then a "done" event with the latency.
+# Cached answers are replayed in STREAM_REPLAY_CHUNK_CHARS-sized chunks.
+STREAM_REPLAY_CHUNK_CHARS = int(os.getenv("STREAM_REPLAY_CHUNK_CHARS", 64))
+_background_tasks = set()
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _sse_response(events):
+    return StreamingResponse(events, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def _replay_cached(response: str, start_time: float, **meta):
+    yield _sse("meta", meta)
+    size = max(1, STREAM_REPLAY_CHUNK_CHARS)
+    for offset in range(0, len(response), size):
+        yield _sse("chunk", {"text": response[offset:offset + size]})
+    yield _sse("done", {"latency": time.time() - start_time})
+
+def _start_streamed_miss(prompt: str, prompt_embedding, start_time: float) -> asyncio.Queue:
+    """
+    Registers the prompt as in flight and starts its LLM call as a background
+    task, so the caches are still populated if the client disconnects.
+    Returns the queue the response chunks arrive on (None marks the end).
+    """
+    stack = ExitStack()
+    result = stack.enter_context(coalescer.lead(prompt, prompt_embedding))
+    chunks = asyncio.Queue()
+    task = asyncio.create_task(_generate_and_cache(prompt, result, stack, start_time, chunks))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return chunks
+
+async def _generate_and_cache(prompt: str, result, lead: ExitStack, start_time: float, chunks: asyncio.Queue):
+    """Streams one LLM call into `chunks`, then assembles it for admission and caching."""
+    try:
+        with lead:
+            parts = []
+            llm_start = time.time()
+            try:
+                async for chunk in llm_provider.stream_llm_response_async(prompt):
+                    parts.append(chunk)
+                    chunks.put_nowait(chunk)
+            except llm_provider.LLMError:
+                # The client has been streamed the error; leaving the block
+                # cancels the lead, so followers retry and nothing is cached.
+                metrics_manager.record_request("llm_miss", time.time() - start_time)
+                return
+            llm_response = "".join(parts)
+            llm_latency = time.time() - llm_start
+            metrics_manager.record_llm_call(llm_latency)
+            metrics_manager.record_request("llm_miss", time.time() - start_time)
+            result.set_result(llm_response)
+
+            # --- Cache Admission & Population ---
+            if cache_manager.is_response_high_quality(llm_response):
+                l0_cache.put(prompt, llm_response)
+                if redis_client:
+                    await t1_cache.store(redis_client, prompt, llm_response)
+                coalescer.hold(result, await cache_manager.add_to_semantic_cache_async(prompt, llm_response,
+                                                                                     cost=llm_latency))
+    finally:
+        # The one end marker, however the block was left.
+        chunks.put_nowait(None)
+
+async def _stream_llm_miss(chunks: asyncio.Queue, start_time: float):
+    yield _sse("meta", {"from_cache": False, "cache_tier": None})
+    first_chunk_latency = None
+    while (chunk := await chunks.get()) is not None:
+        if first_chunk_latency is None:
+            first_chunk_latency = time.time() - start_time
+        yield _sse("chunk", {"text": chunk})
+    yield _sse("done", {"latency": time.time() - start_time, "first_chunk_latency": first_chunk_latency})
+
+async def _stream_coalesced(prompt: str, prompt_embedding, pending, start_time: float):
+    coalesced = await _await_coalesced(pending, start_time)
+    if coalesced is None:
+        # The leader gave up; stream our own LLM call instead.
+        chunks = _start_streamed_miss(prompt, prompt_embedding, start_time)
+        async for event in _stream_llm_miss(chunks, start_time):
+            yield event
+        return
+    async for event in _replay_cached(coalesced["response"], start_time,
+                                      from_cache=False, cache_tier=None, coalesced=True):
+        yield event
+
+@app.post("/process-prompt/stream")
+async def process_prompt_stream(request: PromptRequest):
+    """Streaming /process-prompt/: same tiers, answered as Server-Sent Events."""
+    start_time = time.time()
+    prompt = request.prompt
+
+    # --- TIER 0 CACHE CHECK: In-Process LRU ---
+    cached_response = l0_cache.get(prompt)
+    if cached_response:
+        metrics_manager.record_request("l0_hit", time.time() - start_time)
+        return _sse_response(_replay_cached(cached_response, start_time,
+                                            from_cache=True, cache_tier=0, similarity=1.0))
+
+    # --- TIER 1 CACHE CHECK: Redis (Exact Match) ---
+    if redis_client:
+        cached_response = await t1_cache.lookup(redis_client, prompt)
+        if cached_response:
+            print("DEBUG: T1 EXACT-MATCH CACHE HIT!")
+            l0_cache.put(prompt, cached_response)
+            metrics_manager.record_request("t1_hit", time.time() - start_time)
+            return _sse_response(_replay_cached(cached_response, start_time,
+                                                from_cache=True, cache_tier=1, similarity=1.0))
+
+    pending = coalescer.join(prompt)
+    if pending is not None:
+        return _sse_response(_stream_coalesced(prompt, None, pending, start_time))
+
+    # --- TIER 2 CACHE CHECK: Semantic Match ---
+    prompt_embedding = None
+    if coalescer.semantic_enabled:
+        prompt_embedding = await cache_manager.get_embedding_async(prompt)
+    cached_result = await cache_manager.find_in_semantic_cache_async(prompt, prompt_embedding)
+    if cached_result:
+        l0_cache.put(prompt, cached_result["response"])
+        if redis_client:
+            await t1_cache.store(redis_client, prompt, cached_result["response"])
+        metrics_manager.record_request("t2_hit", time.time() - start_time)
+        return _sse_response(_replay_cached(cached_result["response"], start_time, from_cache=True,
+                                            cache_tier=2, similarity=cached_result.get("similarity", 0)))
+
+    pending = coalescer.join(prompt, prompt_embedding)
+    if pending is not None:
+        return _sse_response(_stream_coalesced(prompt, prompt_embedding, pending, start_time))
+
+    # --- TIER 3: Streamed LLM Call (Cache Miss) ---
+    print("DEBUG: T1 & T2 Cache Miss. Streaming from LLM.")
+    chunks = _start_streamed_miss(prompt, prompt_embedding, start_time)
+    return _sse_response(_stream_llm_miss(chunks, start_time))
+
+@app.post("/process-prompts/")
+async def process_prompts(request: PromptsRequest):
+    """
+    Resolves many prompts in one call. Each tier is batched: one MGET for
+    T1, one embedding batch and one multi-query search for T2, concurrent
+    LLM calls for the misses and pipelined writes to both caches. Results
+    keep the shape of /process-prompt/ responses, in request order.
+    """
+    start_time = time.time()
+    prompts = request.prompts
+    results = [None] * len(prompts)
+    # Duplicate prompts within a batch are resolved once (but recorded once per position).
+    positions = {}
+    for position, prompt in enumerate(prompts):
+        positions.setdefault(prompt, []).append(position)
+
+    def resolve(prompt, tier, response, from_cache, cache_tier, **extra):
+        latency = time.time() - start_time
+        for position in positions[prompt]:
+            metrics_manager.record_request(tier, latency)
+            results[position] = {
+                "response": response,
+                "from_cache": from_cache, "cache_tier": cache_tier,
+                "latency": latency, **extra
+            }
+
+    # --- TIER 0 CACHE CHECK: In-Process LRU ---
+    unresolved = []
+    for prompt in positions:
+        cached_response = l0_cache.get(prompt)
+        if cached_response:
+            resolve(prompt, "l0_hit", cached_response, True, 0, similarity=1.0)
+        else:
+            unresolved.append(prompt)
+
+    # --- TIER 1 CACHE CHECK: one MGET for the whole batch ---
+    if redis_client and unresolved:
+        cached_responses = await t1_cache.lookup_many(redis_client, unresolved)
+        for prompt, cached_response in zip(unresolved, cached_responses):
+            if cached_response:
+                l0_cache.put(prompt, cached_response)
+                resolve(prompt, "t1_hit", cached_response, True, 1, similarity=1.0)
+        unresolved = [prompt for prompt in unresolved if results[positions[prompt][0]] is None]
+        print(f"DEBUG: Batch T0/T1 lookup: {len(positions) - len(unresolved)} of {len(positions)} hits.")
+
+    # --- Join in-flight LLM calls for the same prompts ---
+    followers = {}
+    for prompt in unresolved:
+        pending = coalescer.join(prompt)
+        if pending is not None:
+            followers[prompt] = (pending, None)
+    unresolved = [prompt for prompt in unresolved if prompt not in followers]
+
+    # --- TIER 2 CACHE CHECK: one embedding batch, one multi-query search ---
+    t1_writes = {}
+    embeddings = await cache_manager.get_embeddings_async(unresolved) if unresolved else []
+    cached_results = await cache_manager.find_in_semantic_cache_batch_async(unresolved, embeddings) if unresolved else []
+    misses = []
+    for prompt, embedding, cached_result in zip(unresolved, embeddings, cached_results):
+        if cached_result:
+            t1_writes[prompt] = cached_result["response"]
+            resolve(prompt, "t2_hit", cached_result["response"], True, 2,
+                    similarity=cached_result.get("similarity", 0))
+            continue
+        pending = coalescer.join(prompt, embedding if len(embedding) else None)
+        if pending is not None:
+            followers[prompt] = (pending, embedding if len(embedding) else None)
+        else:
+            misses.append((prompt, embedding))
+
+    # --- TIER 3: concurrent LLM calls for the remaining misses ---
+    if misses:
+        print(f"DEBUG: Batch T1 & T2 Cache Miss on {len(misses)} prompts. Calling LLM.")
+    t2_writes = {}
+    t2_costs = {}
+    with ExitStack() as stack:
+        leads = [
+            (prompt, stack.enter_context(coalescer.lead(prompt, embedding if len(embedding) else None)))
+            for prompt, embedding in misses
+        ]
+
+        async def call_llm(prompt, result):
+            llm_start = time.time()
+            try:
+                llm_response = await llm_provider.get_llm_response_async(prompt)
+            except llm_provider.LLMError as e:
+                # Followers retry; the error text is only returned for this prompt.
+                result.cancel()
+                resolve(prompt, "llm_miss", str(e), False, None)
+                return
+            t2_costs[prompt] = time.time() - llm_start
+            metrics_manager.record_llm_call(t2_costs[prompt])
+            result.set_result(llm_response)
+            if cache_manager.is_response_high_quality(llm_response):
+                t1_writes[prompt] = t2_writes[prompt] = llm_response
+            resolve(prompt, "llm_miss", llm_response, False, None)
+
+        async def follow(prompt, pending, embedding):
+            while pending is not None:
+                coalesced = await _await_coalesced(pending, start_time, requests=len(positions[prompt]))
+                if coalesced:
+                    for position in positions[prompt]:
+                        results[position] = coalesced
+                    return
+                # The leader gave up; join whoever took over, or take over.
+                pending = coalescer.join(prompt, embedding)
+            result = stack.enter_context(coalescer.lead(prompt, embedding))
+            leads.append((prompt, result))
+            await call_llm(prompt, result)
+
+        await asyncio.gather(
+            *(call_llm(prompt, result) for prompt, result in leads),
+            *(follow(prompt, pending, embedding) for prompt, (pending, embedding) in followers.items()),
+        )
+
+        # --- Cache Admission & Population: pipelined writes ---
+        for prompt, response in t1_writes.items():
+            l0_cache.put(prompt, response)
+        if redis_client and t1_writes:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for prompt, response in t1_writes.items():
+                    t1_cache.queue_store(pipe, prompt, response)
+                await pipe.execute()
+        if t2_writes:
+            written = await cache_manager.add_to_semantic_cache_batch_async(
+                list(t2_writes), list(t2_writes.values()), costs=[t2_costs[prompt] for prompt in t2_writes]
+            )
+            if written:
+                written = dict(zip(t2_writes, written))
+                for prompt, result in leads:
+                    coalescer.hold(result, written.get(prompt))
+
+    return {"results": results, "latency": time.time() - start_time}
+
+@app.get("/metrics/")
+def get_metrics_endpoint():
+    metrics = dict(metrics_manager.get_metrics())
+    metrics["embedding_batcher"] = llm_provider.embedding_batcher.get_stats()
+    metrics["embedding_cache"] = llm_provider.embedding_cache.get_stats()
+    metrics["coalescing"] = coalescer.get_stats()
+    metrics["speculation"] = speculator.get_stats()
+    metrics["l0_cache"] = l0_cache.get_stats()
+    if cache_manager.write_behind:
+        metrics["write_behind"] = cache_manager.write_behind.get_stats()
+    if trace_recorder.enabled:
+        metrics["trace"] = trace_recorder.get_stats()
+    if cache_manager.cache_server:
+        try:
+            metrics["cache_server"] = cache_manager.cache_server.call("stats")
+        except Exception as e:
+            metrics["cache_server"] = {"error": str(e)}
+    return metrics
+
+@app.get("/metrics/prometheus", response_class=PlainTextResponse)
+def get_prometheus_metrics_endpoint():
+    return PlainTextResponse(metrics_manager.get_prometheus_metrics(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
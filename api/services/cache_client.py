@@ -0,0 +1,71 @@
+import os
+import queue
+import time
+from multiprocessing.connection import Client
+
+
+class CacheServerError(RuntimeError):
+    """Raised when the cache server fails a request."""
+
+
+class CacheServerClient:
+    """
+    Client of the shared cache server (api/cache_server.py) on a unix socket.
+
+    Requests are `(op, args)` tuples sent over multiprocessing connections and
+    answered with `("ok", value)` or `("error", message)`. Connections are
+    pooled, so concurrent callers (e.g. the cache executor threads) each use
+    their own; a connection that fails mid-request is dropped, not reused.
+    """
+
+    def __init__(self, address: str, authkey: bytes | None = None):
+        self.address = address
+        self.authkey = authkey
+        self._idle = queue.LifoQueue()
+
+    def _connect(self):
+        return Client(self.address, family="AF_UNIX", authkey=self.authkey)
+
+    def call(self, op: str, *args):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            conn.send((op, args))
+            status, value = conn.recv()
+        except BaseException:
+            conn.close()
+            raise
+        self._idle.put(conn)
+        if status != "ok":
+            raise CacheServerError(f"Cache server failed '{op}': {value}")
+        return value
+
+    def wait_until_ready(self, timeout: float = 60.0, interval: float = 0.2):
+        """Blocks until the server answers a ping; raises after `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self.call("ping")
+            except (FileNotFoundError, ConnectionRefusedError, EOFError):
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(interval)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# --- Shared Cache Server Configuration ---
+# With CACHE_SERVER_SOCKET set, this process is one of several API workers:
+# embeddings and the Tier-2 index live in the cache server listening on
+# that socket instead of in every worker. CACHE_SERVER_AUTHKEY, when set,
+# must match the server's.
+CACHE_SERVER_SOCKET = os.getenv("CACHE_SERVER_SOCKET", "")
+CACHE_SERVER_AUTHKEY = os.getenv("CACHE_SERVER_AUTHKEY", "").encode() or None
+cache_server = CacheServerClient(CACHE_SERVER_SOCKET, CACHE_SERVER_AUTHKEY) if CACHE_SERVER_SOCKET else None
\ No newline at end of file
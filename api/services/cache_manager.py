@@ -1,85 +1,427 @@
-import chromadb
-import time
-from .llm_provider import get_embedding
-
-# --- Cache Configuration ---
-CACHE_MAX_SIZE = 1000  # Max number of entries in the semantic cache
-# --- TUNED THRESHOLD ---
-# Lowered the threshold to be slightly more lenient, which is better
-# for a powerful model like BGE. It now requires 80% similarity.
-CACHE_THRESHOLD = 0.60
-
-# --- ChromaDB Setup ---
-client = chromadb.Client()
-try:
-    client.delete_collection(name="llm_cache")
-except Exception:
-    pass
-collection = client.create_collection(name="llm_cache")
-
-# --- Cache Admission Policy ---
-def is_response_high_quality(response: str) -> bool:
-    if not response or len(response) < 15:
-        print(f"DEBUG: Response rejected by quality filter (too short).")
-        return False
-    
-    bad_response_triggers = ["i cannot", "i am not sure", "as an ai", "i do not have"]
-    if any(trigger in response.lower() for trigger in bad_response_triggers):
-        print(f"DEBUG: Response rejected by quality filter (unhelpful trigger phrase).")
-        return False
-        
-    return True
-
-# --- LRU Eviction Policy ---
-def _enforce_lru_policy():
-    count = collection.count()
-    if count >= CACHE_MAX_SIZE:
-        entries = collection.get(include=["metadatas"])
-        lru_entry = min(entries['metadatas'], key=lambda x: x.get('last_accessed_timestamp', 0))
-        lru_id = lru_entry['id']
-        collection.delete(ids=[lru_id])
-
-def find_in_semantic_cache(prompt: str):
-    """Searches the Tier-2 semantic cache (ChromaDB) for a similar prompt."""
-    if collection.count() == 0:
-        return None
-
-    prompt_embedding = get_embedding(prompt)
-    results = collection.query(query_embeddings=[prompt_embedding], n_results=1)
-    
-    if not results['ids'] or not results['distances'][0]:
-        return None
-
-    distance = results['distances'][0][0]
-    # BGE uses cosine similarity, so distance is 1 - similarity
-    similarity = 1 - distance
-    
-    # --- ADDED FOR OBSERVABILITY ---
-    # This will print the calculated score to your Uvicorn terminal every time!
-    print(f"DEBUG: T2 Semantic Search - Calculated Similarity: {similarity:.4f}")
-
-    if similarity >= CACHE_THRESHOLD:
-        print(f"DEBUG: T2 SEMANTIC CACHE HIT! Similarity {similarity:.4f} is >= threshold {CACHE_THRESHOLD}.")
-        hit_id = results['ids'][0][0]
-        cached_response = results['metadatas'][0][0]['response']
-        collection.update(
-            ids=[hit_id],
-            metadatas=[{"last_accessed_timestamp": time.time(), "response": cached_response, "id": hit_id}]
-        )
-        return {"response": cached_response, "similarity": similarity}
-    else:
-        print(f"DEBUG: T2 SEMANTIC CACHE MISS! Similarity {similarity:.4f} is < threshold {CACHE_THRESHOLD}.")
-        return None
-
-def add_to_semantic_cache(prompt: str, response: str):
-    """Adds a new prompt and its response to the Tier-2 semantic cache."""
-    _enforce_lru_policy()
-    prompt_embedding = get_embedding(prompt)
-    doc_id = str(collection.count() + 1)
-    collection.add(
-        embeddings=[prompt_embedding],
-        documents=[prompt],
-        metadatas=[{"response": response, "last_accessed_timestamp": time.time(), "id": doc_id}],
-        ids=[doc_id]
-    )
-    print(f"DEBUG: Added prompt to T2 semantic cache. New count: {collection.count()}")
\ No newline at end of file
+import asyncio
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .cache_policy import create_policy
+from . import metrics_manager
+from .cache_client import cache_server
+from .llm_provider import get_embedding, get_embeddings
+from .persistence import CachePersistence
+from .vector_index import QUANTIZED_BACKENDS, create_index
+from .write_behind import WriteBehindQueue
+
+# --- Cache Configuration ---
+CACHE_MAX_SIZE = 1000  # Max number of entries in the semantic cache
+# --- TUNED THRESHOLD ---
+# Lowered the threshold to be slightly more lenient, which is better
+# for a powerful model like BGE. It requires 80% cosine similarity.
+# (The index now reports true cosine similarity; the old 0.60 on Chroma's
+# default L2 space, 1 - (2 - 2*cos), was the same 0.80 cut-off.)
+CACHE_THRESHOLD = 0.80
+# When the cache is full, evict in one batch down to this many entries.
+CACHE_LOW_WATER_MARK = int(os.getenv("CACHE_LOW_WATER_MARK", int(CACHE_MAX_SIZE * 0.9)))
+# Default per-entry TTL in seconds (0 disables expiry) and how often the
+# background sweeper removes expired entries.
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", 0))
+CACHE_SWEEP_INTERVAL_SECONDS = float(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS", 30))
+
+# --- Tier-2 Index Setup ---
+# "chroma" (default), "numpy" for the in-process flat index, or "int8" /
+# "binary" for a quantized in-process index whose full-precision vectors
+# are memory-mapped from SEMANTIC_INDEX_VECTORS_DIR (default: the system
+# temp dir) and only read to rerank the SEMANTIC_INDEX_RERANK_K best
+# candidates of each lookup.
+# Workers of a shared cache server (CACHE_SERVER_SOCKET) build no index:
+# lookups and inserts go to the server's, so every worker sees every entry.
+SEMANTIC_INDEX_BACKEND = os.getenv("SEMANTIC_INDEX_BACKEND", "chroma")
+SEMANTIC_INDEX_RERANK_K = int(os.getenv("SEMANTIC_INDEX_RERANK_K", 256))
+SEMANTIC_INDEX_VECTORS_DIR = os.getenv("SEMANTIC_INDEX_VECTORS_DIR", "")
+_index_options = (
+    {"rerank_k": SEMANTIC_INDEX_RERANK_K, "vectors_dir": SEMANTIC_INDEX_VECTORS_DIR}
+    if SEMANTIC_INDEX_BACKEND in QUANTIZED_BACKENDS else {}
+)
+index = None if cache_server else create_index(SEMANTIC_INDEX_BACKEND, **_index_options)
+_doc_ids = itertools.count(1)
+
+# --- Eviction & Admission Policy ---
+# CACHE_EVICTION_POLICY: "lru" (recency only) or "gdsf" (Greedy-Dual-Size-
+# Frequency: keeps the entries that are hit most often and took longest to
+# generate, per 1000 characters of response). CACHE_ADMISSION_POLICY:
+# "always" or "tinylfu", where a new entry only displaces an existing one
+# if a frequency sketch has seen its prompt more often; new entries wait in
+# a window of at least CACHE_TINYLFU_WINDOW of the cache while they collect
+# hits.
+CACHE_EVICTION_POLICY = os.getenv("CACHE_EVICTION_POLICY", "lru")
+CACHE_ADMISSION_POLICY = os.getenv("CACHE_ADMISSION_POLICY", "always")
+CACHE_TINYLFU_WINDOW = float(os.getenv("CACHE_TINYLFU_WINDOW", 0.01))
+policy = create_policy(CACHE_EVICTION_POLICY, CACHE_ADMISSION_POLICY, capacity=CACHE_MAX_SIZE,
+                       window_fraction=CACHE_TINYLFU_WINDOW)
+
+# --- Persistence ---
+# With CACHE_PERSIST_DIR set, every insert and delete is appended to an
+# on-disk log and the cache is snapshotted (and the log compacted) every
+# CACHE_SNAPSHOT_INTERVAL_SECONDS, so a restart starts warm.
+CACHE_PERSIST_DIR = os.getenv("CACHE_PERSIST_DIR", "")
+CACHE_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("CACHE_SNAPSHOT_INTERVAL_SECONDS", 300))
+persistence = CachePersistence(CACHE_PERSIST_DIR) if CACHE_PERSIST_DIR and not cache_server else None
+
+# --- Async Offloading ---
+# Embedding and vector search are CPU-bound; async callers run them on this
+# bounded pool so they never block the event loop or queue behind LLM calls.
+CACHE_EXECUTOR_WORKERS = int(os.getenv("CACHE_EXECUTOR_WORKERS", 16))
+executor = ThreadPoolExecutor(max_workers=CACHE_EXECUTOR_WORKERS, thread_name_prefix="semantic-cache")
+
+# --- Write-Behind ---
+# With CACHE_WRITE_BEHIND on (the default), the async insert wrappers used
+# by the API queue new entries instead of waiting for them, and T2 hits
+# queue their last-access update; a background thread writes both in bulk
+# at least every CACHE_WRITE_FLUSH_MS. At most CACHE_WRITE_QUEUE_SIZE
+# inserts wait at a time, beyond that inserting requests wait for room. A
+# queued entry reaches T2 lookups once its batch is written; the API keeps
+# the prompt registered with the coalescer until then, so (with
+# COALESCE_SEMANTIC) near-duplicates arriving in between still join it.
+CACHE_WRITE_BEHIND = os.getenv("CACHE_WRITE_BEHIND", "true").lower() == "true"
+CACHE_WRITE_QUEUE_SIZE = int(os.getenv("CACHE_WRITE_QUEUE_SIZE", 1000))
+CACHE_WRITE_BATCH_SIZE = int(os.getenv("CACHE_WRITE_BATCH_SIZE", 256))
+CACHE_WRITE_FLUSH_MS = float(os.getenv("CACHE_WRITE_FLUSH_MS", 50))
+
+# --- Cache Admission Policy ---
+def is_response_high_quality(response: str) -> bool:
+    if not response or len(response) < 15:
+        print(f"DEBUG: Response rejected by quality filter (too short).")
+        return False
+    
+    bad_response_triggers = ["i cannot", "i am not sure", "as an ai", "i do not have"]
+    if any(trigger in response.lower() for trigger in bad_response_triggers):
+        print(f"DEBUG: Response rejected by quality filter (unhelpful trigger phrase).")
+        return False
+        
+    return True
+
+def _delete_entries(ids: list[str]):
+    index.delete(ids)
+    if persistence:
+        persistence.log_delete(ids)
+
+# --- Size Limit ---
+def _enforce_size_limit(incoming: int = 1):
+    """Makes room for `incoming` new entries, evicting down to the low-water mark."""
+    if len(policy) + incoming > CACHE_MAX_SIZE:
+        target = max(0, min(CACHE_LOW_WATER_MARK, CACHE_MAX_SIZE - incoming))
+        victims = policy.pop_victims(max(1, len(policy) - target))
+        _delete_entries(victims)
+        print(f"DEBUG: Evicted {len(victims)} entries ({CACHE_EVICTION_POLICY}/{CACHE_ADMISSION_POLICY}) "
+              f"from T2 semantic cache.")
+
+# --- TTL Expiry ---
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+def sweep_expired_entries() -> int:
+    """Deletes every entry whose TTL has elapsed. Returns the number removed."""
+    expired = policy.pop_expired()
+    if expired:
+        _delete_entries(expired)
+        print(f"DEBUG: TTL sweeper expired {len(expired)} entries from T2 semantic cache.")
+    return len(expired)
+
+def _sweep_loop():
+    while True:
+        time.sleep(CACHE_SWEEP_INTERVAL_SECONDS)
+        try:
+            sweep_expired_entries()
+        except Exception as e:
+            print(f"Error in T2 TTL sweeper: {e}")
+
+def _ensure_sweeper():
+    global _sweeper
+    if _sweeper is not None:
+        return
+    with _sweeper_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(target=_sweep_loop, name="t2-ttl-sweeper", daemon=True)
+            _sweeper.start()
+
+# --- Snapshots & Warm Start ---
+_snapshotter = None
+
+def _export_state() -> dict:
+    state = index.export()
+    # Store entries oldest first so a warm start can load them in order.
+    order = np.argsort(state["timestamps"], kind="stable")
+    ids = [state["ids"][row] for row in order]
+    return {
+        "ids": ids,
+        "embeddings": state["embeddings"][order],
+        "prompts": [state["prompts"][row] for row in order],
+        "responses": [state["responses"][row] for row in order],
+        "timestamps": state["timestamps"][order],
+        "expires_at": [policy.expires_at(doc_id) for doc_id in ids],
+    }
+
+def snapshot_cache():
+    """Writes a snapshot of the semantic cache and compacts the log."""
+    if persistence:
+        flush_writes()
+        persistence.snapshot(_export_state)
+
+def _snapshot_loop():
+    while True:
+        time.sleep(CACHE_SNAPSHOT_INTERVAL_SECONDS)
+        try:
+            snapshot_cache()
+        except Exception as e:
+            print(f"Error writing T2 cache snapshot: {e}")
+
+def _restore_from_disk():
+    """Loads the persisted cache into the index and rebuilds recency and TTLs."""
+    global _doc_ids, _snapshotter
+    start_time = time.time()
+    state = persistence.load()
+    if state and state["ids"]:
+        now = time.time()
+        expires_at = state["expires_at"]
+        live = np.array([not expiry or expiry > now for expiry in expires_at], dtype=bool)
+        # Insert oldest first so the recency order matches the last-accessed timestamps.
+        order = np.argsort(state["timestamps"], kind="stable")
+        order = order[live[order]]
+        if len(order) == len(live) and np.array_equal(order, np.arange(len(order))):
+            # Snapshots are already written oldest first: skip the gather copy.
+            rows, embeddings = range(len(order)), state["embeddings"]
+        else:
+            rows, embeddings = order.tolist(), state["embeddings"][order]
+        ids = [state["ids"][row] for row in rows]
+        prompts = [state["prompts"][row] for row in rows]
+        responses = [state["responses"][row] for row in rows]
+        index.add_batch(ids, embeddings, prompts, responses, state["timestamps"][order])
+        ttls = [expires_at[row] - now if expires_at[row] else None for row in rows]
+        # LLM costs are not persisted; restored entries get the current estimate.
+        policy.restore(ids, ttls, [metrics_manager.measured_llm_latency()] * len(ids),
+                       [len(response) for response in responses], prompts)
+        if any(ttls):
+            _ensure_sweeper()
+        numeric_ids = [int(doc_id) for doc_id in state["ids"] if doc_id.isdigit()]
+        _doc_ids = itertools.count(max(numeric_ids, default=0) + 1)
+        print(f"Restored {len(ids)} T2 cache entries from {CACHE_PERSIST_DIR} "
+              f"in {time.time() - start_time:.3f}s.")
+        _enforce_size_limit()
+
+    _snapshotter = threading.Thread(target=_snapshot_loop, name="t2-snapshotter", daemon=True)
+    _snapshotter.start()
+
+def find_in_semantic_cache(prompt: str, prompt_embedding=None):
+    """
+    Searches the Tier-2 semantic cache for a similar prompt.
+
+    Pass `prompt_embedding` when the caller has already embedded the prompt.
+    """
+    if not cache_server and len(policy) == 0:
+        return None
+
+    if prompt_embedding is None:
+        prompt_embedding = get_embedding(prompt)
+    if len(prompt_embedding) == 0:
+        return None
+    if cache_server:
+        return cache_server.call("find", [prompt_embedding])[0]
+    return _resolve_best_match(index.search(prompt_embedding, k=1))
+
+def find_in_semantic_cache_batch(prompts: list[str], prompt_embeddings=None) -> list[dict | None]:
+    """
+    Batched find_in_semantic_cache: one embedding batch and one multi-query
+    index search for all prompts. Returns a result (or None) per prompt.
+    """
+    if (not cache_server and len(policy) == 0) or not prompts:
+        return [None] * len(prompts)
+
+    if prompt_embeddings is None:
+        prompt_embeddings = get_embeddings(prompts)
+    rows = [row for row, embedding in enumerate(prompt_embeddings) if len(embedding)]
+    results = [None] * len(prompts)
+    if not rows:
+        return results
+    embeddings = np.stack([prompt_embeddings[row] for row in rows])
+    if cache_server:
+        matches = cache_server.call("find", embeddings)
+    else:
+        matches = [_resolve_best_match(match) for match in index.search_batch(embeddings, k=1)]
+    for row, match in zip(rows, matches):
+        results[row] = match
+    return results
+
+def _resolve_best_match(results: list[dict]):
+    """Applies the similarity threshold, TTL and recency update to a top-1 search result."""
+    if not results:
+        return None
+
+    best = results[0]
+    similarity = best["similarity"]
+
+    # --- ADDED FOR OBSERVABILITY ---
+    # This will print the calculated score to your Uvicorn terminal every time!
+    print(f"DEBUG: T2 Semantic Search - Calculated Similarity: {similarity:.4f}")
+    metrics_manager.record_similarity(similarity, is_hit=similarity >= CACHE_THRESHOLD)
+
+    if similarity >= CACHE_THRESHOLD:
+        if policy.is_expired(best["id"]):
+            # Expired but not yet swept: drop it now rather than serve it.
+            policy.remove(best["id"])
+            _delete_entries([best["id"]])
+            return None
+        print(f"DEBUG: T2 SEMANTIC CACHE HIT! Similarity {similarity:.4f} is >= threshold {CACHE_THRESHOLD}.")
+        policy.record_access(best["id"])
+        if write_behind:
+            write_behind.touch(best["id"], time.time())
+        else:
+            index.touch(best["id"], time.time())
+        return {"response": best["response"], "similarity": similarity}
+    else:
+        print(f"DEBUG: T2 SEMANTIC CACHE MISS! Similarity {similarity:.4f} is < threshold {CACHE_THRESHOLD}.")
+        return None
+
+def add_to_semantic_cache(prompt: str, response: str, ttl: float | None = None, cost: float | None = None):
+    """
+    Adds a new prompt and its response to the Tier-2 semantic cache.
+
+    `ttl` overrides CACHE_TTL_SECONDS for this entry; 0 disables expiry.
+    `cost` is the LLM latency that produced the response (default: the
+    measured average), used by cost-aware eviction.
+    """
+    cost = metrics_manager.measured_llm_latency() if cost is None else cost
+    if cache_server:
+        prompt_embedding = get_embedding(prompt)
+        if len(prompt_embedding):
+            cache_server.call("add", [prompt], [response], ttl, prompt_embedding[None, :], [cost])
+        return
+    ttl = CACHE_TTL_SECONDS if ttl is None else ttl
+    _enforce_size_limit()
+    prompt_embedding = get_embedding(prompt)
+    if len(prompt_embedding) == 0:
+        return
+    doc_id = str(next(_doc_ids))
+    timestamp = time.time()
+    index.add(doc_id, prompt_embedding, prompt, response, timestamp)
+    policy.record_insert(doc_id, ttl=ttl, cost=cost, size=len(response), key=prompt)
+    if persistence:
+        persistence.log_add(doc_id, prompt_embedding, prompt, response, timestamp, policy.expires_at(doc_id))
+    if ttl:
+        _ensure_sweeper()
+    print(f"DEBUG: Added prompt to T2 semantic cache. New count: {len(policy)}")
+
+def add_to_semantic_cache_batch(prompts: list[str], responses: list[str], ttl: float | None = None,
+                                embeddings=None, costs: list[float | None] | None = None):
+    """
+    Adds many prompt/response pairs with one embedding batch and one index
+    insert. Pass `embeddings` when the prompts have already been embedded,
+    and `costs` (LLM latency per response) when they are known.
+    """
+    if embeddings is None:
+        embeddings = get_embeddings(prompts)
+    default_cost = metrics_manager.measured_llm_latency()
+    costs = [default_cost if cost is None else cost for cost in costs or [None] * len(prompts)]
+    entries = [(prompt, response, embedding, cost)
+               for prompt, response, embedding, cost in zip(prompts, responses, embeddings, costs) if len(embedding)]
+    if cache_server:
+        if entries:
+            cache_server.call("add", [entry[0] for entry in entries], [entry[1] for entry in entries],
+                              ttl, np.stack([entry[2] for entry in entries]), [entry[3] for entry in entries])
+        return
+    ttl = CACHE_TTL_SECONDS if ttl is None else ttl
+    # A batch larger than the whole cache keeps only its last CACHE_MAX_SIZE entries.
+    entries = entries[-CACHE_MAX_SIZE:]
+    if not entries:
+        return
+    _enforce_size_limit(incoming=len(entries))
+    ids = [str(next(_doc_ids)) for _ in entries]
+    timestamp = time.time()
+    prompts = [entry[0] for entry in entries]
+    responses = [entry[1] for entry in entries]
+    index.add_batch(ids, np.stack([entry[2] for entry in entries]), prompts, responses, np.full(len(ids), timestamp))
+    policy.record_inserts(ids, [ttl] * len(ids), [entry[3] for entry in entries],
+                          [len(response) for response in responses], prompts)
+    if persistence:
+        for doc_id, (prompt, response, embedding, _) in zip(ids, entries):
+            persistence.log_add(doc_id, embedding, prompt, response, timestamp, policy.expires_at(doc_id))
+    if ttl:
+        _ensure_sweeper()
+    print(f"DEBUG: Added {len(ids)} prompts to T2 semantic cache. New count: {len(policy)}")
+
+# --- Write-Behind Queue ---
+def _apply_queued_adds(entries: list[tuple]):
+    """Writes queued (prompt, response, ttl, cost) inserts, one batch per TTL."""
+    by_ttl = {}
+    for prompt, response, ttl, cost in entries:
+        by_ttl.setdefault(ttl, []).append((prompt, response, cost))
+    for ttl, group in by_ttl.items():
+        add_to_semantic_cache_batch([entry[0] for entry in group], [entry[1] for entry in group], ttl,
+                                    costs=[entry[2] for entry in group])
+
+def _apply_queued_touches(touches: dict[str, float]):
+    """Writes the latest access time of every entry that is still cached."""
+    ids = [doc_id for doc_id in touches if doc_id in policy]
+    if ids:
+        index.touch_batch(ids, [touches[doc_id] for doc_id in ids])
+
+write_behind = WriteBehindQueue(
+    _apply_queued_adds,
+    _apply_queued_touches,
+    max_pending=CACHE_WRITE_QUEUE_SIZE,
+    max_batch=CACHE_WRITE_BATCH_SIZE,
+    flush_interval=CACHE_WRITE_FLUSH_MS / 1000
+) if CACHE_WRITE_BEHIND else None
+
+def flush_writes(timeout: float | None = None):
+    """Blocks until every queued insert and access-time update is written."""
+    if write_behind:
+        write_behind.flush(timeout)
+
+if persistence:
+    _restore_from_disk()
+
+async def get_embedding_async(prompt: str):
+    """Runs get_embedding on the cache executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, get_embedding, prompt)
+
+async def find_in_semantic_cache_async(prompt: str, prompt_embedding=None):
+    """Runs find_in_semantic_cache on the cache executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, find_in_semantic_cache, prompt, prompt_embedding)
+
+async def add_to_semantic_cache_async(prompt: str, response: str, ttl: float | None = None,
+                                      cost: float | None = None):
+    """
+    Queues the insert for the write-behind thread and returns a future that
+    resolves once it is in T2. With CACHE_WRITE_BEHIND off, runs
+    add_to_semantic_cache on the cache executor and returns None.
+    """
+    if write_behind:
+        return await write_behind.put_async((prompt, response, ttl, cost))
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(executor, add_to_semantic_cache, prompt, response, ttl, cost)
+
+async def get_embeddings_async(prompts: list[str]):
+    """Runs get_embeddings on the cache executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, get_embeddings, prompts)
+
+async def find_in_semantic_cache_batch_async(prompts: list[str], prompt_embeddings=None):
+    """Runs find_in_semantic_cache_batch on the cache executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, find_in_semantic_cache_batch, prompts, prompt_embeddings)
+
+async def add_to_semantic_cache_batch_async(prompts: list[str], responses: list[str], ttl: float | None = None,
+                                            costs: list[float | None] | None = None):
+    """
+    Queues the inserts for the write-behind thread and returns one "in T2"
+    future per prompt. With CACHE_WRITE_BEHIND off, runs
+    add_to_semantic_cache_batch on the cache executor and returns None.
+    """
+    if write_behind:
+        return [await write_behind.put_async((prompt, response, ttl, cost))
+                for prompt, response, cost in zip(prompts, responses, costs or [None] * len(prompts))]
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(executor, add_to_semantic_cache_batch, prompts, responses, ttl, None, costs)
\ No newline at end of file
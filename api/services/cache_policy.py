@@ -0,0 +1,376 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+class LRUPolicy:
+    """
+    In-memory recency and expiry bookkeeping for the semantic cache.
+
+    Entries are kept in an OrderedDict ordered from least to most recently
+    used, so inserts, accesses and evictions are all O(1). Optional per-entry
+    expiry times are kept in a min-heap with lazy deletion for the sweeper.
+
+    `cost` (seconds of LLM time a hit saves), `size` (response length) and
+    `key` (the prompt) are accepted everywhere for the cost- and
+    frequency-aware policies below; plain LRU ignores them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._expiry = {}
+        self._expiry_heap = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._entries
+
+    def record_insert(self, doc_id: str, ttl: float | None = None,
+                      cost: float | None = None, size: int | None = None, key=None):
+        with self._lock:
+            self._entries[doc_id] = None
+            self._entries.move_to_end(doc_id)
+            if ttl:
+                expires_at = time.time() + ttl
+                self._expiry[doc_id] = expires_at
+                heapq.heappush(self._expiry_heap, (expires_at, doc_id))
+            else:
+                self._expiry.pop(doc_id, None)
+
+    def record_inserts(self, doc_ids: list[str], ttls: list[float | None] | None = None,
+                       costs: list[float] | None = None, sizes: list[int] | None = None, keys: list | None = None):
+        """Bulk record_insert for warm starts and batch inserts; `doc_ids` go in oldest first."""
+        now = time.time()
+        with self._lock:
+            for i, doc_id in enumerate(doc_ids):
+                self._entries[doc_id] = None
+                self._entries.move_to_end(doc_id)
+                ttl = ttls[i] if ttls else None
+                if ttl:
+                    self._expiry[doc_id] = now + ttl
+                    self._expiry_heap.append((now + ttl, doc_id))
+            heapq.heapify(self._expiry_heap)
+
+    def restore(self, doc_ids: list[str], ttls: list[float | None] | None = None,
+                costs: list[float] | None = None, sizes: list[int] | None = None, keys: list | None = None):
+        """Bulk insert of entries restored from disk, oldest first. They were admitted before."""
+        self.record_inserts(doc_ids, ttls, costs, sizes, keys)
+
+    def record_access(self, doc_id: str):
+        with self._lock:
+            if doc_id in self._entries:
+                self._entries.move_to_end(doc_id)
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._entries.pop(doc_id, None)
+            self._expiry.pop(doc_id, None)
+
+    def expires_at(self, doc_id: str) -> float | None:
+        return self._expiry.get(doc_id)
+
+    def is_expired(self, doc_id: str, now: float | None = None) -> bool:
+        expires_at = self._expiry.get(doc_id)
+        return expires_at is not None and expires_at <= (now or time.time())
+
+    def peek_victim(self) -> str | None:
+        """Returns the id pop_victims would remove next, without removing it."""
+        with self._lock:
+            return next(iter(self._entries), None)
+
+    def pop_victims(self, n: int) -> list[str]:
+        """Removes and returns up to `n` least recently used ids."""
+        with self._lock:
+            victims = []
+            while self._entries and len(victims) < n:
+                doc_id, _ = self._entries.popitem(last=False)
+                self._expiry.pop(doc_id, None)
+                victims.append(doc_id)
+            return victims
+
+    def pop_expired(self, now: float | None = None) -> list[str]:
+        """Removes and returns every id whose TTL has elapsed."""
+        now = now or time.time()
+        with self._lock:
+            expired = []
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, doc_id = heapq.heappop(self._expiry_heap)
+                # Skip stale heap entries left behind by re-inserts and removals.
+                if self._expiry.get(doc_id) != expires_at:
+                    continue
+                del self._expiry[doc_id]
+                self._entries.pop(doc_id, None)
+                expired.append(doc_id)
+            return expired
+
+
+class GDSFPolicy(LRUPolicy):
+    """
+    Greedy-Dual-Size-Frequency eviction, weighted by what a hit saves.
+
+    An entry's priority is `L + frequency * cost / size`: `cost` is the LLM
+    latency that produced it, `size` its response length in units of
+    SIZE_UNIT characters (at least 1, so short answers are not kept just for
+    being short) and `L` the priority of the last victim, which lets entries
+    that stop being hit age out. Victims come off a min-heap with lazy
+    deletion; expiry bookkeeping is inherited from LRUPolicy.
+    """
+
+    SIZE_UNIT = 1000
+
+    def __init__(self, default_cost: float = 1.0):
+        super().__init__()
+        self.default_cost = default_cost
+        self._inflation = 0.0
+        self._meta = {}  # doc_id -> [frequency, cost per size unit, priority]
+        self._heap = []
+
+    def _weight(self, cost, size) -> float:
+        cost = self.default_cost if cost is None else cost
+        return cost / max(1.0, (size or 0) / self.SIZE_UNIT)
+
+    def _push(self, doc_id, meta):
+        meta[2] = self._inflation + meta[0] * meta[1]
+        heapq.heappush(self._heap, (meta[2], doc_id))
+        if len(self._heap) > 2 * len(self._meta) + 1024:
+            # Too many superseded entries: rebuild from the live priorities.
+            self._heap = [(meta[2], doc_id) for doc_id, meta in self._meta.items()]
+            heapq.heapify(self._heap)
+
+    def _clean_top(self):
+        while self._heap:
+            priority, doc_id = self._heap[0]
+            meta = self._meta.get(doc_id)
+            if meta is not None and meta[2] == priority:
+                return
+            heapq.heappop(self._heap)
+
+    def record_insert(self, doc_id, ttl=None, cost=None, size=None, key=None):
+        super().record_insert(doc_id, ttl)
+        with self._lock:
+            meta = [1, self._weight(cost, size), 0.0]
+            self._meta[doc_id] = meta
+            self._push(doc_id, meta)
+
+    def record_inserts(self, doc_ids, ttls=None, costs=None, sizes=None, keys=None):
+        super().record_inserts(doc_ids, ttls)
+        with self._lock:
+            for i, doc_id in enumerate(doc_ids):
+                weight = self._weight(costs[i] if costs else None, sizes[i] if sizes else None)
+                meta = [1, weight, self._inflation + weight]
+                self._meta[doc_id] = meta
+                self._heap.append((meta[2], doc_id))
+            heapq.heapify(self._heap)
+
+    def record_access(self, doc_id):
+        with self._lock:
+            meta = self._meta.get(doc_id)
+            if meta is not None:
+                meta[0] += 1
+                self._push(doc_id, meta)
+
+    def remove(self, doc_id):
+        super().remove(doc_id)
+        with self._lock:
+            self._meta.pop(doc_id, None)
+
+    def peek_victim(self):
+        with self._lock:
+            self._clean_top()
+            return self._heap[0][1] if self._heap else None
+
+    def pop_victims(self, n):
+        """Removes and returns up to `n` ids with the lowest priority."""
+        with self._lock:
+            victims = []
+            while len(victims) < n:
+                self._clean_top()
+                if not self._heap:
+                    break
+                self._inflation, doc_id = heapq.heappop(self._heap)
+                del self._meta[doc_id]
+                self._entries.pop(doc_id, None)
+                self._expiry.pop(doc_id, None)
+                victims.append(doc_id)
+            return victims
+
+    def pop_expired(self, now=None):
+        expired = super().pop_expired(now)
+        with self._lock:
+            for doc_id in expired:
+                self._meta.pop(doc_id, None)
+        return expired
+
+
+class FrequencySketch:
+    """
+    Count-min sketch of how often keys have been seen (the "TinyLFU" part).
+
+    `depth` rows of small saturating counters (at most MAX_COUNT), updated
+    conservatively. After `sample_size` increments every counter is halved,
+    so popularity from long ago fades. Not thread-safe on its own.
+    """
+
+    MAX_COUNT = 15
+    _SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+
+    def __init__(self, width: int, depth: int = 4, sample_size: int | None = None):
+        self.bits = max(4, (max(1, width) - 1).bit_length())
+        self.depth = max(1, min(depth, len(self._SEEDS)))
+        self.sample_size = sample_size or 10 << self.bits
+        self._rows = np.arange(self.depth)
+        self._table = np.zeros((self.depth, 1 << self.bits), dtype=np.uint8)
+        self._additions = 0
+
+    def _columns(self, key) -> np.ndarray:
+        h = hash(key) & 0xFFFFFFFFFFFFFFFF
+        return np.array([((h * seed) & 0xFFFFFFFFFFFFFFFF) >> (64 - self.bits) for seed in self._SEEDS[:self.depth]])
+
+    def increment(self, key):
+        columns = self._columns(key)
+        counts = self._table[self._rows, columns]
+        low = counts.min()
+        if low < self.MAX_COUNT:
+            lowest = counts == low
+            self._table[self._rows[lowest], columns[lowest]] += 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._table >>= 1
+            self._additions //= 2
+
+    def estimate(self, key) -> int:
+        return int(self._table[self._rows, self._columns(key)].min())
+
+
+class TinyLFUPolicy:
+    """
+    W-TinyLFU admission in front of another policy (`main`, LRU or GDSF).
+
+    New entries wait in an LRU window. When room has to be made, the window
+    is cut back to `window_fraction` of `capacity`: its oldest entries move
+    into `main` while main is below its share, and after that each one only
+    gets in if the frequency sketch has seen its prompt more often than
+    main's next victim (otherwise it is the one evicted). Entries collect
+    hits (sketch counts) while they wait, so a popular new prompt gets in
+    while a flood of one-off prompts only displaces itself.
+    """
+
+    def __init__(self, main, capacity: int, window_fraction: float = 0.01):
+        self.main = main
+        self.window = LRUPolicy()
+        self.window_capacity = max(1, int(capacity * window_fraction))
+        # About 16 counters per entry, aged every 10 x capacity increments.
+        self.sketch = FrequencySketch(4 * capacity, sample_size=10 * capacity)
+        self._lock = threading.Lock()
+        self._keys = {}     # doc_id -> sketch key (the prompt)
+        self._pending = {}  # doc_id -> (cost, size) until promoted to main
+
+    def __len__(self):
+        return len(self.window) + len(self.main)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.window or doc_id in self.main
+
+    def record_insert(self, doc_id, ttl=None, cost=None, size=None, key=None):
+        with self._lock:
+            key = doc_id if key is None else key
+            self.sketch.increment(key)
+            self._keys[doc_id] = key
+            self._pending[doc_id] = (cost, size)
+            self.window.record_insert(doc_id, ttl)
+
+    def record_inserts(self, doc_ids, ttls=None, costs=None, sizes=None, keys=None):
+        for i, doc_id in enumerate(doc_ids):
+            self.record_insert(doc_id, ttls[i] if ttls else None, costs[i] if costs else None,
+                               sizes[i] if sizes else None, keys[i] if keys else None)
+
+    def restore(self, doc_ids, ttls=None, costs=None, sizes=None, keys=None):
+        with self._lock:
+            self.main.restore(doc_ids, ttls, costs, sizes, keys)
+            self._keys.update(zip(doc_ids, keys or doc_ids))
+
+    def record_access(self, doc_id):
+        with self._lock:
+            key = self._keys.get(doc_id)
+            if key is None:
+                return
+            self.sketch.increment(key)
+            (self.window if doc_id in self.window else self.main).record_access(doc_id)
+
+    def remove(self, doc_id):
+        with self._lock:
+            self.window.remove(doc_id)
+            self.main.remove(doc_id)
+            self._keys.pop(doc_id, None)
+            self._pending.pop(doc_id, None)
+
+    def expires_at(self, doc_id):
+        return self.window.expires_at(doc_id) or self.main.expires_at(doc_id)
+
+    def is_expired(self, doc_id, now=None):
+        return self.window.is_expired(doc_id, now) or self.main.is_expired(doc_id, now)
+
+    def _promote(self, doc_id):
+        expires_at = self.window.expires_at(doc_id)
+        self.window.remove(doc_id)
+        cost, size = self._pending.pop(doc_id, (None, None))
+        ttl = max(expires_at - time.time(), 1e-3) if expires_at else None
+        self.main.record_insert(doc_id, ttl, cost, size, self._keys[doc_id])
+
+    def pop_victims(self, n):
+        """Removes and returns up to `n` ids, settling window overflow by frequency first."""
+        with self._lock:
+            # Main's share of what is left once `n` entries are gone.
+            main_target = len(self) - n - self.window_capacity
+            while len(self.window) > self.window_capacity and len(self.main) < main_target:
+                self._promote(self.window.peek_victim())
+            victims = []
+            while len(victims) < n and len(self):
+                candidate = self.window.peek_victim()
+                victim = self.main.peek_victim()
+                if victim is None or (candidate is not None and len(self.window) > self.window_capacity
+                                      and self.sketch.estimate(self._keys[candidate])
+                                      <= self.sketch.estimate(self._keys[victim])):
+                    victims.extend(self.window.pop_victims(1))
+                    continue
+                victims.extend(self.main.pop_victims(1))
+                if candidate is not None and len(self.window) > self.window_capacity:
+                    self._promote(candidate)
+            for doc_id in victims:
+                self._keys.pop(doc_id, None)
+                self._pending.pop(doc_id, None)
+            return victims
+
+    def pop_expired(self, now=None):
+        with self._lock:
+            expired = self.window.pop_expired(now) + self.main.pop_expired(now)
+            for doc_id in expired:
+                self._keys.pop(doc_id, None)
+                self._pending.pop(doc_id, None)
+            return expired
+
+
+# --- Policy Registry ---
+EVICTION_POLICIES = {
+    "lru": LRUPolicy,
+    "gdsf": GDSFPolicy,
+}
+ADMISSION_POLICIES = ("always", "tinylfu")
+
+def create_policy(eviction: str = "lru", admission: str = "always", capacity: int = 1000,
+                  window_fraction: float = 0.01):
+    """Builds the semantic cache policy: an eviction policy, optionally behind TinyLFU admission."""
+    try:
+        policy = EVICTION_POLICIES[eviction]()
+    except KeyError:
+        raise ValueError(f"Unknown eviction policy '{eviction}'. Choose from: {', '.join(EVICTION_POLICIES)}")
+    if admission not in ADMISSION_POLICIES:
+        raise ValueError(f"Unknown admission policy '{admission}'. Choose from: {', '.join(ADMISSION_POLICIES)}")
+    if admission == "tinylfu":
+        policy = TinyLFUPolicy(policy, capacity, window_fraction)
+    return policy
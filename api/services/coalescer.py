@@ -0,0 +1,110 @@
+import asyncio
+from contextlib import contextmanager
+
+from .vector_index import normalize
+
+
+class RequestCoalescer:
+    """
+    Single-flight deduplication of concurrent LLM misses.
+
+    The first request to miss on a prompt becomes the leader and registers a
+    pending future; identical prompts that arrive while it is in flight join
+    that future instead of calling the LLM themselves. When a
+    `similarity_threshold` is set, prompts whose embedding is at least that
+    similar to an in-flight prompt's embedding join it as well.
+    """
+
+    def __init__(self, similarity_threshold: float | None = None):
+        self.similarity_threshold = similarity_threshold
+        self._inflight = {}
+        self._embeddings = {}
+        self._holds = {}
+        self._leaders = 0
+        self._exact_coalesced = 0
+        self._semantic_coalesced = 0
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.similarity_threshold is not None
+
+    def match(self, prompt: str, embedding=None) -> asyncio.Future | None:
+        """Like `join`, but only looks: nothing is counted as coalesced."""
+        return self._match(prompt, embedding)[0]
+
+    def join(self, prompt: str, embedding=None) -> asyncio.Future | None:
+        """Returns the pending future of a matching in-flight prompt, if any."""
+        future, similarity = self._match(prompt, embedding)
+        if future is None:
+            return None
+        if similarity is None:
+            self._exact_coalesced += 1
+        else:
+            self._semantic_coalesced += 1
+            print(f"DEBUG: Coalesced with in-flight prompt (similarity {similarity:.4f}).")
+        return future
+
+    def _match(self, prompt: str, embedding) -> tuple[asyncio.Future | None, float | None]:
+        """Returns (future, similarity) of the best in-flight match; similarity is None for an exact one."""
+        future = self._inflight.get(prompt)
+        if future is not None:
+            return future, None
+
+        if not self.semantic_enabled or embedding is None or not self._embeddings:
+            return None, None
+        query = normalize(embedding)
+        best_prompt, best_similarity = None, self.similarity_threshold
+        for inflight_prompt, inflight_embedding in self._embeddings.items():
+            similarity = float(inflight_embedding @ query)
+            if similarity >= best_similarity:
+                best_prompt, best_similarity = inflight_prompt, similarity
+        if best_prompt is None:
+            return None, None
+        return self._inflight[best_prompt], best_similarity
+
+    @contextmanager
+    def lead(self, prompt: str, embedding=None):
+        """
+        Registers `prompt` as in flight and yields the future followers wait on.
+
+        The leader resolves the future as soon as it has a response; the prompt
+        stays registered until the block exits so that requests arriving while
+        the caches are being populated still coalesce, and past that until the
+        awaitable passed to `hold` is done. If the block exits without
+        resolving, followers see the future cancelled.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[prompt] = future
+        if self.semantic_enabled and embedding is not None:
+            self._embeddings[prompt] = normalize(embedding)
+        self._leaders += 1
+        try:
+            yield future
+        finally:
+            if not future.done():
+                future.cancel()
+            until = self._holds.pop(future, None)
+            if until is not None and not until.done():
+                until.add_done_callback(lambda _: self._release(prompt, future))
+            else:
+                self._release(prompt, future)
+
+    def hold(self, future: asyncio.Future, until: asyncio.Future | None):
+        """Keeps the leader of `future` registered after its block exits, until `until` is done."""
+        if until is not None:
+            self._holds[future] = until
+
+    def _release(self, prompt: str, future: asyncio.Future):
+        if self._inflight.get(prompt) is future:
+            del self._inflight[prompt]
+            self._embeddings.pop(prompt, None)
+
+    def get_stats(self) -> dict:
+        coalesced = self._exact_coalesced + self._semantic_coalesced
+        return {
+            "in_flight": len(self._inflight),
+            "llm_calls": self._leaders,
+            "coalesced_calls": coalesced,
+            "exact_coalesced": self._exact_coalesced,
+            "semantic_coalesced": self._semantic_coalesced,
+        }
\ No newline at end of file
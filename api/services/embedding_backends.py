@@ -0,0 +1,93 @@
+import threading
+import time
+import numpy as np
+
+
+class SentenceTransformerBackend:
+    """
+    Lazily loaded SentenceTransformer embedding model.
+
+    Nothing is imported or downloaded until the first `encode` (or an explicit
+    `load`). With `quantize=True` the model's Linear layers are converted to
+    int8 with PyTorch dynamic quantization for faster CPU inference.
+    """
+
+    def __init__(self, model_name: str, quantize: bool = False, threads: int = 0):
+        self.model_name = model_name
+        self.quantize = quantize
+        self.threads = threads
+        self.load_seconds = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self):
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                start_time = time.time()
+                import torch
+                from sentence_transformers import SentenceTransformer
+
+                if self.threads:
+                    torch.set_num_threads(self.threads)
+                model = SentenceTransformer(self.model_name, device="cpu" if self.quantize else None)
+                if self.quantize:
+                    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                self.load_seconds = time.time() - start_time
+                print(f"Embedding model {self.model_name}{' (int8)' if self.quantize else ''} "
+                      f"loaded in {self.load_seconds:.2f}s.")
+                self._model = model
+        return self._model
+
+    def encode(self, texts: list[str], batch_size: int | None = None) -> np.ndarray:
+        model = self.load()
+        return model.encode(
+            texts, batch_size=batch_size or len(texts),
+            convert_to_numpy=True, normalize_embeddings=True
+        ).astype(np.float32, copy=False)
+
+
+class RemoteEmbeddingBackend:
+    """
+    Embeds through the shared cache server (see cache_client), which batches
+    the requests of every API worker into one model's encode calls.
+    """
+
+    def __init__(self, client, ready_timeout: float = 60.0):
+        self.client = client
+        self.ready_timeout = ready_timeout
+
+    def load(self):
+        """Waits for the cache server to come up; the model itself lives there."""
+        self.client.wait_until_ready(self.ready_timeout)
+
+    def encode(self, texts: list[str], batch_size: int | None = None) -> np.ndarray:
+        return self.client.call("embed", list(texts))
+
+
+# --- Backend Registry ---
+EMBEDDING_BACKENDS = {
+    "bge-large": lambda threads: SentenceTransformerBackend("BAAI/bge-large-en-v1.5", threads=threads),
+    "bge-large-int8": lambda threads: SentenceTransformerBackend("BAAI/bge-large-en-v1.5", quantize=True, threads=threads),
+    "bge-base": lambda threads: SentenceTransformerBackend("BAAI/bge-base-en-v1.5", threads=threads),
+    "bge-small": lambda threads: SentenceTransformerBackend("BAAI/bge-small-en-v1.5", threads=threads),
+    "bge-small-int8": lambda threads: SentenceTransformerBackend("BAAI/bge-small-en-v1.5", quantize=True, threads=threads),
+    "minilm": lambda threads: SentenceTransformerBackend("sentence-transformers/all-MiniLM-L6-v2", threads=threads),
+}
+
+def register_backend(name: str, factory):
+    """Registers `factory(threads) -> backend`; a backend needs `encode(texts)`."""
+    EMBEDDING_BACKENDS[name] = factory
+
+def create_backend(name: str, threads: int = 0):
+    """Instantiates an embedding backend by name. The model is not loaded yet."""
+    try:
+        factory = EMBEDDING_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown embedding backend '{name}'. Choose from: {', '.join(EMBEDDING_BACKENDS)}")
+    return factory(threads)
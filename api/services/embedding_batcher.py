@@ -0,0 +1,141 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class _PendingEmbedding:
+    __slots__ = ("text", "future", "enqueued_at")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class EmbeddingBatcher:
+    """
+    Gathers concurrent embedding requests into batched encode calls.
+
+    Callers block on their own future while a single worker thread drains the
+    queue: it takes the first pending text and, if others are already queued
+    behind it, waits up to `max_wait_ms` for more to arrive (or until
+    `max_batch_size` is reached), then runs one `encode_fn` call for the whole
+    batch and hands each caller back its own vector. A lone request is encoded
+    right away, so the wait only applies under contention. Texts queued
+    together with `submit_many` always land in the same encode call.
+    """
+
+    def __init__(self, encode_fn, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._batch_size_counts = {}
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+        self._total_encode = 0.0
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """Queues a text for embedding and returns a future for its vector."""
+        self._ensure_worker()
+        pending = _PendingEmbedding(text)
+        self._queue.put([pending])
+        return pending.future
+
+    def submit_many(self, texts: list[str]) -> list[Future]:
+        """Queues several texts to be encoded together; returns one future per text."""
+        self._ensure_worker()
+        pending = [_PendingEmbedding(text) for text in texts]
+        if pending:
+            self._queue.put(pending)
+        return [item.future for item in pending]
+
+    def embed(self, text: str, timeout: float | None = None):
+        """Blocks until the batch containing `text` has been encoded."""
+        return self.submit(text).result(timeout=timeout)
+
+    def embed_many(self, texts: list[str], timeout: float | None = None) -> list:
+        """Blocks until every text in `texts` has been encoded."""
+        return [future.result(timeout=timeout) for future in self.submit_many(texts)]
+
+    def _run(self):
+        while True:
+            batch = list(self._queue.get())
+            if self._queue.empty():
+                # Nothing else waiting: don't hold a lone request for max_wait.
+                self._process(batch)
+                continue
+            deadline = batch[0].enqueued_at + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    if remaining > 0:
+                        batch.extend(self._queue.get(timeout=remaining))
+                    else:
+                        # Past the deadline: still sweep up anything already queued.
+                        batch.extend(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        dispatched_at = time.perf_counter()
+        try:
+            vectors = self.encode_fn([item.text for item in batch])
+        except Exception as e:
+            for item in batch:
+                item.future.set_exception(e)
+            return
+        encode_time = time.perf_counter() - dispatched_at
+
+        for item, vector in zip(batch, vectors):
+            item.future.set_result(vector)
+
+        waits = [dispatched_at - item.enqueued_at for item in batch]
+        with self._stats_lock:
+            size = len(batch)
+            self._batches += 1
+            self._items += size
+            self._max_batch = max(self._max_batch, size)
+            self._batch_size_counts[size] = self._batch_size_counts.get(size, 0) + 1
+            self._total_wait += sum(waits)
+            self._max_wait_seen = max(self._max_wait_seen, max(waits))
+            self._total_encode += encode_time
+
+    def get_stats(self) -> dict:
+        """Returns batch-size and queue-wait statistics."""
+        with self._stats_lock:
+            batches = self._batches
+            items = self._items
+            return {
+                "batches": batches,
+                "embeddings": items,
+                "queue_depth": self._queue.qsize(),
+                "avg_batch_size": items / batches if batches else 0.0,
+                "max_batch_size": self._max_batch,
+                "batch_size_counts": dict(sorted(self._batch_size_counts.items())),
+                "avg_queue_wait_ms": (self._total_wait / items * 1000) if items else 0.0,
+                "max_queue_wait_ms": self._max_wait_seen * 1000,
+                "avg_encode_ms": (self._total_encode / batches * 1000) if batches else 0.0,
+                "config": {
+                    "max_batch_size": self.max_batch_size,
+                    "max_wait_ms": self.max_wait * 1000,
+                },
+            }
\ No newline at end of file
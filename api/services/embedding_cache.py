@@ -0,0 +1,65 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of prompt embeddings.
+
+    Keys are 16-byte BLAKE2b digests of the prompt text and values are
+    read-only float32 arrays, so a lookup and the insert that follows a miss
+    share one encode() call and each entry costs roughly 4 bytes per dimension.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, text: str) -> np.ndarray | None:
+        key = self.key(text)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return embedding
+
+    def put(self, text: str, embedding) -> np.ndarray:
+        """Stores the embedding as a read-only float32 array and returns it."""
+        vector = np.array(embedding, dtype=np.float32).reshape(-1)
+        vector.setflags(write=False)
+        if self.max_entries <= 0:
+            return vector
+        key = self.key(text)
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+        return vector
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": sum(vector.nbytes for vector in self._entries.values()),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+            }
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class L0Cache:
+    """
+    Bounded in-process LRU of responses in front of the Redis Tier 1.
+
+    Entries are keyed like T1 (`key_fn`, the canonicalized hashed key) and
+    bounded by both `max_entries` and `max_bytes` of UTF-8 response text.
+    Other workers' T1 writes arrive as invalidation messages; while that
+    subscription is down (`subscribed` is False) entries older than
+    `fallback_ttl` seconds are treated as misses, and no entry outlives
+    `max_ttl` (the T1 TTL) either way.
+    """
+
+    def __init__(self, key_fn, max_entries: int = 512, max_bytes: int = 8 * 1024 * 1024,
+                 fallback_ttl: float = 5.0, max_ttl: float = 0.0):
+        self.key_fn = key_fn
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.fallback_ttl = fallback_ttl
+        self.max_ttl = max_ttl
+        self.subscribed = False
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, prompt: str) -> str | None:
+        if not self.enabled:
+            return None
+        key = self.key_fn(prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                response, size, stored_at = entry
+                age = time.monotonic() - stored_at
+                if (self.max_ttl and age > self.max_ttl) or (not self.subscribed and age > self.fallback_ttl):
+                    self._remove(key)
+                    entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return response
+
+    def put(self, prompt: str, response: str):
+        if not self.enabled:
+            return
+        key = self.key_fn(prompt)
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (response, size, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def invalidate(self, keys: list[str]):
+        """Drops entries by T1 key (not by prompt)."""
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+                    self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+                "subscribed": self.subscribed,
+            }
+
+
+async def listen_for_invalidations(client, cache: L0Cache, channel: str, instance_id: str,
+                                   retry_seconds: float = 1.0):
+    """
+    Applies invalidation messages ("<instance id> <key>", or "<instance id> *"
+    to drop everything) published by other workers to `cache`. Reconnects
+    with backoff when the subscription drops; anything published meanwhile
+    was missed, so the cache is cleared on every (re)subscribe.
+    """
+    delay = retry_seconds
+    while True:
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            cache.clear()
+            cache.subscribed = True
+            delay = retry_seconds
+            print(f"DEBUG: L0 subscribed to invalidations on {channel}.")
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                data = message["data"]
+                origin, _, key = (data.decode() if isinstance(data, bytes) else data).partition(" ")
+                if origin == instance_id:
+                    continue
+                if key == "*":
+                    cache.clear()
+                else:
+                    cache.invalidate([key])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error in L0 invalidation subscription (retrying in {delay:.0f}s): {e}")
+        finally:
+            cache.subscribed = False
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30.0)
\ No newline at end of file
@@ -1,43 +1,187 @@
-import os
-import google.generativeai as genai
-from sentence_transformers import SentenceTransformer
-from dotenv import load_dotenv
-
-# --- Load Environment Variables ---
-load_dotenv()
-
-# --- Configure the Gemini API ---
-try:
-    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-    GEMINI_MODEL = genai.GenerativeModel('gemini-2.0-flash')
-except Exception as e:
-    print(f"Error configuring Gemini API: {e}")
-    GEMINI_MODEL = None
-
-try:
-    
-    EMBEDDING_MODEL = SentenceTransformer('BAAI/bge-large-en-v1.5')
-    print("BGE Large embedding model loaded successfully.")
-except Exception as e:
-    print(f"Error loading SentenceTransformer model: {e}")
-    EMBEDDING_MODEL = None
-
-def get_llm_response(prompt: str) -> str:
-    """Gets a response from the Gemini LLM."""
-    if not GEMINI_MODEL:
-        return "Gemini model is not configured. Please check your API key."
-    try:
-        response = GEMINI_MODEL.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        print(f"Error calling Gemini API: {e}")
-        return f"Sorry, I encountered an error with the Gemini API: {e}"
-
-def get_embedding(text: str) -> list[float]:
-    """Gets an embedding for a given text using a local model."""
-    if not EMBEDDING_MODEL:
-        print("Embedding model not loaded.")
-        return []
-    embedding = EMBEDDING_MODEL.encode(text)
-
-    return embedding.tolist()
+import asyncio
+import os
+import numpy as np
+import google.generativeai as genai
+from dotenv import load_dotenv
+from .cache_client import cache_server
+from .embedding_backends import RemoteEmbeddingBackend, create_backend
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_cache import EmbeddingCache
+
+# --- Load Environment Variables ---
+load_dotenv()
+
+# --- Configure the Gemini API ---
+try:
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+    GEMINI_MODEL = genai.GenerativeModel('gemini-2.0-flash')
+except Exception as e:
+    print(f"Error configuring Gemini API: {e}")
+    GEMINI_MODEL = None
+
+# --- Embedding Backend ---
+# The model is loaded lazily on first use (or at API startup when
+# EMBEDDING_PRELOAD is true), so importing this module stays cheap.
+# See embedding_backends.EMBEDDING_BACKENDS for the available names. Workers
+# of a shared cache server (CACHE_SERVER_SOCKET) load no model: they embed
+# through the server, and "preloading" waits for it to accept connections.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "bge-large")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0))  # 0 = PyTorch default
+EMBEDDING_PRELOAD = os.getenv("EMBEDDING_PRELOAD", "true").lower() == "true"
+try:
+    if cache_server:
+        EMBEDDING_MODEL = RemoteEmbeddingBackend(cache_server)
+    else:
+        EMBEDDING_MODEL = create_backend(EMBEDDING_BACKEND, threads=EMBEDDING_THREADS)
+except ValueError as e:
+    print(f"Error configuring embedding backend: {e}")
+    EMBEDDING_MODEL = None
+
+def load_embedding_model() -> bool:
+    """Loads the embedding model now instead of on the first request."""
+    if not EMBEDDING_MODEL or not hasattr(EMBEDDING_MODEL, "load"):
+        return EMBEDDING_MODEL is not None
+    try:
+        EMBEDDING_MODEL.load()
+        return True
+    except Exception as e:
+        print(f"Error loading embedding model: {e}")
+        return False
+
+# --- Embedding Micro-Batching ---
+# Concurrent get_embedding() callers are gathered into a single encode() call.
+# EMBED_BATCH_MAX_WAIT_MS only applies when other requests are already queued;
+# an uncontended embedding is encoded immediately.
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", 32))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", 5))
+
+def _encode_batch(texts: list[str]):
+    # A submit_many group can exceed EMBED_BATCH_MAX_SIZE; let the model split
+    # it instead of running one forward pass over the whole group.
+    return EMBEDDING_MODEL.encode(texts, batch_size=EMBED_BATCH_MAX_SIZE)
+
+embedding_batcher = EmbeddingBatcher(
+    _encode_batch,
+    max_batch_size=EMBED_BATCH_MAX_SIZE,
+    max_wait_ms=EMBED_BATCH_MAX_WAIT_MS,
+)
+
+# --- Embedding Memoization ---
+# A miss embeds the prompt for the T2 lookup and again for the T2 insert;
+# both go through this cache, so the model only runs once per prompt.
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 10000))
+embedding_cache = EmbeddingCache(max_entries=EMBEDDING_CACHE_SIZE)
+
+# --- Async LLM Limits ---
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 30))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+_llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+class LLMError(RuntimeError):
+    """Raised when an async LLM call fails or times out; the message is for the caller, not for caching."""
+
+def get_llm_response(prompt: str) -> str:
+    """Gets a response from the Gemini LLM."""
+    if not GEMINI_MODEL:
+        return "Gemini model is not configured. Please check your API key."
+    try:
+        response = GEMINI_MODEL.generate_content(prompt)
+        return response.text
+    except Exception as e:
+        print(f"Error calling Gemini API: {e}")
+        return f"Sorry, I encountered an error with the Gemini API: {e}"
+
+async def get_llm_response_async(prompt: str) -> str:
+    """
+    Gets a response from the Gemini LLM without blocking the event loop.
+
+    At most LLM_MAX_CONCURRENCY calls are in flight at once and each call is
+    abandoned after LLM_TIMEOUT_SECONDS. Failures raise LLMError.
+    """
+    if not GEMINI_MODEL:
+        raise LLMError("Gemini model is not configured. Please check your API key.")
+    try:
+        async with _llm_semaphore:
+            response = await asyncio.wait_for(
+                GEMINI_MODEL.generate_content_async(prompt), timeout=LLM_TIMEOUT_SECONDS
+            )
+        return response.text
+    except asyncio.TimeoutError:
+        print(f"Error calling Gemini API: timed out after {LLM_TIMEOUT_SECONDS}s")
+        raise LLMError(f"Sorry, the Gemini API did not respond within {LLM_TIMEOUT_SECONDS:.0f} seconds.") from None
+    except Exception as e:
+        print(f"Error calling Gemini API: {e}")
+        raise LLMError(f"Sorry, I encountered an error with the Gemini API: {e}") from e
+
+async def stream_llm_response_async(prompt: str):
+    """
+    Yields the Gemini response as text chunks as they are generated.
+
+    Shares the concurrency limit of get_llm_response_async; LLM_TIMEOUT_SECONDS
+    bounds the wait for each chunk. On failure the error is yielded as a final
+    text chunk and then raised as LLMError, so callers can tell the stream
+    did not finish.
+    """
+    if not GEMINI_MODEL:
+        message = "Gemini model is not configured. Please check your API key."
+    else:
+        try:
+            async with _llm_semaphore:
+                response = await asyncio.wait_for(
+                    GEMINI_MODEL.generate_content_async(prompt, stream=True), timeout=LLM_TIMEOUT_SECONDS
+                )
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=LLM_TIMEOUT_SECONDS)
+                    except StopAsyncIteration:
+                        return
+                    if chunk.text:
+                        yield chunk.text
+        except asyncio.TimeoutError:
+            print(f"Error streaming from Gemini API: timed out after {LLM_TIMEOUT_SECONDS}s")
+            message = f"Sorry, the Gemini API did not respond within {LLM_TIMEOUT_SECONDS:.0f} seconds."
+        except Exception as e:
+            print(f"Error streaming from Gemini API: {e}")
+            message = f"Sorry, I encountered an error with the Gemini API: {e}"
+    yield message
+    raise LLMError(message)
+
+def get_embedding(text: str) -> np.ndarray:
+    """Gets a float32 embedding for a given text using a local model."""
+    cached = embedding_cache.get(text)
+    if cached is not None:
+        return cached
+    if not EMBEDDING_MODEL:
+        print("Embedding model not loaded.")
+        return np.empty(0, dtype=np.float32)
+    try:
+        embedding = embedding_batcher.embed(text)
+    except Exception as e:
+        print(f"Error computing embedding: {e}")
+        return np.empty(0, dtype=np.float32)
+
+    return embedding_cache.put(text, embedding)
+
+
+def get_embeddings(texts: list[str]) -> list[np.ndarray]:
+    """
+    Gets float32 embeddings for many texts. Texts that are not memoized are
+    encoded together in a single batch; failures come back as empty arrays.
+    """
+    embeddings = [embedding_cache.get(text) for text in texts]
+    missing = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+    if not missing:
+        return embeddings
+    encoded = {}
+    if not EMBEDDING_MODEL:
+        print("Embedding model not loaded.")
+    else:
+        try:
+            vectors = embedding_batcher.embed_many(missing)
+            encoded = {text: embedding_cache.put(text, vector) for text, vector in zip(missing, vectors)}
+        except Exception as e:
+            print(f"Error computing embeddings: {e}")
+    empty = np.empty(0, dtype=np.float32)
+    return [embedding if embedding is not None else encoded.get(text, empty)
+            for text, embedding in zip(texts, embeddings)]
\ No newline at end of file
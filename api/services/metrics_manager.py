@@ -1,29 +1,198 @@
-METRICS = {
-    "cache_hits": 0,
-    "cache_misses": 0,
-    "total_requests": 0,
-    "total_latency_saved": 0.0,
-}
-
-def update_metrics(is_hit: bool, latency_saved: float = 0.0):
-    """
-    Updates the global metrics dictionary after each prompt is processed.
-    
-    Args:
-        is_hit (bool): True if the response was a cache hit, False otherwise.
-        latency_saved (float): An estimate of the time saved by hitting the cache.
-    """
-    METRICS["total_requests"] += 1
-    if is_hit:
-        METRICS["cache_hits"] += 1
-        METRICS["total_latency_saved"] += latency_saved
-    else:
-        METRICS["cache_misses"] += 1
-
-def get_metrics():
-    """
-    Returns the current state of the metrics dictionary.
-    This is the function called by the /metrics/ endpoint in main.py.
-    """
-
-    return METRICS
+import bisect
+import threading
+import time
+from collections import deque
+
+# --- Configuration ---
+# Fixed latency buckets (seconds) shared by every tier's histogram.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIMILARITY_BUCKETS = tuple(round(0.05 * i, 2) for i in range(1, 21))
+# Percentiles are computed over this sliding window of recent requests.
+PERCENTILE_WINDOW_SECONDS = 60
+PERCENTILE_WINDOW_MAX_SAMPLES = 10000
+# Assumed LLM latency until the first real LLM call has been measured.
+LLM_LATENCY_PRIOR_SECONDS = 2.5
+
+TIERS = ("l0_hit", "t1_hit", "t2_hit", "llm_miss")
+
+
+class Histogram:
+    """Cumulative fixed-bucket histogram (Prometheus semantics, plus +Inf)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {"count": self.count, "sum": self.sum, "buckets": cumulative}
+
+
+class SlidingWindow:
+    """Recent (timestamp, value) samples for windowed percentiles."""
+
+    def __init__(self, window_seconds: float, max_samples: int):
+        self.window_seconds = window_seconds
+        self.samples = deque(maxlen=max_samples)
+
+    def observe(self, value: float, now: float):
+        self.samples.append((now, value))
+
+    def values(self, now: float) -> list[float]:
+        """Drops samples older than the window and returns a copy of the rest."""
+        cutoff = now - self.window_seconds
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        return [value for _, value in self.samples]
+
+
+def percentiles(values: list[float], quantiles) -> dict:
+    """{"p50": ..., "p95": ...} of `values` for the given quantiles (None when empty)."""
+    values = sorted(values)
+    if not values:
+        return {f"p{int(q * 100)}": None for q in quantiles}
+    return {f"p{int(q * 100)}": values[min(len(values) - 1, int(q * len(values)))] for q in quantiles}
+
+
+# --- Metric State ---
+_lock = threading.Lock()
+_requests = {tier: 0 for tier in TIERS}
+_latency = {tier: Histogram(LATENCY_BUCKETS) for tier in TIERS}
+_windows = {tier: SlidingWindow(PERCENTILE_WINDOW_SECONDS, PERCENTILE_WINDOW_MAX_SAMPLES) for tier in TIERS}
+_similarity = {"hit": Histogram(SIMILARITY_BUCKETS), "miss": Histogram(SIMILARITY_BUCKETS)}
+_llm_latency = Histogram(LATENCY_BUCKETS)
+_counters = {"total_latency_saved": 0.0, "coalesced_requests": 0}
+
+def _measured_llm_latency() -> float:
+    return _llm_latency.sum / _llm_latency.count if _llm_latency.count else LLM_LATENCY_PRIOR_SECONDS
+
+def measured_llm_latency() -> float:
+    """Mean measured LLM call latency in seconds (LLM_LATENCY_PRIOR_SECONDS before any call)."""
+    with _lock:
+        return _measured_llm_latency()
+
+def _window_percentiles(now: float) -> dict:
+    """
+    p50/p95/p99 of each tier's window. Only the copy is made under the lock;
+    the sort runs after it is released, so a scrape doesn't stall record_request.
+    """
+    with _lock:
+        samples = {tier: _windows[tier].values(now) for tier in TIERS}
+    return {tier: percentiles(values, (0.5, 0.95, 0.99)) for tier, values in samples.items()}
+
+def record_request(tier: str, latency: float):
+    """
+    Records one served request.
+
+    Args:
+        tier (str): "l0_hit", "t1_hit", "t2_hit" or "llm_miss".
+        latency (float): End-to-end request latency in seconds.
+    """
+    now = time.time()
+    with _lock:
+        _requests[tier] += 1
+        _latency[tier].observe(latency)
+        _windows[tier].observe(latency, now)
+        if tier != "llm_miss":
+            _counters["total_latency_saved"] += max(0.0, _measured_llm_latency() - latency)
+
+def record_llm_call(latency: float):
+    """Records the duration of one LLM call; drives the time-saved estimate."""
+    with _lock:
+        _llm_latency.observe(latency)
+
+def record_similarity(similarity: float, is_hit: bool):
+    """Records the best similarity score of a Tier-2 lookup."""
+    with _lock:
+        _similarity["hit" if is_hit else "miss"].observe(similarity)
+
+def record_coalesced():
+    """Counts a miss that was served by another request's in-flight LLM call."""
+    with _lock:
+        _counters["coalesced_requests"] += 1
+
+def get_metrics():
+    """
+    Returns a JSON-serializable snapshot of all metrics.
+    This is the function called by the /metrics/ endpoint in main.py.
+    """
+    window = _window_percentiles(time.time())
+    with _lock:
+        hits = _requests["l0_hit"] + _requests["t1_hit"] + _requests["t2_hit"]
+        return {
+            "cache_hits": hits,
+            "cache_misses": _requests["llm_miss"],
+            "total_requests": sum(_requests.values()),
+            "total_latency_saved": _counters["total_latency_saved"],
+            "coalesced_requests": _counters["coalesced_requests"],
+            "measured_llm_latency": _measured_llm_latency(),
+            "tiers": {
+                tier: {
+                    "requests": _requests[tier],
+                    "mean_latency": _latency[tier].sum / _latency[tier].count if _latency[tier].count else None,
+                    "window_seconds": PERCENTILE_WINDOW_SECONDS,
+                    **window[tier],
+                    "histogram": _latency[tier].snapshot(),
+                }
+                for tier in TIERS
+            },
+            "llm_call_latency": _llm_latency.snapshot(),
+            "similarity": {outcome: histogram.snapshot() for outcome, histogram in _similarity.items()},
+        }
+
+def get_prometheus_metrics() -> str:
+    """Renders the metrics in the Prometheus text exposition format."""
+    window = _window_percentiles(time.time())
+    lines = []
+
+    def histogram(name, help_text, histograms, label):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for label_value, hist in histograms.items():
+            labels = f'{label}="{label_value}",' if label else ""
+            running = 0
+            for bound, count in zip(hist.buckets + (float("inf"),), hist.counts):
+                running += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{{labels}le="{le}"}} {running}')
+            suffix = f"{{{labels.rstrip(',')}}}" if labels else ""
+            lines.append(f"{name}_sum{suffix} {hist.sum}")
+            lines.append(f"{name}_count{suffix} {hist.count}")
+
+    with _lock:
+        lines.append("# HELP semantic_cache_requests_total Requests served, by tier.")
+        lines.append("# TYPE semantic_cache_requests_total counter")
+        for tier in TIERS:
+            lines.append(f'semantic_cache_requests_total{{tier="{tier}"}} {_requests[tier]}')
+        histogram("semantic_cache_request_latency_seconds", "End-to-end request latency, by tier.", _latency, "tier")
+
+        lines.append(f"# HELP semantic_cache_request_latency_window_seconds "
+                     f"Latency percentiles over the last {PERCENTILE_WINDOW_SECONDS}s, by tier.")
+        lines.append("# TYPE semantic_cache_request_latency_window_seconds gauge")
+        for tier in TIERS:
+            for name, value in window[tier].items():
+                if value is not None:
+                    quantile = int(name[1:]) / 100
+                    lines.append(f'semantic_cache_request_latency_window_seconds{{tier="{tier}",quantile="{quantile}"}} {value}')
+
+        histogram("semantic_cache_llm_call_latency_seconds", "Duration of LLM calls.", {"": _llm_latency}, None)
+        histogram("semantic_cache_t2_similarity", "Best similarity score of Tier-2 lookups, by outcome.",
+                  _similarity, "outcome")
+
+        lines.append("# HELP semantic_cache_latency_saved_seconds_total Time saved by cache hits vs. the measured LLM latency.")
+        lines.append("# TYPE semantic_cache_latency_saved_seconds_total counter")
+        lines.append(f"semantic_cache_latency_saved_seconds_total {_counters['total_latency_saved']}")
+        lines.append("# HELP semantic_cache_coalesced_requests_total Misses served by another request's LLM call.")
+        lines.append("# TYPE semantic_cache_coalesced_requests_total counter")
+        lines.append(f"semantic_cache_coalesced_requests_total {_counters['coalesced_requests']}")
+    return "\n".join(lines) + "\n"
\ No newline at end of file
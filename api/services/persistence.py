@@ -0,0 +1,296 @@
+import json
+import os
+import threading
+import numpy as np
+
+
+class CachePersistence:
+    """
+    On-disk persistence for the semantic cache.
+
+    State lives in numbered generations inside `directory`:
+
+    - `snapshot.<gen>.npy`   float32 embedding matrix, memory-mapped on load
+    - `snapshot.<gen>.json`  ids, timestamps, expiry times and the offsets of
+                             each prompt and response in the text file
+    - `snapshot.<gen>.txt`   every prompt followed by every response, as one
+                             UTF-8 string that is decoded once and sliced
+    - `log.<gen>.jsonl`      append-only add/delete operations since the
+                             snapshot was taken
+    - `log.<gen>.f32`        raw float32 rows for the embeddings of logged adds
+
+    `CURRENT` names the newest complete snapshot. A snapshot rotates the log
+    to a new generation first, so operations that race with it land in the
+    new log; on load every log at or after CURRENT is replayed in order and
+    replaying an add for an existing id overwrites it.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        current = self._read_current()
+        self.generation = current["generation"] if current else 0
+        self.dim = current["dim"] if current else None
+        self._log = None
+        self._vectors_log = None
+        self._log_rows = 0
+
+    # --- Paths ---
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_current(self) -> dict | None:
+        try:
+            with open(self._path("CURRENT")) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _log_generations(self) -> list[int]:
+        generations = set()
+        for name in os.listdir(self.directory):
+            if name.startswith("log.") and name.endswith(".jsonl"):
+                try:
+                    generations.add(int(name.split(".")[1]))
+                except ValueError:
+                    pass
+        return sorted(generations)
+
+    # --- Loading ---
+    def load(self) -> dict | None:
+        """
+        Returns the persisted cache as parallel arrays ("ids", "embeddings",
+        "prompts", "responses", "timestamps", "expires_at"), or None if
+        nothing has been persisted yet.
+        """
+        current = self._read_current()
+        base = current["generation"] if current else 0
+        generations = [g for g in self._log_generations() if g >= base]
+        if current is None and not generations:
+            return None
+
+        snapshot = {"ids": [], "prompts": [], "responses": [], "timestamps": [], "expires_at": []}
+        snapshot_vectors = None
+        if current is not None:
+            snapshot_vectors = np.load(self._path(f"snapshot.{base}.npy"), mmap_mode="r")
+            snapshot = self._read_snapshot(base)
+            if not generations:
+                # Fast path: nothing was logged since the snapshot.
+                snapshot["embeddings"] = snapshot_vectors
+                return snapshot
+
+        # Replay the logs: adds and deletes either shadow snapshot rows or
+        # other logged adds.
+        snapshot_rows = {doc_id: row for row, doc_id in enumerate(snapshot["ids"])}
+        alive = np.ones(len(snapshot["ids"]), dtype=bool)
+        logged = {}
+        dim = self.dim
+        log_vectors = {}
+        for generation in generations:
+            for op in self._read_log(generation):
+                if op["op"] == "add":
+                    dim = dim or op.get("dim")
+                    doc_id = op["id"]
+                    if doc_id in snapshot_rows:
+                        alive[snapshot_rows[doc_id]] = False
+                    logged.pop(doc_id, None)
+                    logged[doc_id] = (generation, op["row"], op["prompt"], op["response"],
+                                      op["ts"], op.get("expires_at"))
+                elif op["op"] == "delete":
+                    for doc_id in op["ids"]:
+                        if logged.pop(doc_id, None) is None and doc_id in snapshot_rows:
+                            alive[snapshot_rows[doc_id]] = False
+            if dim:
+                log_vectors[generation] = self._read_log_vectors(generation, dim)
+        self.dim = dim
+
+        rows = np.flatnonzero(alive)
+        values = list(logged.values())
+        embeddings = np.zeros((len(rows) + len(values), dim or 0), dtype=np.float32)
+        if len(rows):
+            embeddings[:len(rows)] = snapshot_vectors[rows]
+        for i, (generation, row, *_rest) in enumerate(values, start=len(rows)):
+            embeddings[i] = log_vectors[generation][row]
+        return {
+            "ids": [snapshot["ids"][row] for row in rows] + list(logged),
+            "embeddings": embeddings,
+            "prompts": [snapshot["prompts"][row] for row in rows] + [v[2] for v in values],
+            "responses": [snapshot["responses"][row] for row in rows] + [v[3] for v in values],
+            "timestamps": np.concatenate([
+                np.asarray(snapshot["timestamps"], dtype=np.float64)[rows],
+                np.array([v[4] for v in values], dtype=np.float64),
+            ]),
+            "expires_at": [snapshot["expires_at"][row] for row in rows] + [v[5] for v in values],
+        }
+
+    def _read_snapshot(self, generation: int) -> dict:
+        with open(self._path(f"snapshot.{generation}.json")) as f:
+            meta = json.load(f)
+        with open(self._path(f"snapshot.{generation}.txt"), encoding="utf-8", newline="") as f:
+            text = f.read()
+        offsets = meta["offsets"]
+        strings = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+        count = len(meta["ids"])
+        return {
+            "ids": meta["ids"],
+            "prompts": strings[:count],
+            "responses": strings[count:],
+            "timestamps": np.asarray(meta["timestamps"], dtype=np.float64),
+            "expires_at": meta["expires_at"],
+        }
+
+    def _read_log(self, generation: int):
+        with open(self._path(f"log.{generation}.jsonl")) as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write.
+                    return
+
+    def _read_log_vectors(self, generation: int, dim: int) -> np.ndarray:
+        path = self._path(f"log.{generation}.f32")
+        if not os.path.exists(path) or os.path.getsize(path) < dim * 4:
+            return np.zeros((0, dim), dtype=np.float32)
+        rows = os.path.getsize(path) // (dim * 4)
+        return np.memmap(path, dtype=np.float32, mode="r", shape=(rows, dim))
+
+    # --- Append-Only Log ---
+    def _open_log(self):
+        if self._log is None:
+            log_path = self._path(f"log.{self.generation}.jsonl")
+            # A torn last line would swallow the next op and stop replay there.
+            drop_torn_line(log_path)
+            self._log = open(log_path, "a")
+            self._vectors_log, self._log_rows = open_vector_log(self._path(f"log.{self.generation}.f32"), self.dim)
+
+    def log_add(self, doc_id: str, embedding, prompt: str, response: str,
+                timestamp: float, expires_at: float | None = None):
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vector.shape[0]
+            self._open_log()
+            self._vectors_log.write(vector.tobytes())
+            self._vectors_log.flush()
+            self._log.write(json.dumps({
+                "op": "add", "id": doc_id, "row": self._log_rows, "dim": self.dim,
+                "prompt": prompt, "response": response, "ts": timestamp, "expires_at": expires_at,
+            }) + "\n")
+            self._log.flush()
+            self._log_rows += 1
+
+    def log_delete(self, ids: list[str]):
+        if not ids:
+            return
+        with self._lock:
+            self._open_log()
+            self._log.write(json.dumps({"op": "delete", "ids": list(ids)}) + "\n")
+            self._log.flush()
+
+    def _close_log(self):
+        if self._log is not None:
+            self._log.close()
+            self._vectors_log.close()
+            self._log = self._vectors_log = None
+
+    # --- Snapshots & Compaction ---
+    def snapshot(self, export_fn):
+        """
+        Writes a new snapshot from `export_fn()` and compacts the log.
+
+        `export_fn` must return the parallel arrays described in `load`; it is
+        called while log writes are paused so the snapshot and the rotated log
+        line up.
+        """
+        with self._snapshot_lock:
+            with self._lock:
+                state = export_fn()
+                self._close_log()
+                previous = self.generation
+                self.generation += 1
+                if self.dim is None and len(state["ids"]):
+                    self.dim = state["embeddings"].shape[1]
+
+            generation = self.generation
+            embeddings = np.ascontiguousarray(state["embeddings"], dtype=np.float32)
+            tmp_npy = self._path(f"snapshot.{generation}.npy.tmp")
+            with open(tmp_npy, "wb") as f:
+                np.save(f, embeddings)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_npy, self._path(f"snapshot.{generation}.npy"))
+
+            strings = list(state["prompts"]) + list(state["responses"])
+            offsets = [0]
+            for string in strings:
+                offsets.append(offsets[-1] + len(string))
+            self._write_atomic(f"snapshot.{generation}.txt", "".join(strings))
+            self._write_atomic(f"snapshot.{generation}.json", json.dumps({
+                "ids": list(state["ids"]),
+                "timestamps": np.asarray(state["timestamps"], dtype=np.float64).tolist(),
+                "expires_at": list(state["expires_at"]),
+                "offsets": offsets,
+            }))
+
+            self._write_atomic("CURRENT", json.dumps({"generation": generation, "dim": self.dim}))
+
+            self._remove_generations_before(generation)
+            print(f"DEBUG: Wrote T2 cache snapshot {generation} ({len(state['ids'])} entries); "
+                  f"compacted logs up to generation {previous}.")
+
+    def _write_atomic(self, name: str, text: str):
+        tmp_path = self._path(f"{name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path(name))
+
+    def _remove_generations_before(self, generation: int):
+        for name in os.listdir(self.directory):
+            parts = name.split(".")
+            if len(parts) < 3 or parts[0] not in ("snapshot", "log"):
+                continue
+            try:
+                file_generation = int(parts[1])
+            except ValueError:
+                continue
+            if file_generation < generation:
+                os.remove(self._path(name))
+
+    def close(self):
+        with self._lock:
+            self._close_log()
+
+
+def open_vector_log(path: str, dim: int | None):
+    """
+    Opens a sidecar of raw float32 rows of width `dim` for appending and
+    returns (file, rows already in it). A torn trailing row from a crash
+    mid-write is dropped, so new rows stay aligned with their index.
+    """
+    vectors = open(path, "ab")
+    rows = vectors.tell() // (dim * 4) if dim else 0
+    if dim:
+        vectors.truncate(rows * dim * 4)
+    return vectors, rows
+
+def drop_torn_line(path: str):
+    """Truncates a file after its last newline, dropping a line cut short by a crash."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        end = position = f.seek(0, os.SEEK_END)
+        while position > 0:
+            step = min(4096, position)
+            f.seek(position - step)
+            newline = f.read(step).rfind(b"\n")
+            if newline != -1:
+                position += newline + 1 - step
+                break
+            position -= step
+        if position != end:
+            f.truncate(position)
\ No newline at end of file
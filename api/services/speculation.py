@@ -0,0 +1,127 @@
+import math
+import re
+import threading
+from collections import OrderedDict
+
+
+class MissPredictor:
+    """
+    Cheap online estimate of the chance that a prompt misses Tier 2.
+
+    A logistic model over three features: the recent T2 miss rate (an
+    exponentially weighted average), the fraction of the prompt's words
+    not seen in recent prompts, and the prompt length. Weights start from a
+    prior that trusts the first two and are updated by one SGD step per
+    observed lookup.
+    """
+
+    def __init__(self, learning_rate: float = 0.05, miss_rate_alpha: float = 0.05, max_words: int = 50000):
+        self.learning_rate = learning_rate
+        self.miss_rate_alpha = miss_rate_alpha
+        self.max_words = max_words
+        self.weights = [-1.5, 2.0, 2.0, 0.0]
+        self.miss_rate = 0.5
+        self._words = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _tokenize(prompt: str) -> list[str]:
+        return re.findall(r"\w+", prompt.lower())
+
+    def features(self, prompt: str) -> list[float]:
+        words = self._tokenize(prompt)
+        with self._lock:
+            unseen = sum(word not in self._words for word in words) / len(words) if words else 1.0
+            return [1.0, self.miss_rate, unseen, min(len(words), 64) / 64]
+
+    def predict(self, features: list[float]) -> float:
+        score = sum(weight * value for weight, value in zip(self.weights, features))
+        return 1 / (1 + math.exp(-max(-30.0, min(30.0, score))))
+
+    def observe(self, prompt: str, features: list[float], missed: bool):
+        """Updates the model with the outcome of one T2 lookup."""
+        error = float(missed) - self.predict(features)
+        with self._lock:
+            self.weights = [weight + self.learning_rate * error * value
+                            for weight, value in zip(self.weights, features)]
+            self.miss_rate += self.miss_rate_alpha * (float(missed) - self.miss_rate)
+            for word in self._tokenize(prompt):
+                self._words[word] = None
+                self._words.move_to_end(word)
+            while len(self._words) > self.max_words:
+                self._words.popitem(last=False)
+
+
+class SpeculativeDispatcher:
+    """
+    Decides when to start the LLM call alongside the Tier-2 lookup.
+
+    A request speculates when the predictor puts its miss probability at or
+    above `min_miss_probability` and the waste budget allows it. The budget
+    is a token bucket: every LLM call that was actually needed earns
+    `max_waste_ratio` tokens (up to `burst`), and every speculative call
+    made for a T2 hit (or a request that joined another's call) spends one,
+    so wasted calls stay within `max_waste_ratio` of the needed ones plus
+    the burst.
+    """
+
+    def __init__(self, enabled: bool = False, min_miss_probability: float = 0.7,
+                 max_waste_ratio: float = 0.1, burst: float = 5.0, predictor: MissPredictor | None = None):
+        self.enabled = enabled
+        self.min_miss_probability = min_miss_probability
+        self.max_waste_ratio = max_waste_ratio
+        self.burst = burst
+        self.predictor = predictor or MissPredictor()
+        self._tokens = burst
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "predicted_misses": 0, "correct_predictions": 0, "speculated": 0,
+                       "used": 0, "wasted": 0, "over_budget": 0, "overlapped_seconds": 0.0}
+
+    def decide(self, prompt: str) -> tuple[bool, list[float]]:
+        """Returns whether to speculate on `prompt`, and the features to pass back to `observe`."""
+        features = self.predictor.features(prompt)
+        likely_miss = self.predictor.predict(features) >= self.min_miss_probability
+        with self._lock:
+            self._stats["lookups"] += 1
+            self._stats["predicted_misses"] += likely_miss
+            if not likely_miss:
+                return False, features
+            if self._tokens < 1:
+                self._stats["over_budget"] += 1
+                return False, features
+            # Reserve the token now; a call that turns out to be needed gets it back.
+            self._tokens -= 1
+            self._stats["speculated"] += 1
+            return True, features
+
+    def observe(self, prompt: str, features: list[float], missed: bool):
+        """Feeds the outcome of the T2 lookup back into the predictor."""
+        likely_miss = self.predictor.predict(features) >= self.min_miss_probability
+        self.predictor.observe(prompt, features, missed)
+        with self._lock:
+            self._stats["correct_predictions"] += likely_miss == missed
+
+    def record_llm_call(self, speculated: bool, overlapped: float = 0.0):
+        """Records a needed LLM call; `overlapped` is the T2 lookup time a speculative call hid."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.max_waste_ratio + (1 if speculated else 0))
+            if speculated:
+                self._stats["used"] += 1
+                self._stats["overlapped_seconds"] += overlapped
+
+    def record_wasted(self):
+        """Records a speculative call whose response was not needed."""
+        with self._lock:
+            self._stats["wasted"] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["enabled"] = self.enabled
+            stats["budget_tokens"] = self._tokens
+        lookups, made = stats["lookups"], stats["used"] + stats["wasted"]
+        stats["predictor_accuracy"] = stats["correct_predictions"] / lookups if lookups else None
+        stats["wasted_ratio"] = stats["wasted"] / made if made else None
+        stats["mean_overlap_seconds"] = stats["overlapped_seconds"] / stats["used"] if stats["used"] else None
+        stats["miss_rate"] = self.predictor.miss_rate
+        return stats
\ No newline at end of file
@@ -0,0 +1,131 @@
+import hashlib
+import os
+import unicodedata
+import uuid
+import zlib
+
+# --- Tier-1 Key & Value Configuration ---
+# Canonicalization steps applied to a prompt before it becomes a T1 key, in
+# order. "punctuation" only drops question marks and full stops at the end of
+# the prompt (and an opening "¿"); punctuation inside it is kept, since
+# "3.5" and "35" or "10-3" and "103" are different questions.
+T1_CANONICALIZE = [
+    step.strip() for step in os.getenv("T1_CANONICALIZE", "unicode,case,punctuation,whitespace").split(",")
+    if step.strip()
+]
+# Keys are "<namespace>:<version>:<hash>". Bumping T1_VERSION invalidates
+# every existing entry at once; the old keys age out through their TTL.
+T1_NAMESPACE = os.getenv("T1_NAMESPACE", "t1")
+T1_VERSION = os.getenv("T1_VERSION", "v1")
+T1_KEY_PREFIX = f"{T1_NAMESPACE}:{T1_VERSION}:"
+# Responses of at least this many UTF-8 bytes are stored zlib-compressed.
+T1_COMPRESS_MIN_BYTES = int(os.getenv("T1_COMPRESS_MIN_BYTES", 512))
+T1_COMPRESS_LEVEL = int(os.getenv("T1_COMPRESS_LEVEL", 6))
+# Per-entry TTL in seconds (0 disables expiry).
+T1_TTL_SECONDS = int(os.getenv("T1_TTL_SECONDS", 86400))
+# Every T1 write and purge is announced on this channel so other workers
+# can drop the entry from their in-process L0 cache. INSTANCE_ID marks this
+# process's own messages.
+T1_INVALIDATION_CHANNEL = os.getenv("T1_INVALIDATION_CHANNEL", f"{T1_KEY_PREFIX}invalidate")
+INSTANCE_ID = uuid.uuid4().hex[:12]
+# Optional Redis memory cap applied at startup, e.g. "256mb", with LRU
+# eviction across all keys. Leave unset when Redis is managed elsewhere.
+T1_REDIS_MAXMEMORY = os.getenv("T1_REDIS_MAXMEMORY", "")
+
+# One-byte value headers.
+_RAW = b"r"
+_ZLIB = b"z"
+
+
+# "!" is left alone: "what is 5!" and "what is 5" differ.
+_LEADING_PUNCTUATION = "¿"
+_TRAILING_PUNCTUATION = "?.？。"
+
+def _strip_sentence_punctuation(text: str) -> str:
+    text = text.strip().lstrip(_LEADING_PUNCTUATION).lstrip()
+    return text.rstrip(_TRAILING_PUNCTUATION + " \t\r\n")
+
+CANONICALIZATION_STEPS = {
+    "unicode": lambda text: unicodedata.normalize("NFKC", text),
+    "case": str.casefold,
+    "punctuation": _strip_sentence_punctuation,
+    "whitespace": lambda text: " ".join(text.split()),
+}
+
+def canonicalize(prompt: str) -> str:
+    """Applies the T1_CANONICALIZE steps, so "What is ML?" and "what is ml ?" match."""
+    for step in T1_CANONICALIZE:
+        prompt = CANONICALIZATION_STEPS[step](prompt)
+    return prompt
+
+def make_key(prompt: str) -> str:
+    """Returns the fixed-size T1 key of a prompt: prefix plus a 128-bit BLAKE2b hex digest."""
+    digest = hashlib.blake2b(canonicalize(prompt).encode("utf-8"), digest_size=16).hexdigest()
+    return T1_KEY_PREFIX + digest
+
+def encode_value(response: str) -> bytes:
+    data = response.encode("utf-8")
+    if len(data) >= T1_COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(data, T1_COMPRESS_LEVEL)
+        if len(compressed) < len(data):
+            return _ZLIB + compressed
+    return _RAW + data
+
+def decode_value(value) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    header, body = value[:1], value[1:]
+    if header == _ZLIB:
+        return zlib.decompress(body).decode("utf-8")
+    if header == _RAW:
+        return body.decode("utf-8")
+    return None
+
+# --- Redis Operations ---
+# `client` is a redis.asyncio client created with decode_responses=False.
+async def lookup(client, prompt: str) -> str | None:
+    return decode_value(await client.get(make_key(prompt)))
+
+async def lookup_many(client, prompts: list[str]) -> list[str | None]:
+    if not prompts:
+        return []
+    return [decode_value(value) for value in await client.mget([make_key(prompt) for prompt in prompts])]
+
+async def store(client, prompt: str, response: str):
+    """Writes a T1 entry and announces it, in one round trip."""
+    async with client.pipeline(transaction=False) as pipe:
+        queue_store(pipe, prompt, response)
+        await pipe.execute()
+
+def queue_store(pipe, prompt: str, response: str):
+    """Adds a T1 write, and its invalidation message, to a Redis pipeline."""
+    key = make_key(prompt)
+    pipe.set(key, encode_value(response), ex=T1_TTL_SECONDS or None)
+    pipe.publish(T1_INVALIDATION_CHANNEL, f"{INSTANCE_ID} {key}")
+
+async def purge_namespace(client, prefix: str = None, batch_size: int = 1000) -> int:
+    """Deletes every key under `prefix` (default: the current namespace and version)."""
+    prefix = prefix or T1_KEY_PREFIX
+    removed, batch = 0, []
+    async for key in client.scan_iter(match=f"{prefix}*", count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            removed += await client.unlink(*batch)
+            batch = []
+    if batch:
+        removed += await client.unlink(*batch)
+    await client.publish(T1_INVALIDATION_CHANNEL, f"{INSTANCE_ID} *")
+    return removed
+
+async def configure_memory_limit(client):
+    """Applies T1_REDIS_MAXMEMORY with allkeys-lru eviction, if configured."""
+    if not T1_REDIS_MAXMEMORY:
+        return
+    try:
+        await client.config_set("maxmemory", T1_REDIS_MAXMEMORY)
+        await client.config_set("maxmemory-policy", "allkeys-lru")
+        print(f"Redis maxmemory set to {T1_REDIS_MAXMEMORY} with allkeys-lru eviction.")
+    except Exception as e:
+        print(f"Error configuring Redis memory limit: {e}")
\ No newline at end of file
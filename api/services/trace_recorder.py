@@ -0,0 +1,174 @@
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+from .embedding_cache import EmbeddingCache
+from .persistence import drop_torn_line, open_vector_log
+
+# Distinct prompts whose embedding row is remembered; past this the map is
+# reset and repeats of older prompts write their embedding again.
+MAX_EMBEDDING_REFS = 1_000_000
+
+
+class RequestTrace:
+    """
+    Stage timings of one request, handed to the recorder by `finish`.
+
+    `stage(name)` records the time since the previous stage (or the start of
+    the request). With no recorder every method is a no-op.
+    """
+
+    def __init__(self, recorder, prompt: str, start_time: float):
+        self.recorder = recorder
+        self.prompt = prompt
+        self.start_time = start_time
+        self.stages = {}
+        self._last = start_time
+
+    @property
+    def enabled(self) -> bool:
+        return self.recorder is not None
+
+    def stage(self, name: str):
+        if self.recorder is None:
+            return
+        now = time.time()
+        self.stages[name] = self.stages.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def finish(self, tier: str, latency: float, response: str | None = None, similarity: float | None = None,
+               embedding=None, cacheable: bool | None = None, coalesced: bool = False):
+        if self.recorder is None:
+            return
+        event = {"ts": round(self.start_time, 3), "prompt": self.prompt, "tier": tier,
+                 "latency": round(latency, 6), "stages": {name: round(value, 6) for name, value in self.stages.items()}}
+        if similarity is not None:
+            event["sim"] = round(float(similarity), 4)
+        if response is not None:
+            event["chars"] = len(response)
+        if cacheable is not None:
+            event["cacheable"] = cacheable
+        if coalesced:
+            event["coalesced"] = True
+        self.recorder.record(event, embedding)
+
+
+class TraceRecorder:
+    """
+    Opt-in request trace for offline replay (benchmarks/replay_trace.py).
+
+    Each request becomes one JSON line in `path` (prompt, tier served,
+    similarity, response length and stage latencies). Embeddings go to a
+    sidecar of raw float32 rows (`<path without extension>.f32`), written
+    once per distinct prompt; an event's "emb" is its row there, also for
+    later exact-match hits whose request never embedded the prompt.
+
+    `record` only enqueues: serialization and writes happen on a background
+    thread, and events are dropped (and counted) if it falls more than
+    `max_pending` events behind.
+    """
+
+    def __init__(self, path: str, max_pending: int = 10000):
+        self.path = path
+        self.vectors_path = os.path.splitext(path)[0] + ".f32" if path else ""
+        self.enabled = bool(path)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._rows = {}
+        self._dim = None
+        self._next_row = 0
+        self._recorded = 0
+        self._dropped = 0
+        self._writer = None
+        if self.enabled:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+            self._writer.start()
+
+    def start(self, prompt: str, start_time: float) -> RequestTrace:
+        return RequestTrace(self if self.enabled else None, prompt, start_time)
+
+    def record(self, event: dict, embedding=None):
+        try:
+            self._queue.put_nowait((event, embedding))
+        except queue.Full:
+            self._dropped += 1
+
+    # --- Writer ---
+    def _open_vectors(self, dim: int):
+        self._dim = dim
+        vectors, self._next_row = open_vector_log(self.vectors_path, dim)
+        return vectors
+
+    def _embedding_row(self, vectors, prompt: str, embedding):
+        """Returns (row, vectors file) for the prompt, writing its embedding if it is new."""
+        key = EmbeddingCache.key(prompt)
+        row = self._rows.get(key)
+        if row is not None or embedding is None or len(embedding) == 0:
+            return row, vectors
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if vectors is None:
+            vectors = self._open_vectors(vector.shape[0])
+        elif vector.shape[0] != self._dim:
+            return None, vectors
+        vectors.write(vector.tobytes())
+        if len(self._rows) >= MAX_EMBEDDING_REFS:
+            self._rows.clear()
+        row = self._rows[key] = self._next_row
+        self._next_row += 1
+        return row, vectors
+
+    def _write_loop(self):
+        vectors = None
+        drop_torn_line(self.path)
+        with open(self.path, "a", encoding="utf-8") as log:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < 1024:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = False
+                lines = []
+                for item in batch:
+                    if item is None:
+                        stop = True
+                        continue
+                    event, embedding = item
+                    try:
+                        row, vectors = self._embedding_row(vectors, event["prompt"], embedding)
+                        if row is not None:
+                            event["emb"] = row
+                            event["dim"] = self._dim
+                        lines.append(json.dumps(event) + "\n")
+                    except Exception as e:
+                        print(f"Error writing request trace: {e}")
+                if vectors is not None:
+                    vectors.flush()
+                log.writelines(lines)
+                log.flush()
+                self._recorded += len(lines)
+                if stop:
+                    break
+        if vectors is not None:
+            vectors.close()
+
+    def close(self, timeout: float = 5.0):
+        """Writes out the queued events and stops the writer."""
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self._writer = None
+
+    def get_stats(self) -> dict:
+        return {
+            "path": self.path,
+            "recorded": self._recorded,
+            "pending": self._queue.qsize(),
+            "dropped": self._dropped,
+        }
\ No newline at end of file
@@ -0,0 +1,492 @@
+import tempfile
+import threading
+import numpy as np
+
+
+def normalize(embedding) -> np.ndarray:
+    """Returns the embedding as a float32 unit vector (a zero vector stays zero)."""
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class VectorIndex:
+    """
+    Interface for Tier-2 semantic index backends.
+
+    Similarities are cosine similarities in [-1, 1]; `search` returns hits
+    ordered best-first as dicts with "id", "similarity" and "response".
+    """
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def add(self, doc_id: str, embedding, prompt: str, response: str, timestamp: float):
+        raise NotImplementedError
+
+    def delete(self, ids: list[str]):
+        raise NotImplementedError
+
+    def search(self, embedding, k: int = 1) -> list[dict]:
+        raise NotImplementedError
+
+    def search_batch(self, embeddings, k: int = 1) -> list[list[dict]]:
+        """Runs one search per query embedding. Backends override this with a bulk path."""
+        return [self.search(embedding, k) for embedding in embeddings]
+
+    def touch(self, doc_id: str, timestamp: float):
+        """Refreshes the last-accessed timestamp of an entry."""
+        raise NotImplementedError
+
+    def touch_batch(self, ids: list[str], timestamps: list[float]):
+        """Refreshes many last-accessed timestamps at once. Backends override this with a bulk path."""
+        for doc_id, timestamp in zip(ids, timestamps):
+            self.touch(doc_id, timestamp)
+
+    def add_batch(self, ids: list[str], embeddings, prompts: list[str], responses: list[str], timestamps):
+        """Adds many entries at once. Backends override this with a bulk path."""
+        for doc_id, embedding, prompt, response, timestamp in zip(ids, embeddings, prompts, responses, timestamps):
+            self.add(doc_id, embedding, prompt, response, float(timestamp))
+
+    def export(self) -> dict:
+        """
+        Returns every entry as parallel arrays: "ids", "embeddings" (an
+        (n, dim) float32 matrix), "prompts", "responses" and "timestamps".
+        """
+        raise NotImplementedError
+
+
+class ChromaIndex(VectorIndex):
+    """Tier-2 index backed by an ephemeral ChromaDB collection."""
+
+    def __init__(self, collection_name: str = "llm_cache"):
+        import chromadb
+
+        self.client = chromadb.Client()
+        try:
+            self.client.delete_collection(name=collection_name)
+        except Exception:
+            pass
+        # Cosine space so that `1 - distance` is the cosine similarity.
+        self.collection = self.client.create_collection(
+            name=collection_name, metadata={"hnsw:space": "cosine"}
+        )
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def add(self, doc_id, embedding, prompt, response, timestamp):
+        self.collection.add(
+            embeddings=[np.asarray(embedding, dtype=np.float32).tolist()],
+            documents=[prompt],
+            metadatas=[{"response": response, "last_accessed_timestamp": timestamp, "id": doc_id}],
+            ids=[doc_id]
+        )
+
+    def delete(self, ids):
+        if ids:
+            self.collection.delete(ids=list(ids))
+
+    # search/search_batch skip an empty-collection check: cache_manager only
+    # queries when the cache holds entries, and count() is a round trip.
+    def search(self, embedding, k=1):
+        results = self.collection.query(
+            query_embeddings=[np.asarray(embedding, dtype=np.float32).tolist()], n_results=k
+        )
+        if not results['ids'] or not results['distances'][0]:
+            return []
+        return [
+            {"id": doc_id, "similarity": 1 - distance, "response": metadata['response']}
+            for doc_id, distance, metadata in zip(
+                results['ids'][0], results['distances'][0], results['metadatas'][0]
+            )
+        ]
+
+    def search_batch(self, embeddings, k=1):
+        if len(embeddings) == 0:
+            return []
+        results = self.collection.query(
+            query_embeddings=np.asarray(embeddings, dtype=np.float32).tolist(), n_results=k
+        )
+        return [
+            [
+                {"id": doc_id, "similarity": 1 - distance, "response": metadata['response']}
+                for doc_id, distance, metadata in zip(ids, distances, metadatas)
+            ]
+            for ids, distances, metadatas in zip(results['ids'], results['distances'], results['metadatas'])
+        ]
+
+    def touch(self, doc_id, timestamp):
+        # Chroma merges metadata on update, so only the timestamp is sent.
+        self.collection.update(ids=[doc_id], metadatas=[{"last_accessed_timestamp": timestamp}])
+
+    def touch_batch(self, ids, timestamps):
+        if ids:
+            self.collection.update(ids=list(ids), metadatas=[{"last_accessed_timestamp": t} for t in timestamps])
+
+    # Chroma rejects very large add() calls, so bulk loads go in chunks.
+    MAX_ADD_BATCH = 5000
+
+    def add_batch(self, ids, embeddings, prompts, responses, timestamps):
+        for start in range(0, len(ids), self.MAX_ADD_BATCH):
+            end = start + self.MAX_ADD_BATCH
+            self.collection.add(
+                embeddings=np.asarray(embeddings[start:end], dtype=np.float32).tolist(),
+                documents=list(prompts[start:end]),
+                metadatas=[
+                    {"response": response, "last_accessed_timestamp": float(timestamp), "id": doc_id}
+                    for doc_id, response, timestamp in zip(ids[start:end], responses[start:end], timestamps[start:end])
+                ],
+                ids=list(ids[start:end])
+            )
+
+    def export(self):
+        entries = self.collection.get(include=["embeddings", "documents", "metadatas"])
+        return {
+            "ids": list(entries['ids']),
+            "embeddings": np.asarray(entries['embeddings'], dtype=np.float32),
+            "prompts": list(entries['documents']),
+            "responses": [metadata['response'] for metadata in entries['metadatas']],
+            "timestamps": np.array(
+                [metadata.get('last_accessed_timestamp', 0) for metadata in entries['metadatas']],
+                dtype=np.float64
+            ),
+        }
+
+
+class NumpyFlatIndex(VectorIndex):
+    """
+    In-process brute-force index over a contiguous float32 matrix.
+
+    Rows are L2-normalized on insert so a search is a single matrix-vector
+    product. Ids, prompts, responses and timestamps live in arrays parallel
+    to the matrix rows; appends are amortized O(1) and deletes swap the last
+    row into the freed slot, keeping the live rows contiguous.
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self.initial_capacity = max(1, initial_capacity)
+        self._lock = threading.RLock()
+        self._vectors = None
+        self._timestamps = np.zeros(0, dtype=np.float64)
+        self._ids = []
+        self._prompts = []
+        self._responses = []
+        self._positions = {}
+        self._size = 0
+        # Bumped whenever live rows move or go away; see _search_rows.
+        self._deletes = 0
+
+    def _ensure_capacity(self, dim: int, rows: int = 1):
+        if self._vectors is not None and self._vectors.shape[1] != dim:
+            raise ValueError(f"Embedding dimension {dim} does not match index dimension {self._vectors.shape[1]}.")
+        if self._vectors is None or self._size + rows > len(self._vectors):
+            # Grow once to fit a whole batch instead of doubling repeatedly.
+            current = len(self._vectors) if self._vectors is not None else 0
+            self._grow(max(self.initial_capacity, self._size + rows, 2 * current), dim)
+
+    def _grow(self, capacity: int, dim: int):
+        """Reallocates row storage for `capacity` rows, keeping the live rows."""
+        vectors = np.zeros((capacity, dim), dtype=np.float32)
+        timestamps = np.zeros(capacity, dtype=np.float64)
+        if self._vectors is not None:
+            vectors[:self._size] = self._vectors[:self._size]
+            timestamps[:self._size] = self._timestamps[:self._size]
+        self._vectors, self._timestamps = vectors, timestamps
+
+    def _rows_written(self, start: int, end: int):
+        """Called after rows [start, end) of the matrix have been (re)written."""
+
+    def _move_row(self, source: int, target: int):
+        self._vectors[target] = self._vectors[source]
+        self._timestamps[target] = self._timestamps[source]
+
+    def count(self):
+        return self._size
+
+    def add(self, doc_id, embedding, prompt, response, timestamp):
+        vector = normalize(embedding)
+        with self._lock:
+            if doc_id in self._positions:
+                self.delete([doc_id])
+            self._ensure_capacity(vector.shape[0])
+            row = self._size
+            self._vectors[row] = vector
+            self._timestamps[row] = timestamp
+            self._rows_written(row, row + 1)
+            self._ids.append(doc_id)
+            self._prompts.append(prompt)
+            self._responses.append(response)
+            self._positions[doc_id] = row
+            self._size += 1
+
+    def delete(self, ids):
+        with self._lock:
+            for doc_id in ids:
+                row = self._positions.pop(doc_id, None)
+                if row is None:
+                    continue
+                last = self._size - 1
+                if row != last:
+                    # Swap-remove: move the last row into the freed slot.
+                    moved_id = self._ids[last]
+                    self._move_row(last, row)
+                    self._ids[row] = moved_id
+                    self._prompts[row] = self._prompts[last]
+                    self._responses[row] = self._responses[last]
+                    self._positions[moved_id] = row
+                self._ids.pop()
+                self._prompts.pop()
+                self._responses.pop()
+                self._size = last
+                self._deletes += 1
+
+    @staticmethod
+    def _rank(scores: np.ndarray, k: int) -> list[list[int]]:
+        """Rows of the k best scores of each query, best first."""
+        k = min(k, scores.shape[1])
+        if k == 1:
+            return np.argmax(scores, axis=1)[:, None].tolist()
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1)
+        return np.take_along_axis(candidates, order, axis=1).tolist()
+
+    def _search_rows(self, queries: np.ndarray, k: int) -> list[list[dict]]:
+        """Top-k hits for each row of the normalized `queries` matrix."""
+        with self._lock:
+            vectors, size, deletes = self._vectors, self._size, self._deletes
+        if size == 0:
+            return [[] for _ in range(len(queries))]
+        # Scored without the lock, so lookups and inserts don't queue behind the
+        # matrix product. Appends only write rows past `size` (or into a new
+        # matrix when the index grows); only a delete changes these rows, and
+        # then the search is redone under the lock.
+        scores = queries @ vectors[:size].T
+        top = self._rank(scores, k)
+        with self._lock:
+            if self._deletes != deletes:
+                if self._size == 0:
+                    return [[] for _ in range(len(queries))]
+                scores = queries @ self._vectors[:self._size].T
+                top = self._rank(scores, k)
+            return [
+                [
+                    {"id": self._ids[row], "similarity": float(query_scores[row]), "response": self._responses[row]}
+                    for row in rows
+                ]
+                for query_scores, rows in zip(scores, top)
+            ]
+
+    def search(self, embedding, k=1):
+        return self._search_rows(normalize(embedding)[None, :], k)[0]
+
+    def search_batch(self, embeddings, k=1):
+        if len(embeddings) == 0:
+            return []
+        queries = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        # One matrix-matrix product scores every query against every row.
+        return self._search_rows(queries / np.where(norms > 0, norms, 1), k)
+
+    def touch(self, doc_id, timestamp):
+        with self._lock:
+            row = self._positions.get(doc_id)
+            if row is not None:
+                self._timestamps[row] = timestamp
+
+    def touch_batch(self, ids, timestamps):
+        with self._lock:
+            for doc_id, timestamp in zip(ids, timestamps):
+                row = self._positions.get(doc_id)
+                if row is not None:
+                    self._timestamps[row] = timestamp
+
+    def add_batch(self, ids, embeddings, prompts, responses, timestamps):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if len(ids) == 0:
+            return
+        with self._lock:
+            if any(doc_id in self._positions for doc_id in ids):
+                self.delete([doc_id for doc_id in ids if doc_id in self._positions])
+            self._ensure_capacity(vectors.shape[1], len(ids))
+            start, end = self._size, self._size + len(ids)
+            # Copy first, then normalize in place, to avoid a temporary matrix.
+            block = self._vectors[start:end]
+            block[:] = vectors
+            norms = np.sqrt(np.einsum("ij,ij->i", block, block))
+            if not np.allclose(norms, 1, atol=1e-4):
+                block /= np.where(norms > 0, norms, 1)[:, None]
+            self._timestamps[start:end] = timestamps
+            self._rows_written(start, end)
+            self._ids.extend(ids)
+            self._prompts.extend(prompts)
+            self._responses.extend(responses)
+            self._positions.update(zip(ids, range(start, end)))
+            self._size = end
+
+    def export(self):
+        with self._lock:
+            dim = self._vectors.shape[1] if self._vectors is not None else 0
+            return {
+                "ids": list(self._ids),
+                "embeddings": self._vectors[:self._size].copy() if self._vectors is not None
+                              else np.zeros((0, dim), dtype=np.float32),
+                "prompts": list(self._prompts),
+                "responses": list(self._responses),
+                "timestamps": self._timestamps[:self._size].copy(),
+            }
+
+
+class QuantizedIndex(NumpyFlatIndex):
+    """
+    Flat index that scans compact codes and reranks with full precision.
+
+    With `mode="int8"` each normalized row is kept as int8 codes plus a
+    per-row scale (about 4x smaller than float32); with `mode="binary"` only
+    the sign bits are kept and candidates are ranked by Hamming distance
+    (32x smaller). The float32 rows live in a memory-mapped scratch file in
+    `vectors_dir`, and only the `rerank_k` best candidates of the first pass
+    are read back to compute exact cosine similarities.
+    """
+
+    # Rows scored per step of the first pass, to bound temporary memory.
+    SCAN_CHUNK_ROWS = 65536
+
+    def __init__(self, mode: str = "int8", rerank_k: int = 256, vectors_dir: str = "",
+                 initial_capacity: int = 1024):
+        if mode not in ("int8", "binary"):
+            raise ValueError(f"Unknown quantization mode '{mode}'. Choose from: int8, binary")
+        super().__init__(initial_capacity)
+        self.mode = mode
+        self.rerank_k = max(1, rerank_k)
+        # Anonymous file: the OS removes it when the index is garbage collected.
+        self._file = tempfile.TemporaryFile(dir=vectors_dir or None, prefix="semantic-index-")
+        self._codes = None
+        self._scales = None
+
+    def _grow(self, capacity, dim):
+        self._file.truncate(capacity * dim * 4)
+        self._vectors = np.memmap(self._file, dtype=np.float32, mode="r+", shape=(capacity, dim))
+        timestamps = np.zeros(capacity, dtype=np.float64)
+        if self.mode == "int8":
+            codes = np.zeros((capacity, dim), dtype=np.int8)
+        else:
+            # Whole 64-bit words per row, so Hamming distance runs on uint64.
+            codes = np.zeros((capacity, -(-dim // 64) * 8), dtype=np.uint8)
+        scales = np.zeros(capacity, dtype=np.float32)
+        if self._codes is not None:
+            timestamps[:self._size] = self._timestamps[:self._size]
+            codes[:self._size] = self._codes[:self._size]
+            scales[:self._size] = self._scales[:self._size]
+        self._timestamps, self._codes, self._scales = timestamps, codes, scales
+
+    def _quantize(self, block: np.ndarray):
+        """Returns (codes, scales) for normalized float32 rows."""
+        if self.mode == "binary":
+            bits = np.packbits(block > 0, axis=1)
+            codes = np.zeros((len(block), self._codes.shape[1]), dtype=np.uint8)
+            codes[:, :bits.shape[1]] = bits
+            return codes, np.ones(len(block), dtype=np.float32)
+        peak = np.abs(block).max(axis=1)
+        scales = np.where(peak > 0, 127 / np.where(peak > 0, peak, 1), 1).astype(np.float32)
+        return np.rint(block * scales[:, None]).astype(np.int8), scales
+
+    def _rows_written(self, start, end):
+        for chunk in range(start, end, self.SCAN_CHUNK_ROWS):
+            stop = min(end, chunk + self.SCAN_CHUNK_ROWS)
+            self._codes[chunk:stop], self._scales[chunk:stop] = self._quantize(self._vectors[chunk:stop])
+
+    def _move_row(self, source, target):
+        super()._move_row(source, target)
+        self._codes[target] = self._codes[source]
+        self._scales[target] = self._scales[source]
+
+    def _approximate_scores(self, query: np.ndarray, codes: np.ndarray, scales: np.ndarray,
+                            size: int) -> np.ndarray:
+        """First-pass scores of rows [0, size); higher is more similar."""
+        query_codes, _ = self._quantize(query[None, :])
+        scores = np.empty(size, dtype=np.float32)
+        for start in range(0, size, self.SCAN_CHUNK_ROWS):
+            end = min(size, start + self.SCAN_CHUNK_ROWS)
+            if self.mode == "int8":
+                dots = np.einsum("ij,j->i", codes[start:end], query_codes[0], dtype=np.int32)
+                scores[start:end] = dots / scales[start:end]
+            else:
+                scores[start:end] = -_hamming(codes[start:end], query_codes[0])
+        return scores
+
+    def _scan(self, query: np.ndarray, vectors, codes, scales, size: int, k: int):
+        """Returns the rows of the k best of rows [0, size) and their exact similarities, best first."""
+        k = min(k, size)
+        candidate_count = min(size, max(k, self.rerank_k))
+        approximate = self._approximate_scores(query, codes, scales, size)
+        if candidate_count < size:
+            candidates = np.argpartition(-approximate, candidate_count - 1)[:candidate_count]
+        else:
+            candidates = np.arange(size)
+        # Ascending row order turns the rerank gather into forward reads of the file.
+        candidates.sort()
+        exact = vectors[candidates] @ query
+        top = np.argsort(-exact)[:k]
+        return candidates[top], exact[top]
+
+    def search(self, embedding, k=1):
+        query = normalize(embedding)
+        with self._lock:
+            snapshot = (self._vectors, self._codes, self._scales, self._size)
+            deletes = self._deletes
+        if snapshot[-1] == 0:
+            return []
+        # Scanned without the lock, as in _search_rows: appends and growth
+        # leave rows below the snapshot's size as they were, and a delete
+        # makes the search rerun under the lock.
+        rows, exact = self._scan(query, *snapshot, k)
+        with self._lock:
+            if self._deletes != deletes:
+                if self._size == 0:
+                    return []
+                rows, exact = self._scan(query, self._vectors, self._codes, self._scales, self._size, k)
+            return [
+                {"id": self._ids[row], "similarity": float(score), "response": self._responses[row]}
+                for row, score in zip(rows, exact)
+            ]
+
+    # Every query needs its own first pass; skip NumpyFlatIndex's full-precision matrix product.
+    search_batch = VectorIndex.search_batch
+
+    def memory_usage(self) -> dict:
+        """Bytes per entry held in RAM (codes, scale, timestamp) and in the mmap file."""
+        dim = self._vectors.shape[1] if self._vectors is not None else 0
+        return {
+            "ram_bytes_per_entry": (self._codes.shape[1] if self._codes is not None else 0) + 4 + 8,
+            "mmap_bytes_per_entry": dim * 4,
+        }
+
+
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+def _hamming(codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Hamming distance between each row of packed bits and the query."""
+    words = codes.view(np.uint64) ^ query.view(np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[words.view(np.uint8)].sum(axis=1, dtype=np.int32)
+
+
+# --- Backend Registry ---
+INDEX_BACKENDS = {
+    "chroma": ChromaIndex,
+    "numpy": NumpyFlatIndex,
+    "int8": lambda **kwargs: QuantizedIndex(mode="int8", **kwargs),
+    "binary": lambda **kwargs: QuantizedIndex(mode="binary", **kwargs),
+}
+# Backends that take the rerank_k and vectors_dir options.
+QUANTIZED_BACKENDS = ("int8", "binary")
+
+def create_index(backend: str, **kwargs) -> VectorIndex:
+    """Instantiates a Tier-2 index backend by name."""
+    try:
+        index_cls = INDEX_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown semantic index backend '{backend}'. Choose from: {', '.join(INDEX_BACKENDS)}")
+    return index_cls(**kwargs)
\ No newline at end of file
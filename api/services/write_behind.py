@@ -0,0 +1,168 @@
+import asyncio
+import queue
+import threading
+
+
+class WriteBehindQueue:
+    """
+    Background writer for Tier-2 inserts and last-access updates.
+
+    Inserts are queued (at most `max_pending` at a time) and a writer thread
+    hands them to `apply_adds` in batches of up to `max_batch`, so concurrent
+    misses share one embedding batch and one index insert. Access times are
+    kept in a dict keyed by entry id, so repeated hits on an entry collapse
+    into one update, and are handed to `apply_touches` in bulk on every
+    cycle (at least every `flush_interval` seconds).
+
+    `put_async` returns a future that resolves once the insert has been
+    written (or failed). When the queue is full it waits, without blocking
+    the event loop, until the writer makes room: requests slow down instead
+    of the queue growing without bound.
+    """
+
+    def __init__(self, apply_adds, apply_touches, max_pending: int = 1000, max_batch: int = 256,
+                 flush_interval: float = 0.05):
+        self.apply_adds = apply_adds
+        self.apply_touches = apply_touches
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._touches = {}
+        self._touches_lock = threading.Lock()
+        self._space_waiters = []
+        self._space_lock = threading.Lock()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"adds_written": 0, "add_batches": 0, "touches_written": 0, "touches_merged": 0,
+                       "touch_batches": 0, "backpressure_waits": 0, "max_depth": 0, "errors": 0}
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="t2-write-behind", daemon=True)
+                self._writer.start()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    # --- Producers ---
+    async def put_async(self, entry) -> asyncio.Future:
+        """Queues one insert, waiting for room while the queue is full. Returns its "written" future."""
+        self._ensure_writer()
+        loop = asyncio.get_running_loop()
+        written = loop.create_future()
+        item = (entry, loop, written)
+        waited = False
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                break
+            except queue.Full:
+                pass
+            if not waited:
+                waited = True
+                self._count("backpressure_waits")
+            space = loop.create_future()
+            with self._space_lock:
+                self._space_waiters.append((loop, space))
+            # The writer may have made room before the waiter was registered.
+            if not self._queue.full():
+                continue
+            await space
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._stats["max_depth"] = max(self._stats["max_depth"], depth)
+        return written
+
+    def touch(self, doc_id: str, timestamp: float):
+        """Records an access; only the latest time per entry is written."""
+        self._ensure_writer()
+        with self._touches_lock:
+            merged = doc_id in self._touches
+            self._touches[doc_id] = timestamp
+        if merged:
+            self._count("touches_merged")
+
+    # --- Writer ---
+    @staticmethod
+    def _resolve(loop, future, value=None):
+        """Completes an event-loop future from the writer thread."""
+        def complete():
+            if not future.done():
+                future.set_result(value)
+        try:
+            loop.call_soon_threadsafe(complete)
+        except RuntimeError:
+            # The loop has closed; nobody is waiting any more.
+            pass
+
+    def _wake_producers(self):
+        with self._space_lock:
+            waiters, self._space_waiters = self._space_waiters, []
+        for loop, space in waiters:
+            self._resolve(loop, space)
+
+    def _write_loop(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch:
+                self._wake_producers()
+            markers = [item for item in batch if isinstance(item, threading.Event)]
+            adds = [item for item in batch if not isinstance(item, threading.Event)]
+            if adds:
+                written = True
+                try:
+                    self.apply_adds([entry for entry, _, _ in adds])
+                    with self._stats_lock:
+                        self._stats["adds_written"] += len(adds)
+                        self._stats["add_batches"] += 1
+                except Exception as e:
+                    written = False
+                    self._count("errors")
+                    print(f"Error in T2 write-behind insert of {len(adds)} entries: {e}")
+                for _, loop, future in adds:
+                    self._resolve(loop, future, written)
+            self._write_touches()
+            for marker in markers:
+                marker.set()
+
+    def _write_touches(self):
+        with self._touches_lock:
+            touches, self._touches = self._touches, {}
+        if not touches:
+            return
+        try:
+            self.apply_touches(touches)
+            with self._stats_lock:
+                self._stats["touches_written"] += len(touches)
+                self._stats["touch_batches"] += 1
+        except Exception as e:
+            self._count("errors")
+            print(f"Error in T2 write-behind access update of {len(touches)} entries: {e}")
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Blocks until everything queued before the call is written. Returns False on timeout."""
+        if self._writer is None:
+            return True
+        marker = threading.Event()
+        self._queue.put(marker)
+        return marker.wait(timeout)
+
+    def get_stats(self) -> dict:
+        with self._touches_lock:
+            pending_touches = len(self._touches)
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {**stats, "pending_adds": self._queue.qsize(), "pending_touches": pending_touches}
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Measures /process-prompt/ throughput with a mocked slow LLM.
+
+The async endpoint is compared against `legacy_process_prompt`, a copy of
+the previous blocking `def` handler that FastAPI runs on its worker thread
+pool. Redis is disabled and the embedding model is replaced by the cheap
+random-projection stub so that only the request path itself is measured; a
+fraction of the traffic repeats prompts that are already cached.
+
+    python -m benchmarks.bench_async_pipeline --requests 400 --concurrency 100 --llm-latency 2
+"""
+import argparse
+import asyncio
+import random
+import time
+import numpy as np
+import httpx
+
+from benchmarks.fakes import FakeLLM, RandomProjectionEncoder
+from api import main
+from api.services import cache_manager, llm_provider, metrics_manager
+
+
+@main.app.post("/legacy-process-prompt/")
+def legacy_process_prompt(request: main.PromptRequest):
+    start_time = time.time()
+    prompt = request.prompt
+    cached_result = cache_manager.find_in_semantic_cache(prompt)
+    if cached_result:
+        latency = time.time() - start_time
+        metrics_manager.record_request("t2_hit", latency)
+        return {"response": cached_result["response"], "from_cache": True, "cache_tier": 2,
+                "latency": latency}
+    llm_response = llm_provider.get_llm_response(prompt)
+    if cache_manager.is_response_high_quality(llm_response):
+        cache_manager.add_to_semantic_cache(prompt, llm_response)
+    latency = time.time() - start_time
+    metrics_manager.record_request("llm_miss", latency)
+    return {"response": llm_response, "from_cache": False, "cache_tier": None,
+            "latency": latency}
+
+
+def build_workload(n, hit_ratio, seed):
+    rng = random.Random(seed)
+    hot = [f"cached question {i}" for i in range(20)]
+    # Novel prompts are random words, so the bag-of-words encoder keeps them
+    # below the T2 threshold of each other and of the hot prompts.
+    workload = [rng.choice(hot) if rng.random() < hit_ratio
+                else " ".join(f"{rng.getrandbits(32):08x}" for _ in range(8))
+                for i in range(n)]
+    return hot, workload
+
+
+async def drive(client, path, workload, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = {True: [], False: []}
+
+    async def one(prompt):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(path, json={"prompt": prompt})
+            latencies[response.json()["from_cache"]].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(prompt) for prompt in workload))
+    return time.perf_counter() - start, latencies
+
+
+def report(name, elapsed, latencies, total):
+    hits = np.array(latencies[True]) * 1000
+    misses = np.array(latencies[False]) * 1000
+    print(f"{name:>7}: {total / elapsed:8.1f} req/s | "
+          f"hit p50 {np.percentile(hits, 50) if len(hits) else 0:8.1f} ms "
+          f"p99 {np.percentile(hits, 99) if len(hits) else 0:8.1f} ms | "
+          f"miss p50 {np.percentile(misses, 50) if len(misses) else 0:8.1f} ms")
+
+
+async def run(args):
+    llm_provider.EMBEDDING_MODEL = RandomProjectionEncoder()
+    llm_provider.GEMINI_MODEL = FakeLLM(args.llm_latency)
+    llm_provider._llm_semaphore = asyncio.Semaphore(args.llm_concurrency)
+    main.redis_client = None
+
+    hot, workload = build_workload(args.requests, args.hit_ratio, args.seed)
+    for prompt in hot:
+        cache_manager.add_to_semantic_cache(prompt, f"A helpful, cacheable answer to: {prompt}")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, path in (("legacy", "/legacy-process-prompt/"), ("async", "/process-prompt/")):
+            # Fresh novel prompts per run so both paths see the same miss count.
+            run_workload = [p if p in hot else " ".join(f"{name}{word}" for word in p.split())
+                            for p in workload]
+            elapsed, latencies = await drive(client, path, run_workload, args.concurrency)
+            report(name, elapsed, latencies, len(run_workload))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="Mocked LLM latency in seconds.")
+    parser.add_argument("--llm-concurrency", type=int, default=64,
+                        help="LLM_MAX_CONCURRENCY for the async path (the legacy path is bounded by its thread pool).")
+    parser.add_argument("--hit-ratio", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main_cli()
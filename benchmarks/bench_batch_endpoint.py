@@ -0,0 +1,126 @@
+"""
+Compares one /process-prompts/ call against N /process-prompt/ calls.
+
+Each round resolves the same mix of prompts three ways: N sequential single
+calls, N concurrent single calls, and one batch call. Prompts are split
+between Tier-1 hits (already in Redis), Tier-2 hits (a new wording of a
+cached prompt) and misses (random words). Redis, the LLM and the embedding
+model are the stand-ins from benchmarks/fakes.py; `--redis-rtt-ms` adds a
+per-command round trip so the cost of N GETs vs one MGET shows up.
+
+    python -m benchmarks.bench_batch_endpoint --batch-size 50 --rounds 10 --redis-rtt-ms 0.5
+"""
+import argparse
+import asyncio
+import builtins
+import random
+import time
+import numpy as np
+import httpx
+
+from benchmarks.fakes import FakeLLM, FakeRedis, RandomProjectionEncoder
+from api import main
+from api.services import cache_manager, llm_provider, t1_cache
+
+
+def hot_prompt(i):
+    return f"cached question number {i} about topic {i % 7} and detail {i % 11}"
+
+
+def build_batch(rng, size, t1_ratio, t2_ratio, hot, tag):
+    """Returns a batch of prompts; `tag` keeps each mode's T2 wordings and misses distinct."""
+    batch = []
+    for _ in range(size):
+        roll = rng.random()
+        if roll < t1_ratio:
+            batch.append(rng.choice(hot))
+        elif roll < t1_ratio + t2_ratio:
+            batch.append(f"{rng.choice(hot)} {tag}{rng.getrandbits(32):08x}")
+        else:
+            batch.append(" ".join(f"{tag}{rng.getrandbits(32):08x}" for _ in range(8)))
+    return batch
+
+
+async def single_sequential(client, batch):
+    return [(await client.post("/process-prompt/", json={"prompt": prompt})).json() for prompt in batch]
+
+
+async def single_concurrent(client, batch):
+    responses = await asyncio.gather(*(client.post("/process-prompt/", json={"prompt": prompt}) for prompt in batch))
+    return [response.json() for response in responses]
+
+
+async def batched(client, batch):
+    return (await client.post("/process-prompts/", json={"prompts": batch})).json()["results"]
+
+
+async def run(args):
+    llm_provider.EMBEDDING_MODEL = RandomProjectionEncoder()
+    llm_provider.GEMINI_MODEL = FakeLLM(args.llm_latency)
+    llm_provider._llm_semaphore = asyncio.Semaphore(args.llm_concurrency)
+    redis = FakeRedis(round_trip_ms=args.redis_rtt_ms)
+    main.redis_client = redis
+    main.l0_cache.max_entries = args.l0_entries
+
+    hot = [hot_prompt(i) for i in range(args.hot)]
+    for prompt in hot:
+        answer = f"A helpful, cacheable answer to: {prompt}"
+        redis._set(t1_cache.make_key(prompt), t1_cache.encode_value(answer))
+        cache_manager.add_to_semantic_cache(prompt, answer)
+
+    modes = (("sequential", single_sequential), ("concurrent", single_concurrent), ("batch", batched))
+    timings = {name: [] for name, _ in modes}
+    tiers = {name: {} for name, _ in modes}
+    commands = {name: 0 for name, _ in modes}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for round_number in range(args.rounds):
+            for name, call in modes:
+                # Same random draws for every mode; only the tag differs.
+                rng = random.Random(args.seed + round_number)
+                batch = build_batch(rng, args.batch_size, args.t1_ratio, args.t2_ratio, hot, name[0])
+                before = redis.commands
+                start = time.perf_counter()
+                results = await call(client, batch)
+                timings[name].append(time.perf_counter() - start)
+                commands[name] += redis.commands - before
+                for result in results:
+                    tier = "coalesced" if result.get("coalesced") else "llm" if result["cache_tier"] is None else result["cache_tier"]
+                    tiers[name][tier] = tiers[name].get(tier, 0) + 1
+
+    print(f"{args.rounds} rounds of {args.batch_size} prompts, LLM latency {args.llm_latency * 1000:.0f} ms, "
+          f"Redis round trip {args.redis_rtt_ms} ms")
+    baseline = None
+    for name, _ in modes:
+        elapsed = np.array(timings[name])
+        throughput = args.batch_size * args.rounds / elapsed.sum()
+        baseline = baseline or throughput
+        print(f"{name:>10}: {throughput:8.1f} prompts/s ({throughput / baseline:5.1f}x) | "
+              f"round p50 {np.percentile(elapsed, 50) * 1000:8.1f} ms | "
+              f"redis commands/round {commands[name] / args.rounds:6.1f} | tiers {dict(sorted(tiers[name].items(), key=str))}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--hot", type=int, default=200, help="Prompts pre-loaded into both cache tiers.")
+    parser.add_argument("--t1-ratio", type=float, default=0.4)
+    parser.add_argument("--t2-ratio", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mocked LLM latency in seconds.")
+    parser.add_argument("--llm-concurrency", type=int, default=64)
+    parser.add_argument("--redis-rtt-ms", type=float, default=0.5)
+    parser.add_argument("--l0-entries", type=int, default=0,
+                        help="In-process L0 size; 0 (off) so earlier modes don't warm it for later ones.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    cache_manager.CACHE_MAX_SIZE = max(cache_manager.CACHE_MAX_SIZE, args.hot + 3 * args.batch_size * args.rounds)
+    cache_manager.CACHE_LOW_WATER_MARK = int(cache_manager.CACHE_MAX_SIZE * 0.9)
+    # The per-request DEBUG lines would dominate the timings.
+    _print = builtins.print
+    builtins.print = lambda *a, **k: None if a and str(a[0]).startswith("DEBUG") else _print(*a, **k)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main_cli()
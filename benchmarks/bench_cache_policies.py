@@ -0,0 +1,95 @@
+"""
+Hit rate and LLM-seconds saved by each T2 eviction/admission policy.
+
+Trace-driven simulation of the semantic cache's bookkeeping (the policies
+from api/services/cache_policy.py, evicting in batches down to a 90%
+low-water mark like cache_manager). Requests come from a Zipf-skewed set of
+questions, each asked in one of several paraphrased wordings; a request is a
+hit when any wording of its question is cached, as a T2 match would be. A
+share of requests are one-off prompts (like load_tester's random-suffixed
+NOVEL_PROMPTS). Every question has a response length and an LLM latency, so
+the report shows both the hit rate and the share of LLM time saved.
+
+    python -m benchmarks.bench_cache_policies --requests 200000 --capacity 500 2000 --novel-ratio 0.2 0.5
+"""
+import argparse
+import numpy as np
+
+from api.services.cache_policy import create_policy
+
+POLICIES = (("lru", "always"), ("gdsf", "always"), ("lru", "tinylfu"), ("gdsf", "tinylfu"))
+
+
+def make_trace(args, novel_ratio, rng):
+    """Returns one (question id or -1 for a one-off, wording, response length, LLM seconds) per request."""
+    lengths = np.clip(rng.lognormal(np.log(1500), 0.6, args.questions), 100, 12000).astype(int)
+    # Generation time grows with length; queueing and model variance add noise.
+    latencies = (0.3 + lengths / 1000 * 0.8) * rng.lognormal(0, 0.4, args.questions)
+    weights = 1 / np.arange(1, args.questions + 1) ** args.zipf_s
+    questions = rng.choice(args.questions, size=args.requests, p=weights / weights.sum())
+    novel = rng.random(args.requests) < novel_ratio
+    trace = []
+    for i, question in enumerate(questions):
+        if novel[i]:
+            length = int(np.clip(rng.lognormal(np.log(1500), 0.6), 100, 12000))
+            trace.append((-1, f"novel {i}", length, (0.3 + length / 1000 * 0.8) * rng.lognormal(0, 0.4)))
+        else:
+            wording = f"{question}:{rng.integers(args.wordings)}"
+            trace.append((int(question), wording, int(lengths[question]), float(latencies[question])))
+    return trace
+
+
+def simulate(trace, eviction, admission, capacity, window):
+    policy = create_policy(eviction, admission, capacity=capacity, window_fraction=window)
+    low_water = int(capacity * 0.9)
+    cached = {}     # question (or one-off key) -> doc id
+    questions = {}  # doc id -> question
+    hits, saved, demanded = 0, 0.0, 0.0
+    for doc_number, (question, key, length, latency) in enumerate(trace):
+        demanded += latency
+        entry = question if question >= 0 else key
+        doc_id = cached.get(entry)
+        if doc_id is not None:
+            policy.record_access(doc_id)
+            hits += 1
+            saved += latency
+            continue
+        if len(policy) + 1 > capacity:
+            for victim in policy.pop_victims(max(1, len(policy) - min(low_water, capacity - 1))):
+                del cached[questions.pop(victim)]
+        doc_id = str(doc_number)
+        policy.record_insert(doc_id, cost=latency, size=length, key=key)
+        cached[entry] = doc_id
+        questions[doc_id] = entry
+    return hits / len(trace), saved / demanded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--questions", type=int, default=20_000, help="Distinct underlying questions.")
+    parser.add_argument("--wordings", type=int, default=5, help="Paraphrases per question.")
+    parser.add_argument("--zipf-s", type=float, default=0.9)
+    parser.add_argument("--capacity", type=int, nargs="+", default=[500, 2000])
+    parser.add_argument("--novel-ratio", type=float, nargs="+", default=[0.2, 0.5])
+    parser.add_argument("--window", type=float, default=0.01, help="CACHE_TINYLFU_WINDOW.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests over {args.questions} questions x {args.wordings} wordings "
+          f"(Zipf s={args.zipf_s})")
+    print(f"{'capacity':>8} {'novel':>6} {'policy':>14} {'hit rate':>9} {'vs LRU':>8} "
+          f"{'LLM s saved':>11} {'vs LRU':>8}")
+    for novel_ratio in args.novel_ratio:
+        trace = make_trace(args, novel_ratio, np.random.default_rng(args.seed))
+        for capacity in args.capacity:
+            baseline = None
+            for eviction, admission in POLICIES:
+                hit_rate, saved = simulate(trace, eviction, admission, capacity, args.window)
+                baseline = baseline or (hit_rate, saved)
+                print(f"{capacity:>8} {novel_ratio:>6.0%} {eviction + '/' + admission:>14} {hit_rate:>9.1%} "
+                      f"{(hit_rate - baseline[0]) * 100:>+6.1f}pt {saved:>11.1%} {(saved - baseline[1]) * 100:>+6.1f}pt")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+Compares the registered embedding backends.
+
+Each backend runs in a fresh subprocess and reports:
+
+- import time of `api.services.llm_provider` (the model is not loaded yet)
+- model load time and first-request latency in a cold process
+- steady-state embeddings/sec at the micro-batcher's batch size
+- drift from the bge-large baseline: the mean and max absolute change in
+  pairwise cosine similarity over a fixed probe set, and how often the
+  T2 hit/miss decision at CACHE_THRESHOLD flips. Backends with the same
+  dimension (e.g. bge-large-int8) also report the direct cosine to baseline.
+
+    python -m benchmarks.bench_embedding_backends --backends bge-large bge-large-int8 bge-small minilm --threads 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+PROBE_PROMPTS = [
+    "What is machine learning?", "what is ml?", "explain machine learning to me", "define ml",
+    "What is the capital of France?", "france's capital?", "tell me the capital of france",
+    "capital of the country of france", "How does a neural network work?", "explain neural networks",
+    "what are the principles of a neural network", "describe the function of a neural network",
+    "What is the airspeed velocity of an unladen swallow?", "Explain the theory of relativity in simple terms.",
+    "Who wrote the novel 'Dune'?", "What are the main components of a CPU?",
+    "Describe the process of photosynthesis.", "What is the chemical formula for water?",
+    "Who was the first person to walk on the moon?", "What is blockchain technology?",
+    "Explain the concept of quantum computing.", "Summarize the plot of the movie 'The Matrix'.",
+]
+CACHE_THRESHOLD = 0.80
+
+
+def child(backend_name, threads, seconds, batch_size, output):
+    os.environ["EMBEDDING_BACKEND"] = backend_name
+    os.environ["EMBEDDING_THREADS"] = str(threads)
+    start = time.perf_counter()
+    from api.services import llm_provider
+    import_s = time.perf_counter() - start
+
+    backend = llm_provider.EMBEDDING_MODEL
+    start = time.perf_counter()
+    backend.encode([PROBE_PROMPTS[0]])
+    first_request_s = time.perf_counter() - start
+
+    batch = (PROBE_PROMPTS * (batch_size // len(PROBE_PROMPTS) + 1))[:batch_size]
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        backend.encode(batch)
+        count += len(batch)
+    eps = count / (time.perf_counter() - start)
+
+    np.save(output, backend.encode(PROBE_PROMPTS))
+    print(json.dumps({
+        "import_s": import_s,
+        "load_s": getattr(backend, "load_seconds", None),
+        "first_request_ms": first_request_s * 1000,
+        "embeddings_per_s": eps,
+    }))
+
+
+def normalize(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def similarity_matrix(vectors):
+    vectors = normalize(vectors)
+    return vectors @ vectors.T
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["bge-large", "bge-large-int8", "bge-small", "minilm"])
+    parser.add_argument("--baseline", default="bge-large")
+    parser.add_argument("--threads", type=int, default=0, help="EMBEDDING_THREADS (0 = PyTorch default).")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of the throughput run.")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.threads, args.seconds, args.batch_size, args.output)
+        return
+
+    backends = [args.baseline] + [b for b in args.backends if b != args.baseline]
+    results, embeddings = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in backends:
+            output = os.path.join(tmp, f"{name}.npy")
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_embedding_backends", "--child", name,
+                 "--threads", str(args.threads), "--seconds", str(args.seconds),
+                 "--batch-size", str(args.batch_size), "--output", output],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"{name}: failed\n{proc.stderr.strip()}")
+                continue
+            results[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+            embeddings[name] = np.load(output)
+
+    if args.baseline not in embeddings:
+        print(f"Baseline {args.baseline} failed; cannot compute drift.")
+        return
+    base = embeddings[args.baseline]
+    base_sim = similarity_matrix(base)
+    upper = np.triu_indices(len(PROBE_PROMPTS), k=1)
+
+    print(f"{'backend':>16} {'import s':>9} {'load s':>7} {'first ms':>9} {'emb/s':>8} "
+          f"{'mean dsim':>10} {'max dsim':>9} {'flips %':>8} {'cos->base':>10}")
+    for name, r in results.items():
+        sim = similarity_matrix(embeddings[name])
+        delta = np.abs(sim - base_sim)[upper]
+        flips = np.mean((sim[upper] >= CACHE_THRESHOLD) != (base_sim[upper] >= CACHE_THRESHOLD)) * 100
+        direct = "-"
+        if embeddings[name].shape == base.shape:
+            cosines = np.sum(normalize(embeddings[name]) * normalize(base), axis=1)
+            direct = f"{cosines.mean():.4f}"
+        print(f"{name:>16} {r['import_s']:>9.2f} {r['load_s'] or 0:>7.2f} {r['first_request_ms']:>9.1f} "
+              f"{r['embeddings_per_s']:>8.1f} {delta.mean():>10.4f} {delta.max():>9.4f} {flips:>8.1f} {direct:>10}")
+
+
+if __name__ == "__main__":
+    main()
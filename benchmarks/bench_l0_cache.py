@@ -0,0 +1,123 @@
+"""
+Measures what the in-process L0 cache saves on repeat hits, and how stale
+it can get across workers.
+
+Latency: a Zipf-skewed stream over prompts already in Tier 1 is sent to
+/process-prompt/ with L0 disabled and enabled. Redis is FakeRedis from
+benchmarks/fakes.py; `--redis-rtt-ms` sets its per-command round trip.
+Reports per-tier hit counts, hit latency and Redis commands per request.
+
+Consistency: two workers' L0 caches share one FakeRedis. Worker A keeps
+rewriting prompts worker B has cached; B reads each one back after a random
+delay. Stale reads are counted with the invalidation subscription up and
+with it down (where only the fallback TTL bounds staleness).
+
+    python -m benchmarks.bench_l0_cache --requests 5000 --hot 2000 --l0-entries 512 --redis-rtt-ms 0.5
+"""
+import argparse
+import asyncio
+import builtins
+import random
+import numpy as np
+import httpx
+
+from benchmarks.fakes import FakeLLM, FakeRedis, RandomProjectionEncoder
+from api import main
+from api.services import llm_provider, metrics_manager, t1_cache
+from api.services.l0_cache import L0Cache, listen_for_invalidations
+
+
+def hot_prompt(i):
+    return f"frequently asked question {i} about topic {i % 13}"
+
+
+async def latency_run(args, l0_entries):
+    redis = FakeRedis(round_trip_ms=args.redis_rtt_ms)
+    main.redis_client = redis
+    main.l0_cache = L0Cache(t1_cache.make_key, max_entries=l0_entries, max_bytes=main.L0_MAX_BYTES,
+                            fallback_ttl=main.L0_FALLBACK_TTL_SECONDS, max_ttl=t1_cache.T1_TTL_SECONDS)
+    hot = [hot_prompt(i) for i in range(args.hot)]
+    for prompt in hot:
+        redis._set(t1_cache.make_key(prompt), t1_cache.encode_value(f"A cached answer to: {prompt}"))
+    listener = asyncio.create_task(listen_for_invalidations(
+        redis, main.l0_cache, t1_cache.T1_INVALIDATION_CHANNEL, t1_cache.INSTANCE_ID))
+    await asyncio.sleep(0)
+
+    rng = random.Random(args.seed)
+    weights = 1 / np.arange(1, len(hot) + 1) ** args.zipf_s
+    stream = rng.choices(hot, weights=weights, k=args.requests)
+    latencies = {}
+    before = redis.commands
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for prompt in stream:
+            result = (await client.post("/process-prompt/", json={"prompt": prompt})).json()
+            tier = {0: "l0_hit", 1: "t1_hit", 2: "t2_hit"}.get(result["cache_tier"], "llm_miss")
+            latencies.setdefault(tier, []).append(result["latency"] * 1000)
+    listener.cancel()
+    return latencies, (redis.commands - before) / len(stream)
+
+
+async def staleness_run(args, subscribed):
+    redis = FakeRedis()
+    worker_b = L0Cache(t1_cache.make_key, fallback_ttl=args.fallback_ttl)
+    listener = None
+    if subscribed:
+        listener = asyncio.create_task(listen_for_invalidations(
+            redis, worker_b, t1_cache.T1_INVALIDATION_CHANNEL, "worker-b"))
+        await asyncio.sleep(0)
+    rng = random.Random(args.seed)
+    stale = 0
+    for update in range(args.updates):
+        prompt = hot_prompt(update % 10)
+        worker_b.put(prompt, f"answer {update}")
+        # Worker A rewrites the entry; t1_cache.store announces it.
+        await t1_cache.store(redis, prompt, f"answer {update + 1}")
+        await asyncio.sleep(rng.uniform(0, 2 * args.fallback_ttl))
+        stale += worker_b.get(prompt) == f"answer {update}"
+    if listener:
+        listener.cancel()
+    return stale
+
+
+async def run(args):
+    llm_provider.EMBEDDING_MODEL = RandomProjectionEncoder()
+    llm_provider.GEMINI_MODEL = FakeLLM(0.0)
+
+    print(f"{args.requests} requests over {args.hot} Tier-1 prompts (Zipf s={args.zipf_s}), "
+          f"Redis round trip {args.redis_rtt_ms} ms")
+    print(f"{'L0 entries':>10} {'tier':>8} {'count':>6} {'p50 ms':>8} {'p99 ms':>8} {'redis cmds/req':>15}")
+    for l0_entries in (0, args.l0_entries):
+        latencies, commands = await latency_run(args, l0_entries)
+        for tier, values in sorted(latencies.items()):
+            print(f"{l0_entries:>10} {tier:>8} {len(values):>6} {np.percentile(values, 50):>8.3f} "
+                  f"{np.percentile(values, 99):>8.3f} {commands:>15.2f}")
+    print(f"server-side tier counts: { {t: v['requests'] for t, v in metrics_manager.get_metrics()['tiers'].items()} }")
+
+    print(f"\nStale L0 reads after {args.updates} cross-worker rewrites "
+          f"(reads 0-{2 * args.fallback_ttl:.2f}s later, fallback TTL {args.fallback_ttl}s)")
+    for subscribed in (True, False):
+        stale = await staleness_run(args, subscribed)
+        label = "subscribed" if subscribed else "subscription down"
+        print(f"{label:>18}: {stale}/{args.updates} stale")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--hot", type=int, default=2000, help="Prompts pre-loaded into Tier 1.")
+    parser.add_argument("--zipf-s", type=float, default=1.1)
+    parser.add_argument("--l0-entries", type=int, default=512)
+    parser.add_argument("--redis-rtt-ms", type=float, default=0.5)
+    parser.add_argument("--updates", type=int, default=40)
+    parser.add_argument("--fallback-ttl", type=float, default=0.1, help="L0 fallback TTL for the staleness run.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # The per-request DEBUG lines would dominate the timings.
+    _print = builtins.print
+    builtins.print = lambda *a, **k: None if a and str(a[0]).startswith("DEBUG") else _print(*a, **k)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main_cli()
\ No newline at end of file
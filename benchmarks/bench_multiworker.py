@@ -0,0 +1,150 @@
+"""
+RSS and Tier-2 hit rate against worker count, with and without the shared
+cache server.
+
+For each worker count, that many worker processes replay one Zipf-skewed
+stream of paraphrased prompts, dealt to them at random the way a load
+balancer would. In "per-worker" mode every process loads its own embedding
+model and builds its own index (plain `uvicorn --workers N`); in "shared"
+mode the workers embed and search through one api.cache_server process.
+Each lookup that misses inserts the prompt, as an LLM fill would. Reports
+the T2 hit rate, the summed RSS of all processes (workers plus server) and
+the lookup latency.
+
+Uses EMBEDDING_BACKEND and SEMANTIC_INDEX_BACKEND from the environment;
+the default encoder is the random-projection stub (a ~16 MB "model"), so
+pass --encoder bge-large to see the real per-process model cost.
+
+    python -m benchmarks.bench_multiworker --workers 1 2 4 8 --requests 4000 --encoder bge-large
+"""
+import argparse
+import builtins
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import numpy as np
+
+import benchmarks.fakes  # noqa: F401  (registers the random-projection backend)
+
+
+def base_prompt(i):
+    return f"frequently asked question number {i} about topic {i % 7} and detail {i % 11}"
+
+
+def rss_mb(pid="self"):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_worker(env, prompts, conn):
+    os.environ.update(env)
+    from api.services import cache_manager, llm_provider
+
+    llm_provider.load_embedding_model()
+    conn.send("ready")
+    conn.recv()
+    hits, latencies = 0, []
+    for prompt in prompts:
+        start = time.perf_counter()
+        result = cache_manager.find_in_semantic_cache(prompt)
+        latencies.append(time.perf_counter() - start)
+        if result:
+            hits += 1
+        else:
+            cache_manager.add_to_semantic_cache(prompt, f"A cacheable answer to: {prompt}")
+    conn.send({"hits": hits, "latencies": latencies, "rss_mb": rss_mb()})
+    conn.close()
+
+
+def run_server(env, socket_path):
+    os.environ.update(env)
+    from api import cache_server
+
+    cache_server.serve(socket_path)
+
+
+def run_mode(ctx, args, workers, shared, streams):
+    env = {"EMBEDDING_BACKEND": args.encoder, "CACHE_PERSIST_DIR": "",
+           "EMBED_BATCH_MAX_WAIT_MS": str(args.batch_wait_ms)}
+    server = None
+    if shared:
+        socket_path = os.path.join(tempfile.mkdtemp(), "cache.sock")
+        server = ctx.Process(target=run_server, args=(env, socket_path))
+        server.start()
+        env = {**env, "CACHE_SERVER_SOCKET": socket_path}
+
+    processes, pipes = [], []
+    for stream in streams:
+        parent_conn, child_conn = ctx.Pipe()
+        process = ctx.Process(target=run_worker, args=(env, stream, child_conn))
+        process.start()
+        processes.append(process)
+        pipes.append(parent_conn)
+    for conn in pipes:
+        conn.recv()
+    start = time.perf_counter()
+    for conn in pipes:
+        conn.send("go")
+    results = [conn.recv() for conn in pipes]
+    elapsed = time.perf_counter() - start
+    server_rss = rss_mb(server.pid) if server else 0.0
+    for process in processes:
+        process.join()
+    if server:
+        server.terminate()
+        server.join()
+
+    requests = sum(len(stream) for stream in streams)
+    latencies = np.concatenate([result["latencies"] for result in results]) * 1000
+    return {
+        "hit_rate": sum(result["hits"] for result in results) / requests,
+        "rss_mb": sum(result["rss_mb"] for result in results) + server_rss,
+        "server_rss_mb": server_rss,
+        "p50_ms": np.percentile(latencies, 50),
+        "p99_ms": np.percentile(latencies, 99),
+        "throughput": requests / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--prompts", type=int, default=500, help="Distinct underlying questions.")
+    parser.add_argument("--zipf-s", type=float, default=1.1)
+    parser.add_argument("--encoder", default="random-projection", help="EMBEDDING_BACKEND for every process.")
+    parser.add_argument("--batch-wait-ms", type=float, default=1.0, help="EMBED_BATCH_MAX_WAIT_MS.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    weights = 1 / np.arange(1, args.prompts + 1) ** args.zipf_s
+    families = rng.choices(range(args.prompts), weights=weights, k=args.requests)
+    # Every request is a new paraphrase: one extra word on its question.
+    stream = [f"{base_prompt(family)} v{rng.getrandbits(32):08x}" for family in families]
+
+    # The per-request DEBUG lines of every process would bury the table.
+    _print = builtins.print
+    builtins.print = lambda *a, **k: None if a and str(a[0]).startswith("DEBUG") else _print(*a, **k)
+    ctx = multiprocessing.get_context("fork")
+    print(f"{args.requests} requests over {args.prompts} questions (Zipf s={args.zipf_s}), encoder {args.encoder}, "
+          f"index {os.getenv('SEMANTIC_INDEX_BACKEND', 'chroma')}")
+    print(f"{'workers':>7} {'mode':>10} {'T2 hit rate':>11} {'total RSS MB':>12} {'server MB':>9} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'req/s':>7}")
+    for workers in args.workers:
+        assignment = [rng.randrange(workers) for _ in stream]
+        streams = [[prompt for prompt, worker in zip(stream, assignment) if worker == w] for w in range(workers)]
+        for shared in (False, True):
+            result = run_mode(ctx, args, workers, shared, streams)
+            print(f"{workers:>7} {'shared' if shared else 'per-worker':>10} {result['hit_rate']:>11.1%} "
+                  f"{result['rss_mb']:>12.0f} {result['server_rss_mb']:>9.0f} {result['p50_ms']:>7.2f} "
+                  f"{result['p99_ms']:>7.2f} {result['throughput']:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Recall, memory and latency of the quantized Tier-2 index backends.
+
+Builds the "int8" and "binary" QuantizedIndex backends over clustered
+synthetic embeddings and queries them with noisy copies of stored entries,
+the way paraphrased prompts hit the cache. For each rerank depth it
+reports recall@1 against exact float32 search, the bytes per entry kept in
+RAM and in the memory-mapped vector file, and the query latency.
+
+    python -m benchmarks.bench_quantized_index --entries 1000000 --dim 1024 --rerank-k 16 64 256 1024
+"""
+import argparse
+import gc
+import time
+import numpy as np
+
+from api.services.vector_index import create_index
+
+BUILD_CHUNK_ROWS = 50_000
+
+
+def generate(entries, dim, clusters, noise, queries, query_noise, seed):
+    """Yields (start, rows) chunks of normalized clustered vectors; fills `queries` along the way."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    sources = np.sort(rng.choice(entries, size=len(queries), replace=False))
+    for start in range(0, entries, BUILD_CHUNK_ROWS):
+        count = min(BUILD_CHUNK_ROWS, entries - start)
+        rows = centers[rng.integers(0, clusters, count)] + noise * rng.standard_normal((count, dim), dtype=np.float32)
+        rows /= np.linalg.norm(rows, axis=1, keepdims=True)
+        picked = sources[(sources >= start) & (sources < start + count)]
+        for i, row in enumerate(np.searchsorted(sources, picked)):
+            queries[row] = rows[picked[i] - start] + query_noise * rng.standard_normal(dim, dtype=np.float32) / np.sqrt(dim)
+        yield start, rows
+
+
+def build(backend, args, queries):
+    index = create_index(backend, rerank_k=max(args.rerank_k), vectors_dir=args.vectors_dir)
+    start_time = time.perf_counter()
+    for start, rows in generate(args.entries, args.dim, args.clusters, args.noise, queries, args.query_noise, args.seed):
+        ids = [str(i) for i in range(start, start + len(rows))]
+        index.add_batch(ids, rows, ids, ids, np.zeros(len(rows)))
+    return index, time.perf_counter() - start_time
+
+
+def exact_top1(index, queries):
+    """Exact float32 top-1 by scanning the index's memory-mapped vectors."""
+    normalized = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    best = np.full(len(queries), -np.inf, dtype=np.float32)
+    best_rows = np.zeros(len(queries), dtype=np.int64)
+    for start in range(0, index.count(), BUILD_CHUNK_ROWS):
+        scores = index._vectors[start:start + BUILD_CHUNK_ROWS] @ normalized.T
+        rows = scores.argmax(axis=0)
+        values = scores[rows, np.arange(len(queries))]
+        better = values > best
+        best[better], best_rows[better] = values[better], rows[better] + start
+    return [index._ids[row] for row in best_rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--backends", nargs="+", default=["binary", "int8"])
+    parser.add_argument("--rerank-k", type=int, nargs="+", default=[16, 64, 256, 1024])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--noise", type=float, default=0.15, help="Spread of entries around their cluster center.")
+    parser.add_argument("--query-noise", type=float, default=0.6,
+                        help="Paraphrase noise added to each query (0.6 is about cosine 0.86 to its source).")
+    parser.add_argument("--vectors-dir", default="", help="Where the float32 vectors are memory-mapped.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.entries} entries x {args.dim} dims, {args.queries} queries; "
+          f"float32 flat index would hold {args.dim * 4 + 8} bytes/entry in RAM")
+    print(f"{'backend':>8} {'rerank_k':>8} {'recall@1':>9} {'RAM B/entry':>12} {'mmap B/entry':>13} "
+          f"{'p50 ms':>8} {'p99 ms':>8}")
+    truth = None
+    for backend in args.backends:
+        queries = np.zeros((args.queries, args.dim), dtype=np.float32)
+        index, build_seconds = build(backend, args, queries)
+        if truth is None:
+            truth = exact_top1(index, queries)
+        usage = index.memory_usage()
+        for rerank_k in args.rerank_k:
+            index.rerank_k = rerank_k
+            index.search(queries[0], k=1)
+            latencies, hits = [], 0
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                result = index.search(query, k=1)
+                latencies.append(time.perf_counter() - start)
+                hits += result[0]["id"] == expected
+            latencies = np.array(latencies) * 1000
+            print(f"{backend:>8} {rerank_k:>8} {hits / len(queries):>9.3f} {usage['ram_bytes_per_entry']:>12} "
+                  f"{usage['mmap_bytes_per_entry']:>13} {np.percentile(latencies, 50):>8.1f} "
+                  f"{np.percentile(latencies, 99):>8.1f}")
+        print(f"{backend:>8} built in {build_seconds:.1f}s")
+        del index
+        gc.collect()
+
+
+if __name__ == "__main__":
+    main()
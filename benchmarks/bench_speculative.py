@@ -0,0 +1,135 @@
+"""
+Miss-path latency and wasted LLM calls with speculative LLM dispatch.
+
+A stream of paraphrased questions (T2 hits once their question is cached)
+and novel prompts (misses) is sent to /process-prompt/ with speculation off
+and on. Redis is disabled and the L0, T2 and embedding caches are reset
+between runs. The embedding model is the random-projection stub plus
+`--embed-ms` of sleep per encode call, standing in for bge-large on CPU,
+so the T2 lookup costs about what it does in production.
+
+Reports hit and miss latency, LLM calls made, wasted speculative calls (as
+a share of speculative calls and of all LLM calls) and the predictor's
+accuracy.
+
+    python -m benchmarks.bench_speculative --requests 400 --novel-ratio 0.2 0.5 0.8 --embed-ms 40 --llm-latency 1.5
+"""
+import argparse
+import asyncio
+import builtins
+import random
+import time
+import numpy as np
+import httpx
+
+from benchmarks.fakes import FakeLLM, RandomProjectionEncoder
+from api import main
+from api.services import cache_manager, llm_provider
+from api.services.cache_policy import create_policy
+from api.services.embedding_cache import EmbeddingCache
+from api.services.speculation import SpeculativeDispatcher
+from api.services.vector_index import create_index
+
+
+class SlowEncoder(RandomProjectionEncoder):
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def encode(self, texts, batch_size=None):
+        time.sleep(self.delay)
+        return super().encode(texts, batch_size)
+
+
+def base_prompt(i):
+    return f"frequently asked question number {i} about topic {i % 7} and detail {i % 11}"
+
+
+def build_workload(args, novel_ratio, rng):
+    # Novel prompts are random words: below the threshold of everything else.
+    return [" ".join(f"{rng.getrandbits(32):08x}" for _ in range(8)) if rng.random() < novel_ratio
+            else f"{base_prompt(rng.randrange(args.questions))} v{rng.getrandbits(32):08x}"
+            for _ in range(args.requests)]
+
+
+async def run_mode(args, client, llm, workload, speculative):
+    cache_manager.flush_writes()
+    cache_manager.index = create_index("numpy")
+    cache_manager.policy = create_policy(cache_manager.CACHE_EVICTION_POLICY, cache_manager.CACHE_ADMISSION_POLICY,
+                                         capacity=cache_manager.CACHE_MAX_SIZE,
+                                         window_fraction=cache_manager.CACHE_TINYLFU_WINDOW)
+    llm_provider.embedding_cache = EmbeddingCache(max_entries=llm_provider.EMBEDDING_CACHE_SIZE)
+    main.l0_cache.clear()
+    main.speculator = SpeculativeDispatcher(enabled=speculative, min_miss_probability=args.min_miss_probability,
+                                            max_waste_ratio=args.max_waste_ratio, burst=args.burst)
+    hot = [base_prompt(i) for i in range(args.questions)]
+    cache_manager.add_to_semantic_cache_batch(hot, [f"A helpful, cacheable answer to: {p}" for p in hot])
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = {True: [], False: []}
+
+    async def one(prompt):
+        async with semaphore:
+            start = time.perf_counter()
+            result = (await client.post("/process-prompt/", json={"prompt": prompt})).json()
+            latencies[result["from_cache"]].append((time.perf_counter() - start) * 1000)
+
+    calls = llm.calls
+    await asyncio.gather(*(one(prompt) for prompt in workload))
+    return latencies, llm.calls - calls, main.speculator.get_stats()
+
+
+async def run(args):
+    llm = FakeLLM(args.llm_latency, jitter=args.llm_jitter)
+    llm_provider.GEMINI_MODEL = llm
+    llm_provider.EMBEDDING_MODEL = SlowEncoder(args.embed_ms / 1000)
+    llm_provider._llm_semaphore = asyncio.Semaphore(args.llm_concurrency)
+    main.redis_client = None
+
+    print(f"{args.requests} requests at concurrency {args.concurrency}, LLM {args.llm_latency}s "
+          f"(+{args.llm_jitter}s jitter), embedding {args.embed_ms} ms")
+    print(f"{'novel':>6} {'mode':>11} {'hit p50':>8} {'miss p50':>9} {'miss p95':>9} {'LLM calls':>9} "
+          f"{'wasted':>6} {'of spec.':>8} {'of calls':>8} {'accuracy':>8}")
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for novel_ratio in args.novel_ratio:
+            workload = build_workload(args, novel_ratio, random.Random(args.seed))
+            baseline = None
+            for speculative in (False, True):
+                latencies, calls, stats = await run_mode(args, client, llm, workload, speculative)
+                hits, misses = np.array(latencies[True]), np.array(latencies[False])
+                miss_p50 = np.percentile(misses, 50) if len(misses) else 0.0
+                baseline = baseline or miss_p50
+                change = f"({(miss_p50 - baseline) / baseline:+.1%})" if speculative and baseline else ""
+                made = stats["used"] + stats["wasted"]
+                accuracy = f"{stats['predictor_accuracy']:.1%}" if stats["predictor_accuracy"] is not None else "-"
+                print(f"{novel_ratio:>6.0%} {'speculative' if speculative else 'sequential':>11} "
+                      f"{np.percentile(hits, 50) if len(hits) else 0:>8.1f} {miss_p50:>9.1f} "
+                      f"{np.percentile(misses, 95) if len(misses) else 0:>9.1f} {calls:>9} {stats['wasted']:>6} "
+                      f"{stats['wasted'] / made if made else 0:>8.1%} {stats['wasted'] / calls if calls else 0:>8.1%} "
+                      f"{accuracy:>8} {change}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--questions", type=int, default=200, help="Distinct cached questions.")
+    parser.add_argument("--novel-ratio", type=float, nargs="+", default=[0.2, 0.5, 0.8])
+    parser.add_argument("--llm-latency", type=float, default=1.5, help="Mocked LLM latency in seconds.")
+    parser.add_argument("--llm-jitter", type=float, default=0.5)
+    parser.add_argument("--llm-concurrency", type=int, default=64, help="LLM_MAX_CONCURRENCY.")
+    parser.add_argument("--embed-ms", type=float, default=40.0, help="Sleep per encode call.")
+    parser.add_argument("--min-miss-probability", type=float, default=main.SPECULATIVE_MIN_MISS_PROBABILITY)
+    parser.add_argument("--max-waste-ratio", type=float, default=main.SPECULATIVE_MAX_WASTE_RATIO)
+    parser.add_argument("--burst", type=float, default=main.SPECULATIVE_WASTE_BURST)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # The per-request DEBUG lines would bury the table.
+    _print = builtins.print
+    builtins.print = lambda *a, **k: None if a and str(a[0]).startswith("DEBUG") else _print(*a, **k)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main_cli()
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+Offline, stage-by-stage timing of the `process_prompt` pipeline.
+
+Gemini, Redis and the embedding model are replaced by the stand-ins in
+benchmarks/fakes.py, so this runs on any Linux box without network access or
+API keys. For each index backend and cache size it times:
+
+    t1_get / t1_set         Tier-1 lookup and write (in-process Redis stand-in)
+    embedding               get_embedding on a new prompt (random-projection stub)
+    embedding_memo          get_embedding on a prompt that was just embedded
+    index_search            top-1 search (collection.query on Chroma)
+    index_touch             last-access update (collection.update on Chroma)
+    enforce_size_limit      _enforce_size_limit on a full cache (one batch eviction)
+    add_to_semantic_cache   insert into a full cache, amortized over evictions
+    llm_call                the fake LLM, as a sanity check on the harness
+
+    python -m benchmarks.bench_stages --sizes 100 1000 10000 100000 --backends numpy chroma
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import time
+import numpy as np
+
+from benchmarks.fakes import FakeLLM, FakeRedis, RandomProjectionEncoder
+
+os.environ.setdefault("EMBEDDING_BACKEND", "random-projection")
+os.environ.setdefault("SEMANTIC_INDEX_BACKEND", "numpy")
+
+from api.services import cache_manager, llm_provider
+from api.services.cache_policy import create_policy
+from api.services.vector_index import create_index
+
+
+def timed(fn, repeats):
+    samples = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return np.array(samples) * 1e6
+
+
+def reset_cache(backend, size, encoder):
+    """Replaces cache_manager's index and policy with a full cache of `size` entries."""
+    cache_manager.index = create_index(backend)
+    cache_manager.policy = create_policy(cache_manager.CACHE_EVICTION_POLICY, cache_manager.CACHE_ADMISSION_POLICY,
+                                         capacity=size, window_fraction=cache_manager.CACHE_TINYLFU_WINDOW)
+    cache_manager.CACHE_MAX_SIZE = size
+    cache_manager.CACHE_LOW_WATER_MARK = int(size * 0.9)
+    fill(size, encoder, first_id=0)
+    return size
+
+
+def fill(count, encoder, first_id):
+    ids = [str(first_id + i) for i in range(count)]
+    prompts = [f"cached prompt number {doc_id} about topic {int(doc_id) % 97}" for doc_id in ids]
+    vectors = np.concatenate([encoder.encode(prompts[i:i + 4096]) for i in range(0, count, 4096)])
+    cache_manager.index.add_batch(ids, vectors, prompts, [f"response {doc_id}" for doc_id in ids],
+                                  np.full(count, time.time()))
+    cache_manager.policy.record_inserts(ids)
+
+
+def run_size(backend, size, repeats, encoder, llm):
+    results = {}
+    next_id = reset_cache(backend, size, encoder)
+    redis = FakeRedis()
+    loop = asyncio.new_event_loop()
+    keys = [f"prompt {i}" for i in range(repeats)]
+    results["t1_set"] = timed(lambda i: loop.run_until_complete(redis.set(keys[i], "response")), repeats)
+    results["t1_get"] = timed(lambda i: loop.run_until_complete(redis.get(keys[i])), repeats)
+
+    llm_provider.embedding_cache._entries.clear()
+    fresh = [f"brand new question {size} {i}" for i in range(repeats)]
+    results["embedding"] = timed(lambda i: llm_provider.get_embedding(fresh[i]), repeats)
+    results["embedding_memo"] = timed(lambda i: llm_provider.get_embedding(fresh[i]), repeats)
+
+    queries = [llm_provider.get_embedding(q) for q in fresh]
+    index = cache_manager.index
+    results["index_search"] = timed(lambda i: index.search(queries[i], k=1), repeats)
+    results["index_touch"] = timed(lambda i: index.touch(str(i % size), time.time()), repeats)
+
+    evictions = max(1, repeats // 10)
+    samples = []
+    for _ in range(evictions):
+        missing = size - len(cache_manager.policy)
+        if missing:
+            fill(missing, encoder, first_id=next_id)
+            next_id += missing
+        start = time.perf_counter()
+        cache_manager._enforce_size_limit()
+        samples.append(time.perf_counter() - start)
+    results["enforce_size_limit"] = np.array(samples) * 1e6
+
+    inserts = [f"inserted question {size} {i}" for i in range(repeats)]
+    results["add_to_semantic_cache"] = timed(
+        lambda i: cache_manager.add_to_semantic_cache(inserts[i], f"answer {i}"), repeats)
+
+    llm_repeats = min(repeats, 20)
+    results["llm_call"] = timed(lambda i: llm.generate_content(f"question {i}"), llm_repeats)
+    loop.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000])
+    parser.add_argument("--backends", nargs="+", default=["numpy", "chroma"])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Fake LLM latency in seconds.")
+    parser.add_argument("--output", help="Optional JSON file for the raw percentiles.")
+    args = parser.parse_args()
+
+    encoder = RandomProjectionEncoder(dim=args.dim)
+    llm_provider.EMBEDDING_MODEL = encoder
+    llm = FakeLLM(latency=args.llm_latency)
+
+    report = []
+    print(f"{'backend':>8} {'entries':>8} {'stage':>22} {'p50 us':>10} {'p99 us':>10} {'mean us':>10}")
+    for backend in args.backends:
+        try:
+            create_index(backend)
+        except ImportError as e:
+            print(f"Skipping the {backend} backend: {e}")
+            continue
+        for size in args.sizes:
+            # cache_manager prints a DEBUG line per operation; keep it out of the timings' output.
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                results = run_size(backend, size, args.repeats, encoder, llm)
+            for stage, samples in results.items():
+                row = {"backend": backend, "entries": size, "stage": stage,
+                       "p50_us": float(np.percentile(samples, 50)), "p99_us": float(np.percentile(samples, 99)),
+                       "mean_us": float(samples.mean())}
+                report.append(row)
+                print(f"{backend:>8} {size:>8} {stage:>22} {row['p50_us']:>10.1f} "
+                      f"{row['p99_us']:>10.1f} {row['mean_us']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
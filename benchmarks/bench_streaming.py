@@ -0,0 +1,101 @@
+"""
+Time to first byte of /process-prompt/ vs /process-prompt/stream.
+
+Runs the API under uvicorn in this process (an in-memory ASGI transport
+would buffer the whole body) with the streaming FakeLLM, a FakeRedis and the
+random-projection embedding stub, then times each endpoint on cache misses
+and on Tier-1/Tier-2 hits: time to the first response byte, to the first
+text chunk (streaming only) and to the end of the response.
+
+    python -m benchmarks.bench_streaming --requests 20 --llm-latency 2 --first-chunk-latency 0.2
+"""
+import argparse
+import asyncio
+import builtins
+import socket
+import threading
+import time
+import numpy as np
+import httpx
+import uvicorn
+
+from benchmarks.fakes import FakeLLM, FakeRedis, RandomProjectionEncoder
+from api import main
+from api.services import llm_provider
+
+
+def start_server():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def timed_request(client, path, prompt):
+    """Returns (first byte, first text chunk, complete) in seconds."""
+    start = time.perf_counter()
+    first_byte = first_chunk = None
+    async with client.stream("POST", path, json={"prompt": prompt}) as response:
+        async for line in response.aiter_lines():
+            now = time.perf_counter() - start
+            first_byte = first_byte if first_byte is not None else now
+            if first_chunk is None and (line.startswith("event: chunk") or line.startswith("{")):
+                first_chunk = now
+    return first_byte, first_chunk, time.perf_counter() - start
+
+
+async def run(args, base_url):
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        for path in ("/process-prompt/", "/process-prompt/stream"):
+            # Every word is tagged so the two endpoints never hit each other's entries.
+            tag = "s" if path.endswith("stream") else "b"
+            misses = [" ".join(f"{tag}{word}" for word in f"miss {i} about the topic number {i}".split())
+                      for i in range(args.requests)]
+            for kind, prompts in (("miss", misses), ("t1_hit", misses),
+                                  ("t2_hit", [f"{prompt} please" for prompt in misses])):
+                samples = []
+                for i in range(0, len(prompts), args.concurrency):
+                    samples += await asyncio.gather(*(timed_request(client, path, prompt)
+                                                      for prompt in prompts[i:i + args.concurrency]))
+                    # Let the background cache writes of streamed misses land.
+                    await asyncio.sleep(0.05)
+                results[(path, kind)] = np.array([[np.nan if v is None else v for v in s] for s in samples])
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="Total fake LLM latency in seconds.")
+    parser.add_argument("--first-chunk-latency", type=float, default=0.2)
+    parser.add_argument("--response-words", type=int, default=120)
+    args = parser.parse_args()
+
+    llm_provider.EMBEDDING_MODEL = RandomProjectionEncoder()
+    llm_provider.GEMINI_MODEL = FakeLLM(args.llm_latency, response_words=args.response_words,
+                                        first_chunk_latency=args.first_chunk_latency)
+    main.redis_client = FakeRedis()
+    _print = builtins.print
+    builtins.print = lambda *a, **k: None if a and str(a[0]).startswith("DEBUG") else _print(*a, **k)
+
+    server, base_url = start_server()
+    try:
+        results = asyncio.run(run(args, base_url))
+    finally:
+        server.should_exit = True
+
+    print(f"LLM latency {args.llm_latency * 1000:.0f} ms, first chunk after {args.first_chunk_latency * 1000:.0f} ms")
+    print(f"{'endpoint':>24} {'requests':>8} {'first byte p50':>15} {'first text p50':>15} {'complete p50':>13} (ms)")
+    for (path, kind), samples in results.items():
+        first_byte, first_chunk, complete = np.nanpercentile(samples, 50, axis=0) * 1000
+        print(f"{path:>24} {kind:>8} {first_byte:15.1f} {first_chunk:15.1f} {complete:13.1f}")
+
+
+if __name__ == "__main__":
+    main_cli()
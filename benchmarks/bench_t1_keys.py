@@ -0,0 +1,164 @@
+"""
+Reports what canonicalized, hashed and compressed T1 keys buy.
+
+Hit rate: a Zipf-skewed stream of prompts, each asked with random surface
+variations (case, spacing, trailing punctuation, full-width and curly
+Unicode characters), is replayed against an unbounded T1 keyed by the raw
+prompt and by t1_cache.make_key, with each canonicalization step on its own
+and all of them together.
+
+Memory: raw prompt/response pairs are compared with hashed keys and encoded
+values. Without --redis-url the per-entry Redis footprint is estimated from
+Redis' allocation layout; with it, keys are written to that server and
+measured with MEMORY USAGE (then deleted).
+
+    python -m benchmarks.bench_t1_keys --requests 20000 --prompts 2000 --response-words 40 200 800
+"""
+import argparse
+import asyncio
+import random
+import numpy as np
+
+from api.services import t1_cache
+
+WORDS = (
+    "the of and to in is that for it as was with be by on not he this are or his from at which but have an "
+    "they you were her she there been one all we their has would when if so no what can more about model data "
+    "learning cache query latency memory index vector search result answer question system time first new "
+    "because use used using example different between each other such many these may most only over very "
+    "make like into than then them some could two also after where how out up our way well even back any"
+).split()
+QUESTIONS = ("what is", "how does", "why is", "explain", "can you describe", "what are the benefits of")
+TOPICS = ("machine learning", "a vector database", "semantic caching", "the eiffel tower", "redis eviction",
+          "gradient descent", "the capital of france", "tcp slow start", "an lru cache", "python generators")
+
+
+def base_prompts(rng, count):
+    return [f"{rng.choice(QUESTIONS)} {rng.choice(TOPICS)} {' '.join(rng.choices(WORDS, k=4))}"
+            for _ in range(count)]
+
+
+def vary(rng, prompt):
+    """Re-types a prompt the way different users would."""
+    if rng.random() < 0.4:
+        prompt = rng.choice((str.capitalize, str.upper, str.title))(prompt)
+    if rng.random() < 0.3:
+        prompt = prompt.replace(" ", rng.choice(("  ", "  ", "\t")), 1)
+    if rng.random() < 0.5:
+        prompt += rng.choice(("?", " ?", "??", "!", "."))
+    if rng.random() < 0.1:
+        # Full-width letters, as typed with some CJK input methods.
+        prompt = "".join(chr(ord(c) + 0xFEE0) if "a" <= c <= "z" and rng.random() < 0.3 else c for c in prompt)
+    if rng.random() < 0.1:
+        prompt = prompt.replace("'", "’")
+    return prompt
+
+
+def hit_rate(stream, key_fn):
+    seen, hits = set(), 0
+    for prompt in stream:
+        key = key_fn(prompt)
+        hits += key in seen
+        seen.add(key)
+    return hits / len(stream)
+
+
+def with_steps(steps):
+    def key_fn(prompt):
+        for step in steps:
+            prompt = t1_cache.CANONICALIZATION_STEPS[step](prompt)
+        return prompt
+    return key_fn
+
+
+# --- Redis Memory Estimate ---
+# jemalloc size classes up to 4 KiB; larger allocations round to 4 KiB pages.
+_SIZE_CLASSES = [8, 16, 32, 48, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384, 448, 512,
+                 640, 768, 896, 1024, 1280, 1536, 1792, 2048, 2560, 3072, 3584, 4096]
+
+def _alloc(size):
+    for size_class in _SIZE_CLASSES:
+        if size <= size_class:
+            return size_class
+    return -(-size // 4096) * 4096
+
+def _sds(length):
+    header = 3 if length < 256 else 5 if length < 65536 else 9
+    return _alloc(header + length + 1)
+
+def estimate_redis_bytes(key_len, value_len, ttl):
+    """dictEntry + key sds + value object (embedded up to 44 bytes) + expires entry."""
+    value = _alloc(16 + 3 + value_len + 1) if value_len <= 44 else _alloc(16) + _sds(value_len)
+    return _alloc(24) + _sds(key_len) + value + (_alloc(24) if ttl else 0)
+
+
+async def measure_redis(url, pairs):
+    import redis.asyncio as aioredis
+
+    client = aioredis.Redis.from_url(url, decode_responses=False)
+    results = {}
+    for name, entries in pairs.items():
+        usages = []
+        for key, value in entries:
+            # Only the new layout sets a TTL, which costs an expires-dict entry.
+            await client.set(key, value, ex=(t1_cache.T1_TTL_SECONDS or None) if name == "new" else None)
+            usages.append(await client.memory_usage(key))
+        await client.delete(*[key for key, _ in entries])
+        results[name] = float(np.mean(usages))
+    await client.aclose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--prompts", type=int, default=2000, help="Distinct underlying questions.")
+    parser.add_argument("--zipf-s", type=float, default=1.1)
+    parser.add_argument("--response-words", type=int, nargs="+", default=[40, 200, 800])
+    parser.add_argument("--samples", type=int, default=200, help="Entries per memory measurement.")
+    parser.add_argument("--redis-url", help="Measure with MEMORY USAGE on this Redis instead of estimating.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    prompts = base_prompts(rng, args.prompts)
+    weights = 1 / np.arange(1, len(prompts) + 1) ** args.zipf_s
+    stream = [vary(rng, prompt) for prompt in rng.choices(prompts, weights=weights, k=args.requests)]
+
+    print(f"T1 hit rate over {args.requests} requests for {args.prompts} distinct questions "
+          f"(upper bound without variations: {hit_rate(rng.choices(prompts, weights=weights, k=args.requests), str):.1%})")
+    raw = hit_rate(stream, str)
+    print(f"{'raw prompt':>32}: {raw:6.1%}")
+    for step in t1_cache.CANONICALIZATION_STEPS:
+        rate = hit_rate(stream, with_steps([step]))
+        print(f"{'+ ' + step + ' only':>32}: {rate:6.1%} ({rate - raw:+.1%})")
+    rate = hit_rate(stream, t1_cache.make_key)
+    print(f"{'make_key (T1_CANONICALIZE)':>32}: {rate:6.1%} ({rate - raw:+.1%})")
+
+    print(f"\nMemory per entry (T1_COMPRESS_MIN_BYTES={t1_cache.T1_COMPRESS_MIN_BYTES}, "
+          f"T1_TTL_SECONDS={t1_cache.T1_TTL_SECONDS})")
+    print(f"{'response words':>15} {'raw key+value':>14} {'hashed+encoded':>15} {'raw in Redis':>13} "
+          f"{'hashed in Redis':>16} {'saved':>7}")
+    for words in args.response_words:
+        samples = [(prompt, " ".join(rng.choices(WORDS, k=words)).capitalize() + ".")
+                   for prompt in rng.sample(stream, min(args.samples, len(stream)))]
+        raw_pairs = [(prompt.encode(), response.encode()) for prompt, response in samples]
+        new_pairs = [(t1_cache.make_key(prompt).encode(), t1_cache.encode_value(response))
+                     for prompt, response in samples]
+        raw_payload = np.mean([len(k) + len(v) for k, v in raw_pairs])
+        new_payload = np.mean([len(k) + len(v) for k, v in new_pairs])
+        if args.redis_url:
+            measured = asyncio.run(measure_redis(args.redis_url, {"raw": raw_pairs, "new": new_pairs}))
+            raw_redis, new_redis = measured["raw"], measured["new"]
+        else:
+            raw_redis = np.mean([estimate_redis_bytes(len(k), len(v), ttl=False) for k, v in raw_pairs])
+            new_redis = np.mean([estimate_redis_bytes(len(k), len(v), ttl=t1_cache.T1_TTL_SECONDS)
+                                 for k, v in new_pairs])
+        print(f"{words:>15} {raw_payload:>14.0f} {new_payload:>15.0f} {raw_redis:>13.0f} "
+              f"{new_redis:>16.0f} {1 - new_redis / raw_redis:>7.1%}")
+    if not args.redis_url:
+        print("(Redis columns are estimates; pass --redis-url to measure with MEMORY USAGE.)")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Compares the Tier-2 lookup path of the ChromaDB and NumPy index backends.
+
+Each timed lookup is what `find_in_semantic_cache` does on a hit:
+count(), a top-1 search and a touch() of the matched entry.
+
+    python -m benchmarks.bench_vector_index --sizes 1000 10000 100000
+"""
+import argparse
+import time
+import numpy as np
+
+from api.services.vector_index import create_index
+
+def random_unit_vectors(rng, n, dim):
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def populate(index, vectors):
+    now = time.time()
+    ids = [str(i) for i in range(len(vectors))]
+    index.add_batch(ids, vectors, [f"prompt {i}" for i in ids], [f"response {i}" for i in ids],
+                    np.full(len(vectors), now))
+
+def time_lookups(index, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        if index.count():
+            hits = index.search(query, k=1)
+            index.touch(hits[0]["id"], time.time())
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+def time_adds(index, vectors, first_id):
+    start = time.perf_counter()
+    for i, vector in enumerate(vectors):
+        index.add(str(first_id + i), vector, "prompt", "response", time.time())
+    return (time.perf_counter() - start) / len(vectors) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy"])
+    parser.add_argument("--dim", type=int, default=1024, help="Embedding dimension (bge-large is 1024).")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'backend':>8} {'entries':>8} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'add ms':>9}")
+    for size in args.sizes:
+        vectors = random_unit_vectors(rng, size, args.dim)
+        # Queries are perturbed copies of stored vectors, like paraphrased prompts.
+        picks = rng.integers(0, size, args.queries)
+        queries = vectors[picks] + 0.05 * random_unit_vectors(rng, args.queries, args.dim)
+        extra = random_unit_vectors(rng, 100, args.dim)
+        for backend in args.backends:
+            index = create_index(backend)
+            populate(index, vectors)
+            lookups = time_lookups(index, queries)
+            add_ms = time_adds(index, extra, size)
+            print(f"{backend:>8} {size:>8} {np.percentile(lookups, 50):>9.3f} "
+                  f"{np.percentile(lookups, 99):>9.3f} {lookups.mean():>9.3f} {add_ms:>9.3f}")
+
+if __name__ == "__main__":
+    main()
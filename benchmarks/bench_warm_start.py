@@ -0,0 +1,109 @@
+"""
+Measures how long the semantic cache takes to come back after a restart.
+
+For each size a NumPy index is filled with random entries, snapshotted via
+CachePersistence, and a few hundred more inserts/deletes are appended to the
+log. The timed part is what `cache_manager._restore_from_disk` does: load the
+snapshot (memory-mapped embeddings) and replay the log, bulk-load the index
+and rebuild the LRU order. No embedding model is involved.
+
+    python -m benchmarks.bench_warm_start --sizes 1000 10000 100000
+"""
+import argparse
+import shutil
+import tempfile
+import time
+import numpy as np
+
+from api.services.cache_policy import LRUPolicy
+from api.services.persistence import CachePersistence
+from api.services.vector_index import NumpyFlatIndex
+
+
+def build(directory, size, dim, log_ops, response_bytes, rng):
+    index = NumpyFlatIndex()
+    vectors = rng.standard_normal((size, dim)).astype(np.float32)
+    now = time.time()
+    index.add_batch(
+        [str(i) for i in range(size)], vectors,
+        [f"prompt {i}" for i in range(size)],
+        ["x" * response_bytes for _ in range(size)],
+        now - rng.random(size) * 3600,
+    )
+    persistence = CachePersistence(directory)
+
+    def export():
+        # Oldest first, as cache_manager._export_state writes it.
+        state = index.export()
+        order = np.argsort(state["timestamps"], kind="stable")
+        return {
+            "ids": [state["ids"][row] for row in order],
+            "embeddings": state["embeddings"][order],
+            "prompts": [state["prompts"][row] for row in order],
+            "responses": [state["responses"][row] for row in order],
+            "timestamps": state["timestamps"][order],
+            "expires_at": [None] * len(order),
+        }
+
+    start = time.perf_counter()
+    persistence.snapshot(export)
+    snapshot_time = time.perf_counter() - start
+
+    for i in range(log_ops):
+        persistence.log_add(str(size + i), rng.standard_normal(dim), "prompt", "x" * response_bytes, now)
+    persistence.log_delete([str(i) for i in range(log_ops // 2)])
+    persistence.close()
+    return snapshot_time
+
+
+def restore(directory):
+    timings = {}
+    start = time.perf_counter()
+    state = CachePersistence(directory).load()
+    timings["load"] = time.perf_counter() - start
+
+    # Mirrors cache_manager._restore_from_disk.
+    start = time.perf_counter()
+    order = np.argsort(state["timestamps"], kind="stable")
+    if np.array_equal(order, np.arange(len(order))):
+        rows, embeddings = range(len(order)), state["embeddings"]
+    else:
+        rows, embeddings = order.tolist(), state["embeddings"][order]
+    ids = [state["ids"][row] for row in rows]
+    index = NumpyFlatIndex()
+    index.add_batch(
+        ids, embeddings,
+        [state["prompts"][row] for row in rows], [state["responses"][row] for row in rows],
+        state["timestamps"][order],
+    )
+    LRUPolicy().record_inserts(ids)
+    timings["rebuild"] = time.perf_counter() - start
+    timings["entries"] = index.count()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--log-ops", type=int, default=500, help="Inserts appended to the log after the snapshot.")
+    parser.add_argument("--response-bytes", type=int, default=800)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'entries':>8} {'snapshot s':>11} {'load s':>8} {'rebuild s':>10} {'total s':>8} {'on-disk MB':>11}")
+    for size in args.sizes:
+        directory = tempfile.mkdtemp(prefix="semantic-cache-")
+        try:
+            snapshot_time = build(directory, size, args.dim, args.log_ops, args.response_bytes, rng)
+            disk = sum(f.stat().st_size for f in __import__("pathlib").Path(directory).iterdir()) / 1e6
+            timings = restore(directory)
+            print(f"{timings['entries']:>8} {snapshot_time:>11.3f} {timings['load']:>8.3f} "
+                  f"{timings['rebuild']:>10.3f} {timings['load'] + timings['rebuild']:>8.3f} {disk:>11.1f}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Request latency with T2 inserts and access-time updates written inline vs
+through the write-behind queue.
+
+A stream of paraphrased questions (T2 hits once their question is cached)
+and novel prompts (misses that insert) is sent to /process-prompt/ with
+Redis and L0 out of the way. The T2 index is the numpy backend behind a
+wrapper that sleeps `--store-ms` per store call plus `--store-entry-ms`
+per entry written, standing in for a Chroma upsert/update; lookups are not
+slowed down.
+
+Modes: inline (CACHE_WRITE_BEHIND off), write-behind with the configured
+queue size, and write-behind with a queue of `--small-queue` entries, so
+backpressure shows up. Reports hit and miss latency, store calls and
+entries written, backpressure waits, peak queue depth and how long the
+final flush took.
+
+    python -m benchmarks.bench_write_behind --requests 600 --store-ms 10 --store-entry-ms 0.5 --llm-latency 0.1
+"""
+import argparse
+import asyncio
+import builtins
+import random
+import time
+import numpy as np
+import httpx
+
+from benchmarks.fakes import FakeLLM, RandomProjectionEncoder
+from api import main
+from api.services import cache_manager, llm_provider
+from api.services.cache_policy import create_policy
+from api.services.embedding_cache import EmbeddingCache
+from api.services.vector_index import create_index
+from api.services.write_behind import WriteBehindQueue
+
+
+class SlowStoreIndex:
+    """Delegates to `index`, sleeping on every write like a remote store would."""
+
+    def __init__(self, index, call_delay: float, entry_delay: float):
+        self.index = index
+        self.call_delay = call_delay
+        self.entry_delay = entry_delay
+        self.calls = 0
+        self.entries = 0
+
+    def _write(self, entries: int):
+        self.calls += 1
+        self.entries += entries
+        time.sleep(self.call_delay + self.entry_delay * entries)
+
+    def add(self, doc_id, embedding, prompt, response, timestamp):
+        self._write(1)
+        self.index.add(doc_id, embedding, prompt, response, timestamp)
+
+    def add_batch(self, ids, embeddings, prompts, responses, timestamps):
+        self._write(len(ids))
+        self.index.add_batch(ids, embeddings, prompts, responses, timestamps)
+
+    def touch(self, doc_id, timestamp):
+        self._write(1)
+        self.index.touch(doc_id, timestamp)
+
+    def touch_batch(self, ids, timestamps):
+        self._write(len(ids))
+        self.index.touch_batch(ids, timestamps)
+
+    def __getattr__(self, name):
+        return getattr(self.index, name)
+
+
+def base_prompt(i):
+    return f"frequently asked question number {i} about topic {i % 7} and detail {i % 11}"
+
+
+def build_workload(args, rng):
+    # Novel prompts are random words: below the threshold of everything else.
+    return [" ".join(f"{rng.getrandbits(32):08x}" for _ in range(8)) if rng.random() < args.novel_ratio
+            else f"{base_prompt(rng.randrange(args.questions))} v{rng.getrandbits(32):08x}"
+            for _ in range(args.requests)]
+
+
+async def run_mode(args, client, workload, queue_size):
+    cache_manager.flush_writes()
+    store = SlowStoreIndex(create_index("numpy"), args.store_ms / 1000, args.store_entry_ms / 1000)
+    cache_manager.index = store
+    cache_manager.policy = create_policy(cache_manager.CACHE_EVICTION_POLICY, cache_manager.CACHE_ADMISSION_POLICY,
+                                         capacity=cache_manager.CACHE_MAX_SIZE,
+                                         window_fraction=cache_manager.CACHE_TINYLFU_WINDOW)
+    llm_provider.embedding_cache = EmbeddingCache(max_entries=llm_provider.EMBEDDING_CACHE_SIZE)
+    main.l0_cache.clear()
+    hot = [base_prompt(i) for i in range(args.questions)]
+    cache_manager.add_to_semantic_cache_batch(hot, [f"A helpful, cacheable answer to: {p}" for p in hot])
+    cache_manager.write_behind = WriteBehindQueue(
+        cache_manager._apply_queued_adds, cache_manager._apply_queued_touches, max_pending=queue_size,
+        max_batch=cache_manager.CACHE_WRITE_BATCH_SIZE, flush_interval=cache_manager.CACHE_WRITE_FLUSH_MS / 1000
+    ) if queue_size else None
+    calls, entries = store.calls, store.entries
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = {True: [], False: []}
+
+    async def one(prompt):
+        async with semaphore:
+            start = time.perf_counter()
+            result = (await client.post("/process-prompt/", json={"prompt": prompt})).json()
+            latencies[result["from_cache"]].append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(prompt) for prompt in workload))
+    elapsed = time.perf_counter() - start
+    flush_start = time.perf_counter()
+    cache_manager.flush_writes()
+    flush_ms = (time.perf_counter() - flush_start) * 1000
+    stats = cache_manager.write_behind.get_stats() if cache_manager.write_behind else {}
+    return latencies, store.calls - calls, store.entries - entries, elapsed, flush_ms, stats
+
+
+async def run(args):
+    llm_provider.GEMINI_MODEL = FakeLLM(args.llm_latency, jitter=args.llm_jitter)
+    llm_provider.EMBEDDING_MODEL = RandomProjectionEncoder()
+    llm_provider._llm_semaphore = asyncio.Semaphore(args.llm_concurrency)
+    main.redis_client = None
+
+    print(f"{args.requests} requests at concurrency {args.concurrency}, {args.novel_ratio:.0%} novel, "
+          f"LLM {args.llm_latency}s, store {args.store_ms} ms/call + {args.store_entry_ms} ms/entry")
+    print(f"{'mode':>16} {'hit p50':>8} {'hit p95':>8} {'miss p50':>9} {'miss p95':>9} {'req/s':>6} "
+          f"{'store calls':>11} {'entries':>7} {'waits':>5} {'depth':>5} {'flush ms':>8}")
+    workload = build_workload(args, random.Random(args.seed))
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, queue_size in (("inline", 0), ("write-behind", cache_manager.CACHE_WRITE_QUEUE_SIZE),
+                                 (f"write-behind q={args.small_queue}", args.small_queue)):
+            latencies, calls, entries, elapsed, flush_ms, stats = await run_mode(args, client, workload, queue_size)
+            hits, misses = np.array(latencies[True]), np.array(latencies[False])
+            pct = lambda values, q: np.percentile(values, q) if len(values) else 0.0
+            print(f"{name:>16} {pct(hits, 50):>8.1f} {pct(hits, 95):>8.1f} {pct(misses, 50):>9.1f} "
+                  f"{pct(misses, 95):>9.1f} {len(workload) / elapsed:>6.0f} {calls:>11} {entries:>7} "
+                  f"{stats.get('backpressure_waits', '-'):>5} {stats.get('max_depth', '-'):>5} {flush_ms:>8.1f}")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--questions", type=int, default=200, help="Distinct cached questions.")
+    parser.add_argument("--novel-ratio", type=float, default=0.5)
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="Mocked LLM latency in seconds.")
+    parser.add_argument("--llm-jitter", type=float, default=0.05)
+    parser.add_argument("--llm-concurrency", type=int, default=64, help="LLM_MAX_CONCURRENCY.")
+    parser.add_argument("--store-ms", type=float, default=10.0, help="Sleep per index write call.")
+    parser.add_argument("--store-entry-ms", type=float, default=0.5, help="Extra sleep per entry written.")
+    parser.add_argument("--small-queue", type=int, default=8, help="Queue size of the backpressure run.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    # The per-request DEBUG lines would bury the table.
+    _print = builtins.print
+    builtins.print = lambda *a, **k: None if a and str(a[0]).startswith("DEBUG") else _print(*a, **k)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main_cli()
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""
+Local stand-ins for the external services, so benchmarks run offline.
+
+- FakeLLM: deterministic replacement for GEMINI_MODEL with a configurable
+  latency; `generate_content_async(prompt, stream=True)` streams chunks
+- FakeRedis: in-process subset of the redis.asyncio client used by the API
+- RandomProjectionEncoder: cheap embedding stub, registered as the
+  "random-projection" embedding backend when this module is imported
+"""
+import asyncio
+import hashlib
+import re
+import time
+import zlib
+import numpy as np
+
+from api.services.embedding_backends import register_backend
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeLLM:
+    """
+    Stand-in for GEMINI_MODEL. Every prompt gets the same answer every time,
+    after `latency` seconds (plus up to `jitter` seconds, also deterministic).
+
+    When streaming, the first chunk of `chunk_words` words arrives after
+    `first_chunk_latency` seconds (default: a tenth of the total) and the
+    rest arrive evenly spread over the remaining latency.
+    """
+
+    def __init__(self, latency: float = 1.0, jitter: float = 0.0, response_words: int = 60,
+                 first_chunk_latency: float | None = None, chunk_words: int = 8):
+        self.latency = latency
+        self.jitter = jitter
+        self.response_words = response_words
+        self.first_chunk_latency = first_chunk_latency
+        self.chunk_words = max(1, chunk_words)
+        self.calls = 0
+
+    def _delay(self, prompt: str) -> float:
+        return self.latency + self.jitter * (zlib.crc32(prompt.encode()) % 1000) / 1000
+
+    def _text(self, prompt: str) -> str:
+        digest = hashlib.sha1(prompt.encode()).hexdigest()
+        return f"A helpful, cacheable answer to: {prompt} " + " ".join(
+            digest[i % len(digest):][:6] for i in range(self.response_words)
+        )
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        time.sleep(self._delay(prompt))
+        return _FakeResponse(self._text(prompt))
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.calls += 1
+        if stream:
+            return self._stream(prompt)
+        await asyncio.sleep(self._delay(prompt))
+        return _FakeResponse(self._text(prompt))
+
+    async def _stream(self, prompt):
+        words = self._text(prompt).split(" ")
+        chunks = [" ".join(words[i:i + self.chunk_words]) + (" " if i + self.chunk_words < len(words) else "")
+                  for i in range(0, len(words), self.chunk_words)]
+        total = self._delay(prompt)
+        first = min(total, self.first_chunk_latency if self.first_chunk_latency is not None else total / 10)
+        await asyncio.sleep(first)
+        yield _FakeResponse(chunks[0])
+        for chunk in chunks[1:]:
+            await asyncio.sleep((total - first) / (len(chunks) - 1))
+            yield _FakeResponse(chunk)
+
+
+class FakeRedis:
+    """
+    In-process stand-in for the parts of redis.asyncio.Redis the API uses.
+
+    Each command (an MGET or a whole pipeline counts as one) waits
+    `round_trip_ms` to model the network hop to a real server.
+    """
+
+    def __init__(self, round_trip_ms: float = 0.0):
+        self.round_trip = round_trip_ms / 1000
+        self.store = {}
+        self.expiry = {}
+        self.subscribers = {}
+        self.commands = 0
+
+    async def _round_trip(self):
+        self.commands += 1
+        if self.round_trip:
+            await asyncio.sleep(self.round_trip)
+
+    def _alive(self, key):
+        expires_at = self.expiry.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self.store.pop(key, None)
+            self.expiry.pop(key, None)
+        return key in self.store
+
+    def _get(self, key):
+        return self.store.get(key) if self._alive(key) else None
+
+    def _set(self, key, value, ex=None):
+        self.store[key] = value
+        if ex:
+            self.expiry[key] = time.time() + ex
+        else:
+            self.expiry.pop(key, None)
+        return True
+
+    def _mget(self, keys):
+        return [self._get(key) for key in keys]
+
+    def _delete(self, *keys):
+        removed = sum(1 for key in keys if self.store.pop(key, None) is not None)
+        for key in keys:
+            self.expiry.pop(key, None)
+        return removed
+
+    async def ping(self):
+        await self._round_trip()
+        return True
+
+    async def get(self, key):
+        await self._round_trip()
+        return self._get(key)
+
+    async def set(self, key, value, ex=None):
+        await self._round_trip()
+        return self._set(key, value, ex=ex)
+
+    async def mget(self, keys):
+        await self._round_trip()
+        return self._mget(keys)
+
+    async def delete(self, *keys):
+        await self._round_trip()
+        return self._delete(*keys)
+
+    def _publish(self, channel, message):
+        subscribers = self.subscribers.get(channel, ())
+        for queue in subscribers:
+            queue.put_nowait({"type": "message", "channel": channel, "data": message})
+        return len(subscribers)
+
+    async def publish(self, channel, message):
+        await self._round_trip()
+        return self._publish(channel, message)
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+    def pubsub(self):
+        return _FakePubSub(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        await self.redis._round_trip()
+        results = [getattr(self.redis, f"_{name}")(*args, **kwargs) for name, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _FakePubSub:
+    """Delivers FakeRedis publishes to this subscriber, in order, with no delay."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+        self.channels = []
+
+    async def subscribe(self, *channels):
+        for channel in channels:
+            self.redis.subscribers.setdefault(channel, []).append(self.queue)
+            self.channels.append(channel)
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+    async def aclose(self):
+        for channel in self.channels:
+            self.redis.subscribers[channel].remove(self.queue)
+        self.channels = []
+
+
+class RandomProjectionEncoder:
+    """
+    Embedding stub: hashed bag of words projected through a fixed random
+    matrix. Prompts that share words get similar vectors, so T2 hits still
+    happen, at a tiny fraction of a transformer's cost.
+    """
+
+    def __init__(self, dim: int = 1024, buckets: int = 4096, seed: int = 0):
+        self.dim = dim
+        self.buckets = buckets
+        self.projection = np.random.default_rng(seed).standard_normal((buckets, dim)).astype(np.float32)
+
+    def encode(self, texts, batch_size=None):
+        counts = np.zeros((len(texts), self.buckets), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                counts[row, zlib.crc32(word.encode()) % self.buckets] += 1
+        vectors = counts @ self.projection
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+
+register_backend("random-projection", lambda threads: RandomProjectionEncoder())
@@ -0,0 +1,248 @@
+"""
+Replays a recorded request trace through alternative semantic cache
+configurations.
+
+Record a trace by running the API with TRACE_FILE set (see api/main.py),
+then sweep thresholds, Tier-2 sizes and eviction/admission policies:
+
+    python -m benchmarks.replay_trace trace.jsonl --threshold 0.75 0.8 0.85 --capacity 1000 5000 \\
+        --policy lru/always gdsf/tinylfu
+
+Each event goes through an exact-match tier (T1, unbounded, like Redis
+with headroom; --no-exact to disable) and then the Tier-2 cache, simulated
+with the policies of api/services/cache_policy.py and batch eviction to the
+low-water mark. Similarities are computed a block of events at a time:
+one matrix product against the cached embeddings plus one within the block,
+so a sweep over millions of events takes minutes. TTLs and coalescing are
+not simulated.
+
+Latency and cost are estimated from the trace itself: hits cost the median
+recorded latency of their tier, misses the median recorded lookup overhead
+plus the LLM latency recorded for that prompt (or the mean LLM latency), and
+each LLM call costs --cost-per-1k-chars per thousand prompt and response
+characters.
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+
+from api.services import metrics_manager
+from api.services.cache_policy import create_policy
+
+EXACT_TIERS = ("l0_hit", "t1_hit")
+# cache_manager's defaults (not imported: it builds an index and loads the LLM client).
+DEFAULT_THRESHOLD = 0.80
+DEFAULT_CAPACITY = 1000
+LOW_WATER_FRACTION = 0.9
+
+
+def load_trace(path):
+    """Returns the trace as parallel arrays plus its embedding matrix, normalized to unit rows."""
+    prompt_ids, rows, sizes, chars, llm_latency, cacheable = [], [], [], [], [], []
+    tiers, latencies, lookup = [], [], []
+    ids = {}
+    dim = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-write.
+                break
+            prompt = event["prompt"]
+            prompt_ids.append(ids.setdefault(prompt, len(ids)))
+            rows.append(event.get("emb", -1))
+            dim = dim or event.get("dim")
+            sizes.append(event.get("chars", 0))
+            chars.append(sizes[-1] + len(prompt))
+            stages = event.get("stages", {})
+            # A coalesced request only waited on part of someone else's call.
+            called = event["tier"] == "llm_miss" and not event.get("coalesced")
+            llm_latency.append(stages.get("llm", np.nan) if called else np.nan)
+            cacheable.append(event.get("cacheable", True))
+            tiers.append(event["tier"])
+            latencies.append(event["latency"])
+            lookup.append(event["latency"] - stages.get("llm", 0.0) - stages.get("admit", 0.0))
+
+    embeddings = np.zeros((0, dim or 1), dtype=np.float32)
+    if dim:
+        embeddings = np.fromfile(os.path.splitext(path)[0] + ".f32", dtype=np.float32)
+        embeddings = embeddings[:len(embeddings) // dim * dim].reshape(-1, dim)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings /= np.where(norms > 0, norms, 1)
+    rows = np.array(rows, dtype=np.int64)
+    # Rows past the end of a torn sidecar count as missing.
+    rows[rows >= len(embeddings)] = -1
+    trace = {
+        "prompt_ids": np.array(prompt_ids, dtype=np.int64),
+        "rows": rows,
+        "sizes": np.array(sizes, dtype=np.int64),
+        "chars": np.array(chars, dtype=np.int64),
+        "cacheable": np.array(cacheable, dtype=bool),
+        "tiers": np.array(tiers),
+        "latencies": np.array(latencies, dtype=np.float64),
+        "lookup": np.array(lookup, dtype=np.float64),
+    }
+    # LLM seconds per prompt: its recorded call if it had one, else the mean.
+    llm_latency = np.array(llm_latency, dtype=np.float64)
+    measured = ~np.isnan(llm_latency)
+    mean_llm = llm_latency[measured].mean() if measured.any() else metrics_manager.LLM_LATENCY_PRIOR_SECONDS
+    per_prompt = np.full(len(ids), mean_llm)
+    per_prompt[trace["prompt_ids"][measured]] = llm_latency[measured]
+    trace["llm_latency"] = per_prompt[trace["prompt_ids"]]
+    return trace, embeddings
+
+
+def latency_model(trace):
+    """Median recorded latency of an exact hit, a T2 hit and a miss minus its LLM call."""
+    def median(mask, values, default):
+        return float(np.median(values[mask])) if mask.any() else default
+
+    tiers = trace["tiers"]
+    misses = tiers == "llm_miss"
+    lookup = median(misses, trace["lookup"], 0.0)
+    return {
+        "exact": median(np.isin(tiers, EXACT_TIERS), trace["latencies"], 0.001),
+        "t2": median(tiers == "t2_hit", trace["latencies"], lookup),
+        "miss_overhead": lookup,
+    }
+
+
+def replay(trace, embeddings, threshold, capacity, eviction, admission, window, exact_tier=True, block=256):
+    """Returns per-event outcomes: 0 = exact hit, 1 = T2 hit, 2 = LLM call."""
+    policy = create_policy(eviction, admission, capacity=capacity, window_fraction=window)
+    low_water = int(capacity * LOW_WATER_FRACTION)
+    dim = embeddings.shape[1]
+    vectors = np.zeros((capacity, dim), dtype=np.float32)
+    live = np.zeros(capacity, dtype=bool)
+    free = list(range(capacity - 1, -1, -1))
+    slot_of = {}                 # doc id (the inserting event's index) -> row of `vectors`
+    doc_at = [None] * capacity   # row of `vectors` -> doc id
+    exact = set()                # prompt ids answerable by exact match
+    outcomes = np.empty(len(trace["rows"]), dtype=np.int8)
+    prompt_ids, rows, sizes = trace["prompt_ids"], trace["rows"], trace["sizes"]
+    cacheable, llm_latency = trace["cacheable"], trace["llm_latency"]
+
+    for start in range(0, len(rows), block):
+        stop = min(len(rows), start + block)
+        # Only events the exact tier cannot answer yet need similarities.
+        events = [event for event in range(start, stop)
+                  if rows[event] >= 0 and not (exact_tier and prompt_ids[event] in exact)]
+        position = dict(zip(events, range(len(events))))
+        queries = embeddings[rows[events]]
+        cached = queries @ vectors.T
+        cached[:, ~live] = -np.inf
+        within = queries @ queries.T
+        # Entries inserted during this block, by position in `queries`.
+        pending = np.zeros(len(events), dtype=bool)
+        pending_ids = {}
+
+        for event in range(start, stop):
+            prompt = prompt_ids[event]
+            if exact_tier and prompt in exact:
+                outcomes[event] = 0
+                continue
+            i = position.get(event)
+            if i is not None:
+                slot = int(cached[i].argmax())
+                best, doc_id = cached[i, slot], doc_at[slot] if live[slot] else None
+                if pending.any():
+                    j = int(np.where(pending, within[i], -np.inf).argmax())
+                    if within[i, j] > best:
+                        best, doc_id = within[i, j], str(events[j])
+                if doc_id is not None and best >= threshold:
+                    policy.record_access(doc_id)
+                    exact.add(prompt)
+                    outcomes[event] = 1
+                    continue
+            outcomes[event] = 2
+            if not cacheable[event]:
+                continue
+            exact.add(prompt)
+            if i is None:
+                continue
+            if len(policy) + 1 > capacity:
+                for victim in policy.pop_victims(max(1, len(policy) - min(low_water, capacity - 1))):
+                    if victim in pending_ids:
+                        pending[pending_ids.pop(victim)] = False
+                    else:
+                        slot = slot_of.pop(victim)
+                        live[slot] = False
+                        cached[:, slot] = -np.inf
+                        free.append(slot)
+            doc_id = str(event)
+            pending[i] = True
+            pending_ids[doc_id] = i
+            policy.record_insert(doc_id, cost=float(llm_latency[event]), size=int(sizes[event]), key=int(prompt))
+
+        # Move this block's surviving inserts into the rows freed by evictions.
+        for doc_id, i in pending_ids.items():
+            slot = free.pop()
+            vectors[slot] = queries[i]
+            live[slot] = True
+            slot_of[doc_id] = slot
+            doc_at[slot] = doc_id
+    return outcomes
+
+
+def summarize(trace, outcomes, model, cost_per_1k_chars):
+    calls = outcomes == 2
+    latency = np.where(outcomes == 0, model["exact"],
+                       np.where(outcomes == 1, model["t2"], model["miss_overhead"] + trace["llm_latency"]))
+    return {
+        "hit_rate": 1 - calls.mean(),
+        "t2_hits": int((outcomes == 1).sum()),
+        "llm_calls": int(calls.sum()),
+        "mean_latency": latency.mean(),
+        "p95_latency": np.percentile(latency, 95),
+        "llm_seconds": trace["llm_latency"][calls].sum(),
+        "cost": trace["chars"][calls].sum() / 1000 * cost_per_1k_chars,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", help="TRACE_FILE written by the API.")
+    parser.add_argument("--threshold", type=float, nargs="+", default=[DEFAULT_THRESHOLD])
+    parser.add_argument("--capacity", type=int, nargs="+", default=[DEFAULT_CAPACITY])
+    parser.add_argument("--policy", nargs="+", default=["lru/always", "gdsf/always", "lru/tinylfu", "gdsf/tinylfu"],
+                        help="eviction/admission pairs, e.g. gdsf/tinylfu.")
+    parser.add_argument("--window", type=float, default=0.01,
+                        help="CACHE_TINYLFU_WINDOW.")
+    parser.add_argument("--no-exact", action="store_true", help="Disable the exact-match tier.")
+    parser.add_argument("--cost-per-1k-chars", type=float, default=0.0005,
+                        help="LLM price per 1000 prompt + response characters.")
+    parser.add_argument("--block", type=int, default=256, help="Events per similarity block.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    trace, embeddings = load_trace(args.trace)
+    events = len(trace["rows"])
+    model = latency_model(trace)
+    recorded = trace["tiers"] == "llm_miss"
+    print(f"{events} events, {len(np.unique(trace['prompt_ids']))} distinct prompts, "
+          f"{(trace['rows'] < 0).sum()} without an embedding; loaded in {time.perf_counter() - start:.1f}s")
+    print(f"latency model: exact hit {model['exact'] * 1000:.2f} ms, T2 hit {model['t2'] * 1000:.2f} ms, "
+          f"miss {model['miss_overhead'] * 1000:.1f} ms + LLM (mean {trace['llm_latency'].mean():.2f}s)")
+    print(f"recorded: hit rate {1 - recorded.mean():.1%}, mean latency {trace['latencies'].mean() * 1000:.1f} ms, "
+          f"{recorded.sum()} LLM calls")
+    print(f"{'threshold':>9} {'capacity':>8} {'policy':>14} {'hit rate':>9} {'T2 hits':>8} {'LLM calls':>9} "
+          f"{'mean ms':>8} {'p95 ms':>8} {'LLM s':>9} {'cost':>9} {'replay s':>8}")
+    for threshold in args.threshold:
+        for capacity in args.capacity:
+            for name in args.policy:
+                eviction, admission = name.split("/")
+                run_start = time.perf_counter()
+                outcomes = replay(trace, embeddings, threshold, capacity, eviction, admission, args.window,
+                                  exact_tier=not args.no_exact, block=args.block)
+                result = summarize(trace, outcomes, model, args.cost_per_1k_chars)
+                print(f"{threshold:>9.2f} {capacity:>8} {name:>14} {result['hit_rate']:>9.1%} "
+                      f"{result['t2_hits']:>8} {result['llm_calls']:>9} {result['mean_latency'] * 1000:>8.1f} "
+                      f"{result['p95_latency'] * 1000:>8.1f} {result['llm_seconds']:>9.1f} {result['cost']:>9.2f} "
+                      f"{time.perf_counter() - run_start:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
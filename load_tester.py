@@ -1,198 +1,373 @@
-import requests
-import time
-import random
-import numpy as np
-import matplotlib.pyplot as plt
-
-# --- Configuration ---
-API_URL = "http://127.0.0.1:8000/process-prompt/"
-
-# --- Workload Definition ---
-# A set of related questions to test semantic and exact-match caching
-PROMPT_CLUSTERS = [
-    [
-        "What is machine learning?",
-        "what is ml?",
-        "explain machine learning to me",
-        "define ml",
-    ],
-    [
-        "What is the capital of France?",
-        "france's capital?",
-        "tell me the capital of france",
-        "capital of the country of france",
-    ],
-    [
-        "How does a neural network work?",
-        "explain neural networks",
-        "what are the principles of a neural network",
-        "describe the function of a neural network",
-    ],
-]
-
-# Unique prompts that should always be a miss on the first try
-NOVEL_PROMPTS = [
-    "What is the airspeed velocity of an unladen swallow?",
-    "Explain the theory of relativity in simple terms.",
-    "Who wrote the novel 'Dune'?",
-    "What are the main components of a CPU?",
-    "Describe the process of photosynthesis.",
-    "What is the chemical formula for water?",
-    "Who was the first person to walk on the moon?",
-    "What is blockchain technology?",
-    "Explain the concept of quantum computing.",
-    "Summarize the plot of the movie 'The Matrix'.",
-]
-
-def generate_workload(total_prompts=100):
-    """
-    Generates a realistic workload with a mix of novel, identical, and similar prompts.
-    """
-    workload = []
-    
-    # 40% Novel Prompts
-    for i in range(int(total_prompts * 0.4)):
-        workload.append(random.choice(NOVEL_PROMPTS) + f" {random.randint(1, 1000)}?") # Add random number to ensure novelty
-
-    # 60% Repetitive/Similar Prompts
-    for _ in range(int(total_prompts * 0.6)):
-        cluster = random.choice(PROMPT_CLUSTERS)
-        workload.append(random.choice(cluster))
-        
-    random.shuffle(workload)
-    return workload
-
-def run_test(workload):
-    """
-    Sends the workload to the API and collects performance data.
-    """
-    results = []
-    print(f"--- Starting Load Test with {len(workload)} prompts ---")
-
-    for i, prompt in enumerate(workload):
-        try:
-            start_time = time.time()
-            response = requests.post(API_URL, json={"prompt": prompt})
-            end_time = time.time()
-
-            latency = (end_time - start_time) * 1000  # Convert to milliseconds
-            
-            if response.status_code == 200:
-                data = response.json()
-                results.append({
-                    "prompt": prompt,
-                    "latency_ms": latency,
-                    "from_cache": data.get("from_cache", False),
-                    "cache_tier": data.get("cache_tier"),
-                })
-                status = "HIT" if data.get("from_cache") else "MISS"
-                tier = f"(Tier {data.get('cache_tier')})" if data.get('cache_tier') else ""
-                print(f"Prompt {i+1}/{len(workload)}: {status} {tier} ({latency:.2f} ms)")
-            else:
-                print(f"Prompt {i+1}/{len(workload)}: FAILED (Status Code: {response.status_code})")
-
-        except requests.exceptions.RequestException as e:
-            print(f"\nFATAL: Could not connect to the API at {API_URL}.")
-            print("Please ensure the backend server is running.")
-            return None
-            
-    print("--- Load Test Finished ---")
-    return results
-
-def analyze_results(results):
-    """
-    Calculates and prints the final performance metrics and generates charts.
-    """
-    if not results:
-        print("No results to analyze.")
-        return
-
-    total_requests = len(results)
-    cache_hits = sum(1 for r in results if r["from_cache"])
-    t1_hits = sum(1 for r in results if r["cache_tier"] == 1)
-    t2_hits = sum(1 for r in results if r["cache_tier"] == 2)
-    cache_misses = total_requests - cache_hits
-
-    latencies = {
-        "llm_call": [r["latency_ms"] for r in results if not r["from_cache"]],
-        "t1_hit": [r["latency_ms"] for r in results if r["cache_tier"] == 1],
-        "t2_hit": [r["latency_ms"] for r in results if r["cache_tier"] == 2],
-    }
-
-    avg_latencies = {
-        "llm_call": np.mean(latencies["llm_call"]) if latencies["llm_call"] else 0,
-        "t1_hit": np.mean(latencies["t1_hit"]) if latencies["t1_hit"] else 0,
-        "t2_hit": np.mean(latencies["t2_hit"]) if latencies["t2_hit"] else 0,
-    }
-
-    print("\n--- Performance Metrics ---")
-    print(f"Total Prompts: {total_requests}")
-    print(f"Total Cache Hit Rate: {(cache_hits / total_requests) * 100:.2f}%")
-    print("-" * 25)
-    print(f"Cache Hits: {cache_hits}")
-    print(f"  - Tier 1 (Exact-Match): {t1_hits} ({(t1_hits / total_requests) * 100:.2f}%)")
-    print(f"  - Tier 2 (Semantic): {t2_hits} ({(t2_hits / total_requests) * 100:.2f}%)")
-    print(f"Cache Misses (LLM Calls): {cache_misses}")
-    print("-" * 25)
-    print("Average Latencies:")
-    print(f"  - LLM Call (Miss): {avg_latencies['llm_call']:.2f} ms")
-    print(f"  - Tier 2 (Semantic Hit): {avg_latencies['t2_hit']:.2f} ms")
-    print(f"  - Tier 1 (Exact-Match Hit): {avg_latencies['t1_hit']:.2f} ms")
-    print("-" * 25)
-    print(f"LLM Calls Avoided: {cache_hits} out of {total_requests}")
-
-    # --- Generate Charts ---
-    generate_charts(avg_latencies, {"T1 Hits": t1_hits, "T2 Hits": t2_hits, "Misses": cache_misses})
-
-def generate_charts(avg_latencies, hit_miss_counts):
-    """Uses Matplotlib to create and save the charts for the presentation."""
-    
-    # Chart 1: Average Response Time
-    plt.style.use('dark_background')
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    labels = ["T1 Exact-Match Hit\n(Redis)", "T2 Semantic Hit\n(ChromaDB)", "LLM Call (Miss)\n(Gemini)"]
-    latencies = [avg_latencies['t1_hit'], avg_latencies['t2_hit'], avg_latencies['llm_call']]
-    
-    bars = ax.bar(labels, latencies, color=['#28a745', '#17a2b8', '#dc3545'])
-    ax.set_yscale('log') # Use logarithmic scale for visibility
-    ax.set_ylabel('Latency (ms) - Logarithmic Scale')
-    ax.set_title('Average Response Time by Cache Tier', fontsize=16)
-    
-    for bar in bars:
-        yval = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2.0, yval * 1.1, f'{yval:.0f} ms', ha='center', va='bottom', fontsize=12)
-
-    plt.tight_layout()
-    plt.savefig('chart_latency_comparison.png')
-    print("\nGenerated chart: chart_latency_comparison.png")
-
-    # Chart 2: Cache Performance Breakdown
-    fig2, ax2 = plt.subplots(figsize=(8, 8))
-    pie_labels = ['Cache Misses', 'Tier-1 Hits', 'Tier-2 Hits']
-    sizes = [hit_miss_counts['Misses'], hit_miss_counts['T1 Hits'], hit_miss_counts['T2 Hits']]
-    colors = ['#dc3545', '#28a745', '#17a2b8']
-    
-    ax2.pie(sizes, labels=pie_labels, autopct='%1.1f%%', startangle=90, colors=colors,
-            wedgeprops={'edgecolor': 'white'}, textprops={'fontsize': 12, 'color': 'white'})
-    ax2.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
-    ax2.set_title('Cache Performance Breakdown', fontsize=16)
-    
-    plt.tight_layout()
-    plt.savefig('chart_performance_breakdown.png')
-    print("Generated chart: chart_performance_breakdown.png")
-
-if __name__ == "__main__":
-    # First, make sure the requirements for this script are installed
-    try:
-        import numpy as np
-        import matplotlib.pyplot as plt
-    except ImportError:
-        print("Required packages numpy and matplotlib are not installed.")
-        print("Please run: pip install numpy matplotlib")
-        exit()
-
-    workload = generate_workload(total_prompts=100)
-    results = run_test(workload)
-    if results:
-        analyze_results(results)
\ No newline at end of file
+import argparse
+import asyncio
+import json
+import requests
+import time
+import random
+import numpy as np
+import matplotlib.pyplot as plt
+
+# --- Configuration ---
+API_URL = "http://127.0.0.1:8000/process-prompt/"
+
+# --- Workload Definition ---
+# A set of related questions to test semantic and exact-match caching
+PROMPT_CLUSTERS = [
+    [
+        "What is machine learning?",
+        "what is ml?",
+        "explain machine learning to me",
+        "define ml",
+    ],
+    [
+        "What is the capital of France?",
+        "france's capital?",
+        "tell me the capital of france",
+        "capital of the country of france",
+    ],
+    [
+        "How does a neural network work?",
+        "explain neural networks",
+        "what are the principles of a neural network",
+        "describe the function of a neural network",
+    ],
+]
+
+# Unique prompts that should always be a miss on the first try
+NOVEL_PROMPTS = [
+    "What is the airspeed velocity of an unladen swallow?",
+    "Explain the theory of relativity in simple terms.",
+    "Who wrote the novel 'Dune'?",
+    "What are the main components of a CPU?",
+    "Describe the process of photosynthesis.",
+    "What is the chemical formula for water?",
+    "Who was the first person to walk on the moon?",
+    "What is blockchain technology?",
+    "Explain the concept of quantum computing.",
+    "Summarize the plot of the movie 'The Matrix'.",
+]
+
+def generate_workload(total_prompts=100):
+    """
+    Generates a realistic workload with a mix of novel, identical, and similar prompts.
+    """
+    workload = []
+    
+    # 40% Novel Prompts
+    for i in range(int(total_prompts * 0.4)):
+        workload.append(random.choice(NOVEL_PROMPTS) + f" {random.randint(1, 1000)}?") # Add random number to ensure novelty
+
+    # 60% Repetitive/Similar Prompts
+    for _ in range(int(total_prompts * 0.6)):
+        cluster = random.choice(PROMPT_CLUSTERS)
+        workload.append(random.choice(cluster))
+        
+    random.shuffle(workload)
+    return workload
+
+def generate_zipf_workload(total_prompts=1000, zipf_s=1.1, novel_ratio=0.2, seed=0):
+    """
+    Generates a reproducible workload with Zipf-skewed popularity.
+
+    Every prompt variant in PROMPT_CLUSTERS gets a popularity rank (variants of
+    the same cluster are interleaved so each cluster has one hot phrasing) and
+    is drawn with probability proportional to 1 / rank**zipf_s. A `novel_ratio`
+    share of the requests are unique NOVEL_PROMPTS with a random suffix.
+    """
+    rng = random.Random(seed)
+    variants = [cluster[i] for i in range(max(map(len, PROMPT_CLUSTERS)))
+                for cluster in PROMPT_CLUSTERS if i < len(cluster)]
+    weights = [1 / (rank ** zipf_s) for rank in range(1, len(variants) + 1)]
+
+    workload = []
+    for _ in range(total_prompts):
+        if rng.random() < novel_ratio:
+            workload.append(rng.choice(NOVEL_PROMPTS) + f" {rng.randint(1, 10**9)}?")
+        else:
+            workload.append(rng.choices(variants, weights=weights)[0])
+    return workload
+
+def _tier_of(data):
+    if data.get("cache_tier") == 0:
+        return "l0_hit"
+    if data.get("cache_tier") == 1:
+        return "t1_hit"
+    if data.get("cache_tier") == 2:
+        return "t2_hit"
+    return "llm_miss"
+
+async def run_open_loop(workload, rps, warmup=0, seed=0, max_in_flight=1000, timeout=60.0):
+    """
+    Sends the workload with Poisson arrivals at `rps` requests per second.
+
+    Arrivals are open-loop: each request is sent at its scheduled time whether
+    or not earlier ones have finished, and latency is measured from the
+    scheduled time, so queueing delay is not hidden. The first `warmup`
+    requests are sent but left out of the results.
+    """
+    import httpx
+
+    rng = random.Random(seed)
+    arrivals, t = [], 0.0
+    for _ in workload:
+        t += rng.expovariate(rps)
+        arrivals.append(t)
+
+    results = []
+    in_flight = asyncio.Semaphore(max_in_flight)
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+
+        async def send(i, prompt, scheduled):
+            delay = start + scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with in_flight:
+                try:
+                    response = await client.post(API_URL, json={"prompt": prompt})
+                    data = response.json() if response.status_code == 200 else {}
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    data, ok = {}, False
+            latency_ms = (time.perf_counter() - (start + scheduled)) * 1000
+            if i >= warmup:
+                results.append({
+                    "prompt": prompt,
+                    "latency_ms": latency_ms,
+                    "ok": ok,
+                    "tier": _tier_of(data) if ok else "error",
+                    "from_cache": data.get("from_cache", False),
+                    "cache_tier": data.get("cache_tier"),
+                    "coalesced": data.get("coalesced", False),
+                    "completed_at": time.perf_counter() - start,
+                })
+
+        await asyncio.gather(*(send(i, p, a) for i, (p, a) in enumerate(zip(workload, arrivals))))
+        elapsed = time.perf_counter() - start
+
+    measured_start = arrivals[warmup] if warmup < len(arrivals) else elapsed
+    return results, max(elapsed - measured_start, 1e-9)
+
+def summarize_open_loop(results, elapsed, target_rps):
+    """Computes throughput and per-tier latency percentiles."""
+    def percentiles(latencies):
+        if not latencies:
+            return {"count": 0}
+        values = np.array(latencies)
+        return {
+            "count": len(values),
+            "p50_ms": float(np.percentile(values, 50)),
+            "p95_ms": float(np.percentile(values, 95)),
+            "p99_ms": float(np.percentile(values, 99)),
+            "max_ms": float(values.max()),
+        }
+
+    ok = [r for r in results if r["ok"]]
+    summary = {
+        "target_rps": target_rps,
+        "achieved_rps": len(ok) / elapsed,
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "hit_rate": sum(r["from_cache"] for r in ok) / len(ok) if ok else 0.0,
+        "coalesced": sum(r["coalesced"] for r in ok),
+        "overall": percentiles([r["latency_ms"] for r in ok]),
+        "tiers": {tier: percentiles([r["latency_ms"] for r in ok if r["tier"] == tier])
+                  for tier in ("l0_hit", "t1_hit", "t2_hit", "llm_miss")},
+    }
+    return summary
+
+def print_open_loop_summary(summary):
+    print(f"\n--- {summary['target_rps']:.1f} RPS target: {summary['achieved_rps']:.1f} RPS achieved, "
+          f"{summary['errors']} errors, hit rate {summary['hit_rate'] * 100:.1f}% ---")
+    print(f"{'tier':>10} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, stats in [("overall", summary["overall"])] + list(summary["tiers"].items()):
+        if stats["count"]:
+            print(f"{name:>10} {stats['count']:>6} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+                  f"{stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+
+def run_rps_sweep(rps_levels, total_prompts, warmup, zipf_s, novel_ratio, seed, slo_ms):
+    """
+    Runs one open-loop test per RPS level and reports the first level whose
+    overall p99 latency exceeds `slo_ms`.
+    """
+    summaries = []
+    for level, rps in enumerate(rps_levels):
+        # A different seed per level keeps novel prompts novel across runs.
+        workload = generate_zipf_workload(total_prompts + warmup, zipf_s, novel_ratio, seed + level)
+        results, elapsed = asyncio.run(run_open_loop(workload, rps, warmup=warmup, seed=seed + level))
+        summary = summarize_open_loop(results, elapsed, rps)
+        print_open_loop_summary(summary)
+        summaries.append(summary)
+
+    breaking = next((s["target_rps"] for s in summaries
+                     if s["overall"]["count"] and s["overall"]["p99_ms"] > slo_ms), None)
+    if breaking is None:
+        print(f"\nOverall p99 stayed under {slo_ms:.0f} ms at every tested rate.")
+    else:
+        print(f"\nOverall p99 first exceeded {slo_ms:.0f} ms at {breaking:.1f} RPS.")
+    return {"slo_ms": slo_ms, "breaking_rps": breaking, "runs": summaries}
+
+def run_test(workload):
+    """
+    Sends the workload to the API and collects performance data.
+    """
+    results = []
+    print(f"--- Starting Load Test with {len(workload)} prompts ---")
+
+    for i, prompt in enumerate(workload):
+        try:
+            start_time = time.time()
+            response = requests.post(API_URL, json={"prompt": prompt})
+            end_time = time.time()
+
+            latency = (end_time - start_time) * 1000  # Convert to milliseconds
+            
+            if response.status_code == 200:
+                data = response.json()
+                results.append({
+                    "prompt": prompt,
+                    "latency_ms": latency,
+                    "from_cache": data.get("from_cache", False),
+                    "cache_tier": data.get("cache_tier"),
+                })
+                status = "HIT" if data.get("from_cache") else "MISS"
+                tier = f"(Tier {data.get('cache_tier')})" if data.get('cache_tier') is not None else ""
+                print(f"Prompt {i+1}/{len(workload)}: {status} {tier} ({latency:.2f} ms)")
+            else:
+                print(f"Prompt {i+1}/{len(workload)}: FAILED (Status Code: {response.status_code})")
+
+        except requests.exceptions.RequestException as e:
+            print(f"\nFATAL: Could not connect to the API at {API_URL}.")
+            print("Please ensure the backend server is running.")
+            return None
+            
+    print("--- Load Test Finished ---")
+    return results
+
+def analyze_results(results):
+    """
+    Calculates and prints the final performance metrics and generates charts.
+    """
+    if not results:
+        print("No results to analyze.")
+        return
+
+    total_requests = len(results)
+    cache_hits = sum(1 for r in results if r["from_cache"])
+    l0_hits = sum(1 for r in results if r["cache_tier"] == 0)
+    t1_hits = sum(1 for r in results if r["cache_tier"] == 1)
+    t2_hits = sum(1 for r in results if r["cache_tier"] == 2)
+    cache_misses = total_requests - cache_hits
+
+    latencies = {
+        "llm_call": [r["latency_ms"] for r in results if not r["from_cache"]],
+        "l0_hit": [r["latency_ms"] for r in results if r["cache_tier"] == 0],
+        "t1_hit": [r["latency_ms"] for r in results if r["cache_tier"] == 1],
+        "t2_hit": [r["latency_ms"] for r in results if r["cache_tier"] == 2],
+    }
+
+    avg_latencies = {
+        "llm_call": np.mean(latencies["llm_call"]) if latencies["llm_call"] else 0,
+        "l0_hit": np.mean(latencies["l0_hit"]) if latencies["l0_hit"] else 0,
+        "t1_hit": np.mean(latencies["t1_hit"]) if latencies["t1_hit"] else 0,
+        "t2_hit": np.mean(latencies["t2_hit"]) if latencies["t2_hit"] else 0,
+    }
+
+    print("\n--- Performance Metrics ---")
+    print(f"Total Prompts: {total_requests}")
+    print(f"Total Cache Hit Rate: {(cache_hits / total_requests) * 100:.2f}%")
+    print("-" * 25)
+    print(f"Cache Hits: {cache_hits}")
+    print(f"  - Tier 0 (In-Process): {l0_hits} ({(l0_hits / total_requests) * 100:.2f}%)")
+    print(f"  - Tier 1 (Exact-Match): {t1_hits} ({(t1_hits / total_requests) * 100:.2f}%)")
+    print(f"  - Tier 2 (Semantic): {t2_hits} ({(t2_hits / total_requests) * 100:.2f}%)")
+    print(f"Cache Misses (LLM Calls): {cache_misses}")
+    print("-" * 25)
+    print("Average Latencies:")
+    print(f"  - LLM Call (Miss): {avg_latencies['llm_call']:.2f} ms")
+    print(f"  - Tier 2 (Semantic Hit): {avg_latencies['t2_hit']:.2f} ms")
+    print(f"  - Tier 1 (Exact-Match Hit): {avg_latencies['t1_hit']:.2f} ms")
+    print(f"  - Tier 0 (In-Process Hit): {avg_latencies['l0_hit']:.2f} ms")
+    print("-" * 25)
+    print(f"LLM Calls Avoided: {cache_hits} out of {total_requests}")
+
+    # --- Generate Charts ---
+    generate_charts(avg_latencies, {"L0 Hits": l0_hits, "T1 Hits": t1_hits, "T2 Hits": t2_hits, "Misses": cache_misses})
+
+def generate_charts(avg_latencies, hit_miss_counts):
+    """Uses Matplotlib to create and save the charts for the presentation."""
+    
+    # Chart 1: Average Response Time
+    plt.style.use('dark_background')
+    fig, ax = plt.subplots(figsize=(10, 6))
+    
+    labels = ["L0 In-Process Hit\n(LRU)", "T1 Exact-Match Hit\n(Redis)", "T2 Semantic Hit\n(ChromaDB)",
+              "LLM Call (Miss)\n(Gemini)"]
+    latencies = [avg_latencies['l0_hit'], avg_latencies['t1_hit'], avg_latencies['t2_hit'], avg_latencies['llm_call']]
+    
+    bars = ax.bar(labels, latencies, color=['#ffc107', '#28a745', '#17a2b8', '#dc3545'])
+    ax.set_yscale('log') # Use logarithmic scale for visibility
+    ax.set_ylabel('Latency (ms) - Logarithmic Scale')
+    ax.set_title('Average Response Time by Cache Tier', fontsize=16)
+    
+    for bar in bars:
+        yval = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2.0, yval * 1.1, f'{yval:.0f} ms', ha='center', va='bottom', fontsize=12)
+
+    plt.tight_layout()
+    plt.savefig('chart_latency_comparison.png')
+    print("\nGenerated chart: chart_latency_comparison.png")
+
+    # Chart 2: Cache Performance Breakdown
+    fig2, ax2 = plt.subplots(figsize=(8, 8))
+    pie_labels = ['Cache Misses', 'Tier-0 Hits', 'Tier-1 Hits', 'Tier-2 Hits']
+    sizes = [hit_miss_counts['Misses'], hit_miss_counts['L0 Hits'], hit_miss_counts['T1 Hits'], hit_miss_counts['T2 Hits']]
+    colors = ['#dc3545', '#ffc107', '#28a745', '#17a2b8']
+    
+    ax2.pie(sizes, labels=pie_labels, autopct='%1.1f%%', startangle=90, colors=colors,
+            wedgeprops={'edgecolor': 'white'}, textprops={'fontsize': 12, 'color': 'white'})
+    ax2.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
+    ax2.set_title('Cache Performance Breakdown', fontsize=16)
+    
+    plt.tight_layout()
+    plt.savefig('chart_performance_breakdown.png')
+    print("Generated chart: chart_performance_breakdown.png")
+
+if __name__ == "__main__":
+    # First, make sure the requirements for this script are installed
+    try:
+        import numpy as np
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("Required packages numpy and matplotlib are not installed.")
+        print("Please run: pip install numpy matplotlib")
+        exit()
+
+    parser = argparse.ArgumentParser(description="Load tester for the semantic cache API.")
+    parser.add_argument("--mode", choices=["sequential", "open-loop"], default="sequential",
+                        help="sequential: the original one-at-a-time test with charts. "
+                             "open-loop: concurrent Poisson arrivals at each --rps level.")
+    parser.add_argument("--prompts", type=int, default=100, help="Measured requests per run.")
+    parser.add_argument("--rps", type=float, nargs="+", default=[5, 10, 20, 40],
+                        help="Target arrival rates to sweep in open-loop mode.")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests at the start of each run.")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent for prompt popularity.")
+    parser.add_argument("--novel-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--slo-ms", type=float, default=1000, help="p99 latency that counts as breaking down.")
+    parser.add_argument("--output", default="load_test_results.json", help="Where to save open-loop results.")
+    args = parser.parse_args()
+
+    if args.mode == "sequential":
+        workload = generate_workload(total_prompts=args.prompts)
+        results = run_test(workload)
+        if results:
+            analyze_results(results)
+    else:
+        report = run_rps_sweep(args.rps, args.prompts, args.warmup, args.zipf_s,
+                               args.novel_ratio, args.seed, args.slo_ms)
+        report["config"] = vars(args)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved results to {args.output}")
\ No newline at end of file
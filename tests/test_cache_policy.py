@@ -0,0 +1,88 @@
+import pytest
+
+from api.services.cache_policy import GDSFPolicy, LRUPolicy, TinyLFUPolicy, create_policy
+
+
+def test_lru_evicts_least_recently_used():
+    policy = LRUPolicy()
+    for doc_id in "abc":
+        policy.record_insert(doc_id)
+    policy.record_access("a")
+    assert policy.pop_victims(2) == ["b", "c"]
+    assert "a" in policy and len(policy) == 1
+
+
+def test_expired_entries_are_swept():
+    policy = LRUPolicy()
+    policy.record_insert("short", ttl=10)
+    policy.record_insert("forever")
+    assert policy.pop_expired(now=policy.expires_at("short") + 1) == ["short"]
+    assert list(policy.pop_victims(5)) == ["forever"]
+
+
+def test_gdsf_evicts_cheap_and_large_entries_first():
+    policy = GDSFPolicy()
+    policy.record_insert("slow", cost=3.0, size=100)
+    policy.record_insert("fast", cost=0.5, size=100)
+    policy.record_insert("huge", cost=3.0, size=10 * GDSFPolicy.SIZE_UNIT)
+    assert policy.pop_victims(3) == ["huge", "fast", "slow"]
+
+
+def test_gdsf_hits_protect_an_entry_until_it_ages_out():
+    policy = GDSFPolicy()
+    policy.record_insert("hot", cost=1.0, size=100)
+    policy.record_insert("cold", cost=1.0, size=100)
+    for _ in range(3):
+        policy.record_access("hot")
+    assert policy.peek_victim() == "cold"
+    assert policy.pop_victims(1) == ["cold"]
+    # Every eviction raises the floor new entries start from, so enough
+    # newer entries eventually outrank an entry that stopped being hit.
+    for i in range(4):
+        policy.record_insert(f"new {i}", cost=1.0, size=100)
+        policy.pop_victims(1)
+    assert "hot" not in policy
+
+
+def settled_tinylfu(main_ids):
+    """A capacity-4 TinyLFU cache (window of 1) whose main part holds `main_ids`."""
+    policy = TinyLFUPolicy(LRUPolicy(), capacity=4, window_fraction=0.25)
+    for doc_id in main_ids + ["filler"]:
+        policy.record_insert(doc_id, key=f"{doc_id} prompt")
+    # Making room settles the window: everything but the newest entry moves to main.
+    assert policy.pop_victims(0) == []
+    return policy
+
+
+def test_tinylfu_admits_a_popular_newcomer_over_a_cold_entry():
+    policy = settled_tinylfu(["old 0", "old 1", "old 2"])
+    policy.record_insert("popular", key="popular prompt")
+    for _ in range(3):
+        policy.record_access("popular")
+    # A one-off candidate ties with main's victim and is the one dropped.
+    assert policy.pop_victims(1) == ["filler"]
+    policy.record_insert("newer", key="newer prompt")
+    # The window's oldest entry is the candidate; it was seen more than main's victim.
+    assert policy.pop_victims(1) == ["old 0"]
+    assert "popular" in policy.main
+
+
+def test_tinylfu_one_off_prompts_only_displace_themselves():
+    policy = settled_tinylfu(["hot 0", "hot 1", "hot 2"])
+    for doc_id in ("hot 0", "hot 1", "hot 2"):
+        for _ in range(3):
+            policy.record_access(doc_id)
+    evicted = []
+    for i in range(20):
+        policy.record_insert(f"one-off {i}", key=f"one-off prompt {i}")
+        evicted += policy.pop_victims(1)
+    assert len(evicted) == 20 and not any(doc_id.startswith("hot") for doc_id in evicted)
+    assert all(doc_id in policy.main for doc_id in ("hot 0", "hot 1", "hot 2"))
+
+
+def test_create_policy_rejects_unknown_names():
+    assert isinstance(create_policy("gdsf", "tinylfu", capacity=10).main, GDSFPolicy)
+    with pytest.raises(ValueError):
+        create_policy("mru")
+    with pytest.raises(ValueError):
+        create_policy("lru", "never")
\ No newline at end of file
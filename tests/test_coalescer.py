@@ -0,0 +1,31 @@
+import asyncio
+
+from api.services.coalescer import RequestCoalescer
+
+
+def test_hold_keeps_prompt_registered_until_done():
+    coalescer = RequestCoalescer()
+
+    async def scenario():
+        applied = asyncio.get_running_loop().create_future()
+        with coalescer.lead("prompt") as result:
+            result.set_result("answer")
+            coalescer.hold(result, applied)
+        assert coalescer.match("prompt") is result
+        applied.set_result(True)
+        await asyncio.sleep(0)
+        assert coalescer.match("prompt") is None
+
+    asyncio.run(scenario())
+
+
+def test_leader_that_gives_up_cancels_and_unregisters():
+    coalescer = RequestCoalescer()
+
+    async def scenario():
+        with coalescer.lead("prompt") as result:
+            assert coalescer.join("prompt") is result
+        assert result.cancelled()
+        assert coalescer.match("prompt") is None
+
+    asyncio.run(scenario())
\ No newline at end of file
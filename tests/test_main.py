@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+
+pytest.importorskip("google.generativeai")
+pytest.importorskip("chromadb")
+
+import httpx
+
+from api import main
+from api.services import cache_manager, llm_provider, metrics_manager, t1_cache
+from api.services.cache_policy import create_policy
+from api.services.embedding_cache import EmbeddingCache
+from api.services.vector_index import create_index
+from benchmarks.fakes import FakeLLM, FakeRedis, RandomProjectionEncoder
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Points the API at fakes and empty caches; returns the FakeRedis used for T1."""
+    cache_manager.flush_writes()
+    monkeypatch.setattr(llm_provider, "EMBEDDING_MODEL", RandomProjectionEncoder())
+    monkeypatch.setattr(llm_provider, "embedding_cache", EmbeddingCache(max_entries=100))
+    monkeypatch.setattr(llm_provider, "_llm_semaphore", asyncio.Semaphore(llm_provider.LLM_MAX_CONCURRENCY))
+    monkeypatch.setattr(cache_manager, "index", create_index("numpy"))
+    monkeypatch.setattr(cache_manager, "policy", create_policy("lru", "always", capacity=cache_manager.CACHE_MAX_SIZE))
+    redis = FakeRedis()
+    monkeypatch.setattr(main, "redis_client", redis)
+    main.l0_cache.clear()
+    yield redis
+    main.l0_cache.clear()
+
+
+def post_all(*requests):
+    """Sends the (path, body) requests concurrently; returns the JSON responses."""
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+            responses = await asyncio.gather(*(client.post(path, json=body) for path, body in requests))
+        return [response.json() for response in responses]
+    return asyncio.run(send())
+
+
+def assert_not_cached(redis, prompt):
+    cache_manager.flush_writes()
+    assert main.l0_cache.get(prompt) is None
+    assert asyncio.run(t1_cache.lookup(redis, prompt)) is None
+    assert cache_manager.find_in_semantic_cache(prompt) is None
+
+
+def test_timed_out_llm_call_is_not_cached(api, monkeypatch):
+    llm = FakeLLM(latency=1.0)
+    monkeypatch.setattr(llm_provider, "GEMINI_MODEL", llm)
+    monkeypatch.setattr(llm_provider, "LLM_TIMEOUT_SECONDS", 0.05)
+    prompt = "what is the capital of france"
+
+    first, second = post_all(("/process-prompt/", {"prompt": prompt}), ("/process-prompt/", {"prompt": prompt}))
+
+    assert "did not respond" in first["response"]
+    assert "did not respond" in second["response"]
+    # The follower was not handed the leader's error; it made its own call.
+    assert llm.calls == 2
+    assert_not_cached(api, prompt)
+
+def test_stream_cut_off_by_timeout_is_not_cached(api, monkeypatch):
+    monkeypatch.setattr(llm_provider, "GEMINI_MODEL", FakeLLM(latency=1.0, first_chunk_latency=0))
+    monkeypatch.setattr(llm_provider, "LLM_TIMEOUT_SECONDS", 0.05)
+    prompt = "explain how tides work"
+
+    async def stream():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+            body = (await client.post("/process-prompt/stream", json={"prompt": prompt})).text
+            # The cache population runs after the stream has ended.
+            await asyncio.gather(*main._background_tasks)
+            return body
+
+    body = asyncio.run(stream())
+    assert "A helpful, cacheable answer" in body
+    assert "did not respond" in body
+    assert body.count("event: done") == 1
+    assert_not_cached(api, prompt)
+
+class FlakyLLM(FakeLLM):
+    """FakeLLM whose first call fails after `latency` seconds; later calls answer at once."""
+
+    async def generate_content_async(self, prompt, stream=False):
+        if self.calls == 0:
+            self.calls += 1
+            await asyncio.sleep(self.latency)
+            raise RuntimeError("overloaded")
+        self.latency = 0
+        return await super().generate_content_async(prompt, stream)
+
+
+def test_batch_followers_take_over_when_the_leader_fails(api, monkeypatch):
+    llm = FlakyLLM(latency=0.2)
+    monkeypatch.setattr(llm_provider, "GEMINI_MODEL", llm)
+    prompt = "how do vaccines work"
+    before = metrics_manager.get_metrics()
+
+    async def send():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None) as client:
+            leader = asyncio.create_task(client.post("/process-prompt/", json={"prompt": prompt}))
+            while main.coalescer.match(prompt) is None:
+                await asyncio.sleep(0.005)
+            batches = [client.post("/process-prompts/", json={"prompts": [prompt, prompt]}) for _ in range(2)]
+            responses = await asyncio.gather(leader, *batches)
+        return [response.json() for response in responses]
+
+    leader, *batches = asyncio.run(send())
+
+    assert "error" in leader["response"]
+    answers = [result["response"] for batch in batches for result in batch["results"]]
+    assert all(answer.startswith("A helpful, cacheable answer") for answer in answers)
+    # One batch took over the failed call; the other joined it instead of calling too.
+    assert llm.calls == 2
+    after = metrics_manager.get_metrics()
+    assert after["total_requests"] - before["total_requests"] == 5
+    assert after["coalesced_requests"] - before["coalesced_requests"] == 2
+    cache_manager.flush_writes()
+    assert main.l0_cache.get(prompt) == answers[0]
+    assert cache_manager.find_in_semantic_cache(prompt)["response"] == answers[0]
\ No newline at end of file
@@ -0,0 +1,33 @@
+import pytest
+
+from api.services import metrics_manager
+from api.services.metrics_manager import SlidingWindow, percentiles
+
+
+def test_percentiles_pick_nearest_rank():
+    values = [float(v) for v in range(100, 0, -1)]
+    assert percentiles(values, (0.5, 0.95, 0.99)) == {"p50": 51.0, "p95": 96.0, "p99": 100.0}
+    assert percentiles([], (0.5,)) == {"p50": None}
+
+
+def test_window_drops_samples_older_than_the_window():
+    window = SlidingWindow(window_seconds=10, max_samples=100)
+    window.observe(1.0, now=0)
+    window.observe(2.0, now=5)
+    window.observe(3.0, now=12)
+    assert window.values(now=12) == [2.0, 3.0]
+    assert len(window.samples) == 2
+
+
+@pytest.mark.parametrize("reader", [metrics_manager.get_metrics, metrics_manager.get_prometheus_metrics])
+def test_percentiles_are_computed_outside_the_lock(reader, monkeypatch):
+    held = []
+
+    def checked(values, quantiles):
+        held.append(metrics_manager._lock.locked())
+        return percentiles(values, quantiles)
+
+    monkeypatch.setattr(metrics_manager, "percentiles", checked)
+    metrics_manager.record_request("t2_hit", 0.01)
+    reader()
+    assert held and not any(held)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import json
+import numpy as np
+
+from api.services.persistence import CachePersistence
+
+
+def vector(seed, dim=4):
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+def export_of(entries):
+    """Builds an export_fn result from {id: (seed, prompt, response, ts)}."""
+    ids = list(entries)
+    return {
+        "ids": ids,
+        "embeddings": np.stack([vector(entries[doc_id][0]) for doc_id in ids]),
+        "prompts": [entries[doc_id][1] for doc_id in ids],
+        "responses": [entries[doc_id][2] for doc_id in ids],
+        "timestamps": np.array([entries[doc_id][3] for doc_id in ids], dtype=np.float64),
+        "expires_at": [None] * len(ids),
+    }
+
+
+def by_id(state):
+    return {doc_id: (state["prompts"][i], state["responses"][i], np.asarray(state["embeddings"][i]))
+            for i, doc_id in enumerate(state["ids"])}
+
+
+def test_empty_directory_loads_nothing(tmp_path):
+    assert CachePersistence(str(tmp_path)).load() is None
+
+
+def test_log_replay_applies_adds_and_deletes(tmp_path):
+    store = CachePersistence(str(tmp_path))
+    for i in range(3):
+        store.log_add(str(i), vector(i), f"prompt {i}", f"response {i}", 100.0 + i)
+    store.log_delete(["1"])
+    store.close()
+
+    state = by_id(CachePersistence(str(tmp_path)).load())
+    assert sorted(state) == ["0", "2"]
+    assert state["2"][:2] == ("prompt 2", "response 2")
+    np.testing.assert_array_equal(state["2"][2], vector(2))
+
+
+def test_snapshot_and_later_log_round_trip(tmp_path):
+    store = CachePersistence(str(tmp_path))
+    entries = {str(i): (i, f"prompt {i}", f"response é {i}", 100.0 + i) for i in range(4)}
+    store.snapshot(lambda: export_of(entries))
+    # After the snapshot: overwrite one snapshot row, delete another, add a new entry.
+    store.log_add("1", vector(11), "prompt 1 v2", "response 1 v2", 200.0)
+    store.log_delete(["2"])
+    store.log_add("9", vector(9), "prompt 9", "response 9", 201.0)
+    store.close()
+
+    state = by_id(CachePersistence(str(tmp_path)).load())
+    assert sorted(state) == ["0", "1", "3", "9"]
+    assert state["0"][:2] == ("prompt 0", "response é 0")
+    assert state["1"][:2] == ("prompt 1 v2", "response 1 v2")
+    np.testing.assert_array_equal(state["1"][2], vector(11))
+    np.testing.assert_array_equal(state["9"][2], vector(9))
+
+
+def test_snapshot_compacts_older_generations(tmp_path):
+    store = CachePersistence(str(tmp_path))
+    store.log_add("0", vector(0), "prompt 0", "response 0", 100.0)
+    store.snapshot(lambda: export_of({"0": (0, "prompt 0", "response 0", 100.0)}))
+    store.snapshot(lambda: export_of({"0": (0, "prompt 0", "response 0", 100.0)}))
+
+    assert not (tmp_path / "log.0.jsonl").exists()
+    assert not (tmp_path / "snapshot.1.npy").exists()
+    assert json.loads((tmp_path / "CURRENT").read_text())["generation"] == 2
+    assert list(CachePersistence(str(tmp_path)).load()["ids"]) == ["0"]
+
+
+def test_torn_tail_is_dropped_and_new_rows_stay_aligned(tmp_path):
+    store = CachePersistence(str(tmp_path))
+    store.log_add("0", vector(0), "prompt 0", "response 0", 100.0)
+    store.log_add("1", vector(1), "prompt 1", "response 1", 101.0)
+    store.close()
+    # Simulate a crash in the middle of a third add: half a vector row and
+    # half a log line made it to disk.
+    with open(tmp_path / "log.0.f32", "ab") as f:
+        f.write(vector(2).tobytes()[:6])
+    with open(tmp_path / "log.0.jsonl", "a") as f:
+        f.write('{"op": "add", "id": "2", "ro')
+
+    state = by_id(CachePersistence(str(tmp_path)).load())
+    assert sorted(state) == ["0", "1"]
+
+    # A restarted process appends after the torn row instead of behind it.
+    store = CachePersistence(str(tmp_path))
+    store.log_add("3", vector(3), "prompt 3", "response 3", 103.0)
+    store.close()
+    assert (tmp_path / "log.0.f32").stat().st_size == 3 * 4 * 4
+    state = by_id(CachePersistence(str(tmp_path)).load())
+    np.testing.assert_array_equal(state["3"][2], vector(3))
+    np.testing.assert_array_equal(state["1"][2], vector(1))
\ No newline at end of file
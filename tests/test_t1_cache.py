@@ -0,0 +1,28 @@
+import pytest
+
+from api.services import t1_cache
+
+
+@pytest.mark.parametrize("first, second", [
+    ("What is 3.5 squared?", "What is 35 squared?"),
+    ("what is 10-3", "what is 103"),
+    ("1,000", "1.000"),
+    ("C++", "C"),
+    ("what is 5!", "what is 5"),
+])
+def test_punctuation_inside_a_prompt_keeps_keys_apart(first, second):
+    assert t1_cache.make_key(first) != t1_cache.make_key(second)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("What is ML?", "what is ml ?"),
+    ("Explain  caching.", "explain caching"),
+    ("ＷＨＡＴ is ml？", "what is ml"),
+])
+def test_surface_variations_share_a_key(first, second):
+    assert t1_cache.make_key(first) == t1_cache.make_key(second)
+
+
+def test_values_round_trip_with_and_without_compression():
+    for response in ("short", "long answer " * 200):
+        assert t1_cache.decode_value(t1_cache.encode_value(response)) == response
\ No newline at end of file
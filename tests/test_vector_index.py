@@ -0,0 +1,116 @@
+import threading
+import numpy as np
+import pytest
+
+from api.services.vector_index import create_index, normalize
+
+BACKENDS = ("numpy", "int8", "binary")
+DIM = 32
+
+
+def vectors(count, seed):
+    return np.random.default_rng(seed).standard_normal((count, DIM)).astype(np.float32)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_search_finds_the_nearest_entry(backend):
+    index = create_index(backend)
+    rows = vectors(50, seed=0)
+    ids = [f"doc-{i}" for i in range(50)]
+    index.add_batch(ids, rows, ids, [f"answer {i}" for i in range(50)], np.zeros(50))
+
+    hits = index.search(rows[7] + 0.01, k=3)
+
+    assert hits[0]["id"] == "doc-7"
+    assert hits[0]["response"] == "answer 7"
+    assert hits[0]["similarity"] == pytest.approx(1.0, abs=1e-3)
+    assert [hit["similarity"] for hit in hits] == sorted((hit["similarity"] for hit in hits), reverse=True)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_search_during_inserts_and_deletes(backend):
+    """Searches running alongside inserts, deletes and growth always pair each id with its own row."""
+    index = create_index(backend, initial_capacity=16) if backend == "numpy" else \
+        create_index(backend, initial_capacity=16, rerank_k=8)
+    anchors = vectors(8, seed=1)
+    anchor_ids = [f"anchor-{i}" for i in range(8)]
+    index.add_batch(anchor_ids, anchors, anchor_ids, anchor_ids, np.zeros(8))
+    written = {doc_id: normalize(vector) for doc_id, vector in zip(anchor_ids, anchors)}
+    done = threading.Event()
+    errors = []
+
+    def write():
+        try:
+            rng = np.random.default_rng(2)
+            added = []
+            for step in range(300):
+                batch = vectors(4, seed=100 + step)
+                ids = [f"doc-{step}-{i}" for i in range(4)]
+                for doc_id, vector in zip(ids, batch):
+                    written[doc_id] = normalize(vector)
+                index.add_batch(ids, batch, ids, ids, np.zeros(4))
+                added.extend(ids)
+                # Swap-remove moves the last rows into the freed slots.
+                index.delete([added.pop(int(rng.integers(len(added)))) for _ in range(2)])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    searches = 0
+    while not done.is_set() or searches < 50:
+        anchor = searches % len(anchors)
+        query = normalize(anchors[anchor])
+        hits = index.search(anchors[anchor], k=3)
+        assert hits[0]["id"] == anchor_ids[anchor]
+        for hit in hits:
+            assert hit["response"] == hit["id"]
+            assert hit["similarity"] == pytest.approx(float(written[hit["id"]] @ query), abs=1e-4)
+        searches += 1
+    writer.join()
+    assert not errors
+
+
+def lock_is_free(index):
+    """Whether another thread can take the index lock right now."""
+    free = []
+
+    def probe():
+        if index._lock.acquire(timeout=1):
+            free.append(True)
+            index._lock.release()
+
+    thread = threading.Thread(target=probe)
+    thread.start()
+    thread.join()
+    return bool(free)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_delete_during_unlocked_scan_is_rechecked(backend, monkeypatch):
+    index = create_index(backend)
+    rows = vectors(10, seed=3)
+    ids = [f"doc-{i}" for i in range(10)]
+    index.add_batch(ids, rows, ids, ids, np.zeros(10))
+    # The first pass runs without the lock; delete the entry it is looking
+    # for in the middle of it.
+    scan = "_rank" if backend == "numpy" else "_approximate_scores"
+    original = getattr(index, scan)
+    calls = []
+
+    def scan_then_delete(*args):
+        result = original(*args)
+        if not calls:
+            calls.append(lock_is_free(index))
+            index.delete(["doc-9"])
+        return result
+
+    monkeypatch.setattr(index, scan, scan_then_delete)
+    hits = index.search(rows[9], k=1)
+
+    assert calls == [True]
+    best = max(range(9), key=lambda i: normalize(rows[i]) @ normalize(rows[9]))
+    assert hits[0]["id"] == f"doc-{best}"
+    assert hits[0]["similarity"] == pytest.approx(float(normalize(rows[best]) @ normalize(rows[9])), abs=1e-4)
\ No newline at end of file
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+
+from api.services.write_behind import WriteBehindQueue
+
+
+class Store:
+    """Records what the writer thread applies; `gate` holds inserts back until set."""
+
+    def __init__(self):
+        self.adds = []
+        self.touches = {}
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def apply_adds(self, entries):
+        self.gate.wait()
+        self.adds.extend(entries)
+
+    def apply_touches(self, touches):
+        self.touches.update(touches)
+
+
+def test_flush_makes_queued_inserts_visible():
+    store = Store()
+    queue = WriteBehindQueue(store.apply_adds, store.apply_touches, flush_interval=10)
+
+    async def produce():
+        for i in range(50):
+            await queue.put_async(i)
+
+    asyncio.run(produce())
+    assert queue.flush(timeout=5)
+    assert store.adds == list(range(50))
+    assert queue.get_stats()["adds_written"] == 50
+
+
+def test_put_async_future_resolves_once_written():
+    store = Store()
+    store.gate.clear()
+    queue = WriteBehindQueue(store.apply_adds, store.apply_touches)
+
+    async def produce():
+        written = await queue.put_async("entry")
+        await asyncio.sleep(0.05)
+        assert not written.done()
+        store.gate.set()
+        return await asyncio.wait_for(written, 5)
+
+    assert asyncio.run(produce()) is True
+    assert store.adds == ["entry"]
+
+
+def test_put_async_future_reports_failed_insert():
+    def fail(entries):
+        raise ValueError("store down")
+
+    queue = WriteBehindQueue(fail, lambda touches: None)
+
+    async def produce():
+        return await asyncio.wait_for(await queue.put_async("entry"), 5)
+
+    assert asyncio.run(produce()) is False
+    assert queue.get_stats()["errors"] == 1
+
+
+def test_full_queue_waits_for_room():
+    store = Store()
+    store.gate.clear()
+    queue = WriteBehindQueue(store.apply_adds, store.apply_touches, max_pending=2, max_batch=1)
+
+    async def produce():
+        producers = [asyncio.create_task(queue.put_async(i)) for i in range(6)]
+        await asyncio.sleep(0.05)
+        assert not all(producer.done() for producer in producers)
+        store.gate.set()
+        return await asyncio.wait_for(asyncio.gather(*producers), 5)
+
+    asyncio.run(produce())
+    assert queue.flush(timeout=5)
+    assert sorted(store.adds) == list(range(6))
+    stats = queue.get_stats()
+    assert stats["backpressure_waits"] >= 1
+    assert stats["max_depth"] <= 2
+
+
+def test_touches_keep_latest_time_per_entry():
+    store = Store()
+    store.gate.clear()
+    queue = WriteBehindQueue(store.apply_adds, store.apply_touches, flush_interval=10)
+
+    async def produce():
+        # A blocked insert keeps the writer busy while the touches pile up.
+        await queue.put_async("entry")
+        await asyncio.sleep(0.05)
+        for timestamp in (1.0, 2.0, 3.0):
+            queue.touch("a", timestamp)
+        queue.touch("b", 5.0)
+
+    asyncio.run(produce())
+    store.gate.set()
+    assert queue.flush(timeout=5)
+    assert store.touches == {"a": 3.0, "b": 5.0}
+    assert queue.get_stats()["touches_merged"] == 2
\ No newline at end of file